@@ -1,7 +1,7 @@
 # fang_service/app_variables.py
 
 import os
-from typing import List, Final
+from typing import Dict, List, Final
 
 # CONSTANTS and Configuration
 # ---------------------------
@@ -35,17 +35,183 @@ RUN_TYPE: Final = os.environ.get("RUN_TYPE", "persistent")
 # Note: FB is now META as of October 2021, but kept as FB for backward compatibility
 # Possible future update: DEFAULT_SYMBOLS = ["META", "AMZN", "NFLX", "GOOG"]
 DEFAULT_SYMBOLS: Final = ["FB", "AMZN", "NFLX", "GOOG"]
-FANG_SYMBOLS: List[str] = os.environ.get("FANG_SYMBOLS", ",".join(DEFAULT_SYMBOLS)).split(",")
+
+# Large universes don't fit comfortably in an env var, so a file with one
+# symbol per line (blank lines and # comments ignored) takes precedence
+FANG_SYMBOLS_FILE: Final = os.environ.get("FANG_SYMBOLS_FILE", "")
+
+def _load_symbols() -> List[str]:
+    """Load the tracked universe from FANG_SYMBOLS_FILE or the FANG_SYMBOLS env var."""
+    if FANG_SYMBOLS_FILE:
+        with open(FANG_SYMBOLS_FILE, "r") as f:
+            raw = [line.split("#", 1)[0] for line in f]
+    else:
+        raw = os.environ.get("FANG_SYMBOLS", ",".join(DEFAULT_SYMBOLS)).split(",")
+    # Normalize and de-duplicate while preserving order
+    return list(dict.fromkeys(s.strip().upper() for s in raw if s.strip()))
+
+FANG_SYMBOLS: List[str] = _load_symbols()
 
 # Time-based configuration
 # How often (in hours) we fetch new data from the API
 FETCH_INTERVAL_HOURS: Final = int(os.environ.get("FETCH_INTERVAL_HOURS", "1"))
 
+# Bar interval requested from Alpha Vantage. Coarser intervals are rolled up
+# from it on demand, so only the finest interval we can afford is fetched.
+# Options: "1min", "5min", "15min", "30min", "60min"
+INGEST_INTERVAL: Final = os.environ.get("INGEST_INTERVAL", "60min")
+
+# Updater scheduling
+# Fetch concurrency is bounded independently of the universe size
+UPDATER_MAX_WORKERS: Final = int(os.environ.get("UPDATER_MAX_WORKERS", "10"))
+# Symbols are split into shards whose refreshes are staggered across the interval
+UPDATER_SHARD_COUNT: Final = int(os.environ.get("UPDATER_SHARD_COUNT", "1"))
+
 # Alpha Vantage API base URL
-ALPHAVANTAGE_BASE_URL: Final = "https://www.alphavantage.co/query"
+# Point this at the local stub (python -m fang_service.core.av_stub_server) for offline testing
+ALPHAVANTAGE_BASE_URL: Final = os.environ.get(
+    "ALPHAVANTAGE_BASE_URL",
+    "https://www.alphavantage.co/query"
+)
 
 # API rate limiting (requests per minute)
 RATE_LIMIT_PER_MINUTE: Final = int(os.environ.get("RATE_LIMIT_PER_MINUTE", "60"))
 
 # Cache settings
-MAX_CACHE_AGE_HOURS: Final = 1000  # How far back to keep data
\ No newline at end of file
+MAX_CACHE_AGE_HOURS: Final = 1000  # How far back to keep data
+# Maximum number of (symbol, interval) series kept in memory for rollups
+SERIES_CACHE_MAX_ENTRIES: Final = int(os.environ.get("SERIES_CACHE_MAX_ENTRIES", "512"))
+# Maximum number of memoized indicator results (see /api/indicators)
+INDICATOR_CACHE_MAX_ENTRIES: Final = int(os.environ.get("INDICATOR_CACHE_MAX_ENTRIES", "1024"))
+# Maximum number of lookups in one /api/batch request
+BATCH_MAX_ITEMS: Final = int(os.environ.get("BATCH_MAX_ITEMS", "500"))
+
+# Streaming (/api/stream, /api/ws/stream)
+# A slow client is dropped once this many distinct symbols are backed up in its queue;
+# repeated updates to the same symbol are coalesced and never count twice
+STREAM_MAX_PENDING_SYMBOLS: Final = int(os.environ.get("STREAM_MAX_PENDING_SYMBOLS", "256"))
+# Maximum bars per symbol in a single pushed delta (newest kept)
+STREAM_MAX_DELTA_BARS: Final = int(os.environ.get("STREAM_MAX_DELTA_BARS", "100"))
+# Seconds between keepalives on an idle stream
+STREAM_HEARTBEAT_SECONDS: Final = float(os.environ.get("STREAM_HEARTBEAT_SECONDS", "15"))
+
+# Response compression (brotli / zstd when installed, otherwise gzip)
+# Bodies smaller than this are sent uncompressed
+COMPRESSION_MINIMUM_SIZE: Final = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", "1024"))
+# Memory budget for reusing compressed bodies of identical payloads (0 disables reuse)
+COMPRESSION_CACHE_MAX_BYTES: Final = int(os.environ.get("COMPRESSION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Path prefixes never compressed: tiny probes and streams
+COMPRESSION_EXCLUDED_PATHS: Final = [
+    p.strip() for p in os.environ.get(
+        "COMPRESSION_EXCLUDED_PATHS", "/api/ping,/api/health,/api/ready,/api/stream,/api/ws"
+    ).split(",") if p.strip()
+]
+
+# Snapshot of the published data, written next to the database and memory-mapped
+# on boot so the first requests after a restart are served without a refresh
+# Minimum seconds between snapshot writes (0 disables snapshots)
+SNAPSHOT_INTERVAL_SECONDS: Final = float(os.environ.get("SNAPSHOT_INTERVAL_SECONDS", "60"))
+# With several workers, one runs the updater and the others map each snapshot it
+# writes; seconds between their checks for a new snapshot
+SEGMENT_POLL_SECONDS: Final = float(os.environ.get("SEGMENT_POLL_SECONDS", "1"))
+
+# Lookups of symbols with no data are answered from memory for this long
+# instead of querying the database again (0 disables)
+NEGATIVE_CACHE_TTL_SECONDS: Final = float(os.environ.get("NEGATIVE_CACHE_TTL_SECONDS", "30"))
+# Maximum remembered unknown symbols (oldest forgotten first)
+NEGATIVE_CACHE_MAX_ENTRIES: Final = int(os.environ.get("NEGATIVE_CACHE_MAX_ENTRIES", "10000"))
+
+# On-demand symbols: a request for an untracked symbol fetches it in the background
+# (the request gets 202 Accepted) and adds it to the refresh rotation until idle
+ON_DEMAND_ENABLED: Final = os.environ.get("ON_DEMAND_ENABLED", "false").lower() == "true"
+# Maximum symbols tracked on demand at once
+ON_DEMAND_MAX_SYMBOLS: Final = int(os.environ.get("ON_DEMAND_MAX_SYMBOLS", "100"))
+# On-demand symbols not requested for this long leave the rotation
+ON_DEMAND_IDLE_TTL_HOURS: Final = float(os.environ.get("ON_DEMAND_IDLE_TTL_HOURS", "24"))
+# A symbol whose on-demand fetch failed isn't retried for this long
+ON_DEMAND_FAILURE_TTL_SECONDS: Final = float(os.environ.get("ON_DEMAND_FAILURE_TTL_SECONDS", "3600"))
+# Retry-After sent with 202 responses
+ON_DEMAND_RETRY_AFTER_SECONDS: Final = int(os.environ.get("ON_DEMAND_RETRY_AFTER_SECONDS", "5"))
+# Threads fetching on-demand symbols, separate from the refresh pool so they don't queue behind a pass
+ON_DEMAND_MAX_WORKERS: Final = int(os.environ.get("ON_DEMAND_MAX_WORKERS", "2"))
+
+# Market-hours scheduling: refresh only while the exchange is trading (pre- and
+# post-market included), just after each bar closes. Disable to refresh every
+# FETCH_INTERVAL_HOURS around the clock.
+MARKET_HOURS_ENABLED: Final = os.environ.get("MARKET_HOURS_ENABLED", "true").lower() == "true"
+MARKET_TIMEZONE: Final = os.environ.get("MARKET_TIMEZONE", "America/New_York")
+# Count pre-market (04:00) and post-market (until 20:00) as open
+MARKET_EXTENDED_HOURS: Final = os.environ.get("MARKET_EXTENDED_HOURS", "true").lower() == "true"
+# Holiday calendar: one YYYY-MM-DD per line, or "YYYY-MM-DD HH:MM" for an early close
+MARKET_HOLIDAYS_FILE: Final = os.environ.get(
+    "MARKET_HOLIDAYS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_holidays.txt")
+)
+# Refresh interval while the market is open (0: one INGEST_INTERVAL bar)
+MARKET_REFRESH_MINUTES: Final = int(os.environ.get("MARKET_REFRESH_MINUTES", "0"))
+# How long after a bar closes to fetch it, giving the provider time to publish it
+BAR_CLOSE_DELAY_SECONDS: Final = float(os.environ.get("BAR_CLOSE_DELAY_SECONDS", "90"))
+
+# Provider circuit breaker: after this many consecutive provider failures (network,
+# rate limit, auth) the updater stops calling Alpha Vantage until a probe succeeds
+PROVIDER_FAILURE_THRESHOLD: Final = int(os.environ.get("PROVIDER_FAILURE_THRESHOLD", "5"))
+# First wait before probing; doubles after each failed probe up to the max
+PROVIDER_RESET_SECONDS: Final = float(os.environ.get("PROVIDER_RESET_SECONDS", "60"))
+PROVIDER_MAX_RESET_SECONDS: Final = float(os.environ.get("PROVIDER_MAX_RESET_SECONDS", "900"))
+# Per-symbol cool-down after a symbol fails twice in a row (e.g. delisted), doubling up to the max
+SYMBOL_BACKOFF_BASE_SECONDS: Final = float(os.environ.get("SYMBOL_BACKOFF_BASE_SECONDS", "3600"))
+SYMBOL_BACKOFF_MAX_SECONDS: Final = float(os.environ.get("SYMBOL_BACKOFF_MAX_SECONDS", "86400"))
+
+# Market data providers, in priority order (comma-separated): "alphavantage", "replay".
+# Later providers are used when earlier ones are out of quota, rate limited or failing.
+MARKET_DATA_PROVIDERS: List[str] = [
+    p.strip().lower() for p in os.environ.get("MARKET_DATA_PROVIDERS", "alphavantage").split(",") if p.strip()
+]
+# Hedged requests: start the next provider if the current one hasn't answered in this long (0 disables)
+PROVIDER_HEDGE_AFTER_MS: Final = float(os.environ.get("PROVIDER_HEDGE_AFTER_MS", "0"))
+# How long a provider that reported a rate limit is skipped
+PROVIDER_RATE_LIMIT_COOLDOWN_SECONDS: Final = float(os.environ.get("PROVIDER_RATE_LIMIT_COOLDOWN_SECONDS", "60"))
+# Client-side Alpha Vantage quota (0: unlimited), e.g. 5 and 25 for the free tier
+ALPHAVANTAGE_CALLS_PER_MINUTE: Final = int(os.environ.get("ALPHAVANTAGE_CALLS_PER_MINUTE", "0"))
+ALPHAVANTAGE_CALLS_PER_DAY: Final = int(os.environ.get("ALPHAVANTAGE_CALLS_PER_DAY", "0"))
+# Replay provider: a JSON file of bars by symbol (like seed_data.json) or a directory of <SYMBOL>.json
+REPLAY_PATH: Final = os.environ.get(
+    "REPLAY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "seed_data.json")
+)
+# Shift recordings forward by whole weeks so they look recent
+REPLAY_REBASE: Final = os.environ.get("REPLAY_REBASE", "true").lower() == "true"
+# Simulated latency per replayed fetch
+REPLAY_LATENCY_MS: Final = float(os.environ.get("REPLAY_LATENCY_MS", "0"))
+
+# Upstream request timeouts: connecting should be quick; reading a full response can take longer
+UPSTREAM_CONNECT_TIMEOUT_SECONDS: Final = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT_SECONDS", "5"))
+UPSTREAM_READ_TIMEOUT_SECONDS: Final = float(os.environ.get("UPSTREAM_READ_TIMEOUT_SECONDS", "30"))
+# Time budget of one refresh pass; requests and retries are cut to fit and symbols not
+# fetched in time are picked up by the next pass (0: no budget)
+UPDATER_CYCLE_BUDGET_SECONDS: Final = float(os.environ.get("UPDATER_CYCLE_BUDGET_SECONDS", "300"))
+# Percentile-based hedging: send a duplicate (or the next provider) once a request runs
+# longer than this percentile of the provider's recent latencies (0 disables)
+PROVIDER_HEDGE_PERCENTILE: Final = float(os.environ.get("PROVIDER_HEDGE_PERCENTILE", "0"))
+# Never hedge sooner than this
+PROVIDER_HEDGE_MIN_MS: Final = float(os.environ.get("PROVIDER_HEDGE_MIN_MS", "250"))
+
+# Exchange timezone of symbols that don't trade in MARKET_TIMEZONE, as SYMBOL=Area/City
+# pairs (comma-separated), e.g. "SHOP.TRT=America/Toronto,VOD.LON=Europe/London".
+# Bar labels are in the symbol's exchange timezone; storage is UTC epoch seconds.
+SYMBOL_TIMEZONES: Dict[str, str] = {
+    pair.split("=", 1)[0].strip().upper(): pair.split("=", 1)[1].strip()
+    for pair in os.environ.get("SYMBOL_TIMEZONES", "").split(",") if "=" in pair
+}
+
+# Worker threads for the blocking (database) work of async request handlers; reads
+# already in memory are served on the event loop without using one
+DB_EXECUTOR_WORKERS: Final = int(os.environ.get("DB_EXECUTOR_WORKERS", "8"))
+
+# Graceful shutdown: once a SIGTERM/SIGINT arrives, readiness fails and new streams are
+# refused; requests already in flight get this long to finish before they are cancelled
+DRAIN_TIMEOUT_SECONDS: Final = float(os.environ.get("DRAIN_TIMEOUT_SECONDS", "25"))
+# How long shutdown waits for the background updater to reach a stage boundary and exit
+UPDATER_STOP_TIMEOUT_SECONDS: Final = float(os.environ.get("UPDATER_STOP_TIMEOUT_SECONDS", "20"))
+
+# Key for the /admin endpoints (trigger, pause and retune refreshes). No default: the
+# admin API answers 404 unless this is set, and to something other than SERVICE_API_KEY
+ADMIN_API_KEY: Final = os.environ.get("ADMIN_API_KEY", "")
\ No newline at end of file
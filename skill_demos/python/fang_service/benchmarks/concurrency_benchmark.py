@@ -0,0 +1,268 @@
+# fang_service/benchmarks/concurrency_benchmark.py
+
+"""
+Request concurrency benchmark: sync handlers on the threadpool vs async handlers.
+
+Drives N concurrent clients in-process (straight ASGI calls, no sockets) through
+a mix of /getStock and /symbolData lookups, against:
+  - threadpool: the previous setup, plain `def` handlers and dependencies that
+    FastAPI runs on anyio's shared 40-thread pool, each reading through the
+    service (and the database at the ingest interval) on every request
+  - async: the current routers, which answer from the version-cached series
+    and JSON on the event loop and send only misses to the sized DB executor
+
+Database reads are simulated with a fixed latency, and a background thread
+publishes a new version of a random symbol every --publish-ms, so both setups
+keep paying for reloads. Both setups are checked to return the same bars
+before timing.
+
+Latency is measured from dispatch to the last response byte. In-process, a
+request that never waits (a cache hit on the event loop) isn't interleaved
+with others, so its latency is its own CPU time; requests that wait (on a
+thread) also queue behind every ready client. Throughput is the headline
+figure; the tail shows what a miss costs under saturation.
+
+Usage:
+    python -m fang_service.benchmarks.concurrency_benchmark --clients 500 --requests 20 --db-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
+
+from fang_service.app_variables import SERVICE_API_KEY, INGEST_INTERVAL
+from fang_service.core.av_stub_server import generate_intraday_series
+from fang_service.core.db_service import StockDataService
+from fang_service.core.encoders import encode_json
+from fang_service.routers import get_stock, alldata
+
+
+def synthetic_symbols(count: int):
+    """Return `count` distinct synthetic ticker symbols (SYM0000, SYM0001, ...)."""
+    return [f"SYM{i:04d}" for i in range(count)]
+
+
+def threadpool_app(service: StockDataService) -> FastAPI:
+    """Build the previous setup: sync handlers and dependencies, one service read per request."""
+    app = FastAPI()
+
+    def verify_api_key(request: Request) -> bool:
+        if request.headers.get("x-api-key") != SERVICE_API_KEY:
+            raise HTTPException(status_code=401, detail="Invalid or missing API key")
+        return True
+
+    def get_service() -> StockDataService:
+        return service
+
+    @app.get("/api/getStock")
+    def get_stock_sync(
+        symbol: str, date: str, hour: int, interval: str = INGEST_INTERVAL,
+        _: bool = Depends(verify_api_key), stock_service: StockDataService = Depends(get_service)
+    ):
+        timestamp = f"{date} {hour:02d}:00:00"
+        bar = stock_service.get_data(symbol, interval=interval).get(timestamp)
+        if not bar:
+            raise HTTPException(status_code=404, detail=f"No data for {symbol} at {timestamp}")
+        return Response(
+            content=encode_json({"symbol": symbol.upper(), "timestamp": timestamp, "data": bar}),
+            media_type="application/json"
+        )
+
+    @app.get("/api/symbolData/{symbol}")
+    def get_symbol_data_sync(
+        symbol: str,
+        _: bool = Depends(verify_api_key), stock_service: StockDataService = Depends(get_service)
+    ):
+        data = stock_service.get_data_json(symbol)
+        if not data:
+            raise HTTPException(status_code=404, detail=f"No data for {symbol}")
+        return Response(content=b"{" + encode_json(symbol.upper()) + b":" + data + b"}", media_type="application/json")
+
+    return app
+
+
+def async_app(service: StockDataService) -> FastAPI:
+    """Build the current setup from the service's own routers."""
+    app = FastAPI()
+
+    async def get_service() -> StockDataService:
+        return service
+
+    app.dependency_overrides[StockDataService] = get_service
+    app.include_router(get_stock.router, prefix="/api")
+    app.include_router(alldata.router, prefix="/api")
+    return app
+
+
+def _percentile(values, q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else 0.0
+
+
+async def _request(app: FastAPI, path: str) -> tuple:
+    """
+    Send one GET straight to the ASGI app and return (status, body).
+
+    Skips an HTTP client so the figures are the server's own cost.
+    """
+    route, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": route, "raw_path": route.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"bench"), (b"x-api-key", SERVICE_API_KEY.encode())],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80)
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return status, body
+
+
+async def _sample(app: FastAPI, paths) -> list:
+    """Fetch a few paths once, for comparing the setups' answers."""
+    return [(status, json.loads(body)) for status, body in [await _request(app, path) for path in paths]]
+
+
+async def _drive(app: FastAPI, paths, clients: int, requests_per_client: int) -> dict:
+    """Run the clients and return latency and throughput figures."""
+    latencies = []
+    errors = 0
+
+    async def one_client(seed: int):
+        nonlocal errors
+        rng = random.Random(seed)
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            status, _ = await _request(app, rng.choice(paths))
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+            # In-process requests that never wait on I/O don't yield; a real
+            # client's round trip would let the other clients in
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_client(seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    total = clients * requests_per_client
+    return {
+        "requests": total,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1) if elapsed else None,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "p99_ms": _percentile(latencies, 99)
+    }
+
+
+def run_benchmark(clients: int, requests_per_client: int, symbols: int, bars: int,
+                  db_ms: float, publish_ms: float) -> dict:
+    """
+    Drive both setups with the same workload and return their figures.
+
+    Args:
+        clients: Concurrent clients
+        requests_per_client: Requests each client sends, one at a time
+        symbols: Synthetic symbols with data
+        bars: Bars per symbol
+        db_ms: Simulated latency of one database read
+        publish_ms: Interval between simulated publishes (0: data never changes)
+
+    Returns:
+        Dictionary of results per setup
+    """
+    names = synthetic_symbols(symbols)
+    # Stringified the way get_stock_data returns the stored REAL/INTEGER columns
+    stored = {
+        symbol: {
+            timestamp: {key: str(int(value)) if key == "5. volume" else str(float(value)) for key, value in bar.items()}
+            for timestamp, bar in generate_intraday_series(symbol, INGEST_INTERVAL, bars).items()
+        }
+        for symbol in names
+    }
+
+    def read_symbol(symbol: str):
+        time.sleep(db_ms / 1000)
+        return dict(stored.get(symbol, {}))
+
+    rng = random.Random(0)
+    paths = []
+    for symbol in names:
+        for timestamp in rng.sample(list(stored[symbol]), min(5, bars)):
+            date, clock = timestamp.split(" ")
+            paths.append(f"/api/getStock?symbol={symbol}&date={date}&hour={int(clock[:2])}")
+        paths.append(f"/api/symbolData/{symbol}")
+
+    results = {}
+    with patch("fang_service.core.db_service.get_stock_data", side_effect=read_symbol), \
+            patch("fang_service.core.db_service.get_symbols_with_data", return_value=names):
+        for name, build in (("threadpool", threadpool_app), ("async", async_app)):
+            service = StockDataService()
+            service.symbol_versions = {symbol: 1 for symbol in names}
+            service.data_version = 1
+            app = build(service)
+
+            # Same answers from both setups
+            results.setdefault("_samples", []).append(asyncio.run(_sample(app, paths[:6])))
+
+            stop = threading.Event()
+
+            def publisher():
+                while publish_ms and not stop.wait(publish_ms / 1000):
+                    symbol = rng.choice(names)
+                    with service._lock:
+                        service.data_version += 1
+                        service.symbol_versions[symbol] = service.data_version
+
+            thread = threading.Thread(target=publisher, daemon=True)
+            thread.start()
+            try:
+                results[name] = asyncio.run(_drive(app, paths, clients, requests_per_client))
+            finally:
+                stop.set()
+                thread.join()
+            if name == "async":
+                results[name]["db_executor"] = service.db_executor.get_stats()
+            service.db_executor.shutdown()
+
+    first, second = results.pop("_samples")
+    assert first == second, "setups returned different responses"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync threadpool handlers against async handlers")
+    parser.add_argument("--clients", type=int, default=500, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--symbols", type=int, default=50, help="Synthetic symbols")
+    parser.add_argument("--bars", type=int, default=500, help="Bars per symbol")
+    parser.add_argument("--db-ms", type=float, default=2.0, help="Simulated database read latency")
+    parser.add_argument("--publish-ms", type=float, default=50.0, help="Interval between simulated publishes")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.clients, args.requests, args.symbols, args.bars, args.db_ms, args.publish_ms)
+    print(f"{'setup':<12} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for name in ("threadpool", "async"):
+        r = results[name]
+        print(f"{name:<12} {r['requests_per_second']:>10} {r['p50_ms']:>10} {r['p95_ms']:>10} {r['p99_ms']:>10} {r['errors']:>8}")
+    print(f"DB executor: {results['async']['db_executor']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# fang_service/benchmarks/ingest_benchmark.py
+
+"""
+Ingest throughput benchmark against the local Alpha Vantage stub.
+
+Fetches N synthetic symbols through fetch_intraday_data with a thread pool and
+reports throughput and failure counts. No real API quota is used.
+
+Usage:
+    python -m fang_service.benchmarks.ingest_benchmark --symbols 500 --workers 20 --latency-ms 50
+"""
+
+import argparse
+import concurrent.futures
+import time
+from unittest.mock import patch
+
+from fang_service.core import data_fetcher
+from fang_service.core.av_stub_server import AlphaVantageStubServer, StubBehavior
+from fang_service.core.exceptions import APIError
+
+
+def synthetic_symbols(count: int):
+    """Return `count` distinct synthetic ticker symbols (SYM0000, SYM0001, ...)."""
+    return [f"SYM{i:04d}" for i in range(count)]
+
+
+def run_benchmark(symbols: int, workers: int, behavior: StubBehavior, retry_delay: float = 0.01):
+    """
+    Fetch `symbols` symbols from a fresh stub and return a result summary.
+
+    Args:
+        symbols: Number of synthetic symbols to fetch
+        workers: Thread pool size
+        behavior: Stub behavior (latency, failure rates, ...)
+        retry_delay: RETRY_DELAY override so backoff doesn't dominate the run
+
+    Returns:
+        Dictionary with timing, throughput and failure statistics
+    """
+    results = {"ok": 0, "failed": 0, "bars": 0}
+
+    with AlphaVantageStubServer(behavior=behavior) as stub, \
+            patch.object(data_fetcher, "ALPHAVANTAGE_BASE_URL", stub.base_url), \
+            patch.object(data_fetcher, "RETRY_DELAY", retry_delay):
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(data_fetcher.fetch_intraday_data, s) for s in synthetic_symbols(symbols)]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    results["bars"] += len(future.result())
+                    results["ok"] += 1
+                except APIError:
+                    results["failed"] += 1
+        elapsed = time.perf_counter() - start
+
+    results.update({
+        "symbols": symbols,
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "symbols_per_second": round(symbols / elapsed, 1) if elapsed else None,
+        "stub_stats": stub.stats
+    })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest throughput against the Alpha Vantage stub")
+    parser.add_argument("--symbols", type=int, default=500, help="Number of synthetic symbols")
+    parser.add_argument("--workers", type=int, default=10, help="Fetch thread pool size")
+    parser.add_argument("--full-bars", type=int, default=1000, help="Bars per symbol")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub response latency")
+    parser.add_argument("--note-rate", type=float, default=0.0, help="Probability of a frequency Note")
+    parser.add_argument("--error-burst-every", type=int, default=0, help="Error burst cycle length")
+    parser.add_argument("--error-burst-length", type=int, default=0, help="Failing requests per burst")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Probability of a truncated body")
+
+    args = parser.parse_args()
+
+    behavior = StubBehavior(
+        full_bars=args.full_bars,
+        latency_ms=args.latency_ms,
+        note_rate=args.note_rate,
+        error_burst_every=args.error_burst_every,
+        error_burst_length=args.error_burst_length,
+        truncate_rate=args.truncate_rate,
+        seed=42
+    )
+    results = run_benchmark(args.symbols, args.workers, behavior)
+    for key, value in results.items():
+        print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# fang_service/benchmarks/scheduler_benchmark.py
+
+"""
+Updater scaling benchmark against the local Alpha Vantage stub.
+
+Measures, for a synthetic universe of N symbols:
+  - full refresh time (every symbol at once, as on a fresh database)
+  - one shard pass (what the background updater does each time a shard comes due)
+  - resident memory growth of the service process
+
+Each universe size runs in its own process against its own temporary
+database, since the tracked universe is read from the environment at import.
+
+Usage:
+    python -m fang_service.benchmarks.scheduler_benchmark --sweep 100,500,1000,5000
+    python -m fang_service.benchmarks.scheduler_benchmark --symbols 1000 --shards 12 --workers 20
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 10.0):
+    """Block until something accepts connections on the port."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Stub did not start listening on port {port}")
+
+
+def run_single(symbols: int, shards: int, workers: int, bars: int, latency_ms: float):
+    """
+    Benchmark one universe size in this process and print a JSON result line.
+
+    Must run before any fang_service module that reads the configuration is imported.
+    """
+    workdir = tempfile.mkdtemp(prefix="fang_bench_")
+    symbols_file = os.path.join(workdir, "symbols.txt")
+    with open(symbols_file, "w") as f:
+        f.write("\n".join(f"SYM{i:05d}" for i in range(symbols)))
+
+    os.environ.update({
+        "DB_DIR": workdir,
+        "FANG_SYMBOLS_FILE": symbols_file,
+        "UPDATER_SHARD_COUNT": str(shards),
+        "UPDATER_MAX_WORKERS": str(workers),
+        "MARKET_HOURS_ENABLED": "false",  # Same shard slots whenever it runs
+        "LOG_LEVEL": "ERROR"
+    })
+
+    import psutil
+    from unittest.mock import patch
+    from fang_service.core import data_fetcher
+
+    # The stub runs in its own process so its JSON encoding doesn't compete
+    # with the updater for the GIL (as it wouldn't in production)
+    port = _free_port()
+    stub_process = subprocess.Popen(
+        [sys.executable, "-m", "fang_service.core.av_stub_server", "--port", str(port),
+         "--full-bars", str(bars), "--latency-ms", str(latency_ms), "--seed", "42"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}/query"
+    _wait_for_port(port)
+
+    try:
+        with patch.object(data_fetcher, "ALPHAVANTAGE_BASE_URL", base_url):
+            from fang_service.core.db_service import StockDataService
+
+            process = psutil.Process()
+            rss_before = process.memory_info().rss
+
+            service = StockDataService()
+
+            start = time.perf_counter()
+            service.update_cache()
+            full_refresh = time.perf_counter() - start
+
+            # Next shard pass: claim whatever comes due first after the full refresh
+            first_due = service.scheduler.next_due_time()
+            shard_symbols = service.scheduler.pop_due(now=first_due)
+            start = time.perf_counter()
+            service._run_pass(shard_symbols)
+            shard_pass = time.perf_counter() - start
+
+            rss_after = process.memory_info().rss
+    finally:
+        stub_process.terminate()
+        stub_process.wait()
+
+    print(json.dumps({
+        "symbols": symbols,
+        "shards": shards,
+        "workers": workers,
+        "bars_per_symbol": bars,
+        "full_refresh_seconds": round(full_refresh, 2),
+        "shard_pass_symbols": len(shard_symbols),
+        "shard_pass_seconds": round(shard_pass, 2),
+        "rss_growth_mb": round((rss_after - rss_before) / 1024 / 1024, 1),
+        "published_version": service.data_version
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark updater scaling against the Alpha Vantage stub")
+    parser.add_argument("--symbols", type=int, default=1000, help="Universe size for a single run")
+    parser.add_argument("--sweep", type=str, default="", help="Comma-separated universe sizes (one process each)")
+    parser.add_argument("--shards", type=int, default=12, help="UPDATER_SHARD_COUNT")
+    parser.add_argument("--workers", type=int, default=20, help="UPDATER_MAX_WORKERS")
+    parser.add_argument("--bars", type=int, default=100, help="Bars per symbol served by the stub")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub response latency")
+
+    args = parser.parse_args()
+
+    if not args.sweep:
+        run_single(args.symbols, args.shards, args.workers, args.bars, args.latency_ms)
+        return
+
+    header = f"{'symbols':>8} {'full refresh s':>15} {'shard symbols':>14} {'shard pass s':>13} {'RSS growth MB':>14}"
+    print(header)
+    for size in (int(s) for s in args.sweep.split(",")):
+        output = subprocess.run(
+            [sys.executable, "-m", "fang_service.benchmarks.scheduler_benchmark",
+             "--symbols", str(size), "--shards", str(args.shards), "--workers", str(args.workers),
+             "--bars", str(args.bars), "--latency-ms", str(args.latency_ms)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{result['symbols']:>8} {result['full_refresh_seconds']:>15} {result['shard_pass_symbols']:>14} "
+            f"{result['shard_pass_seconds']:>13} {result['rss_growth_mb']:>14}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# fang_service/benchmarks/segment_benchmark.py
+
+"""
+Per-worker memory benchmark: shared mmap segment vs per-process copies.
+
+For a synthetic universe of N symbols, writes one snapshot segment and then,
+in a fresh process per mode, reads every symbol's bars:
+  - copies: each worker holds every symbol's bars as Python dicts (what a
+    worker builds when it keeps its own copy of the data)
+  - segment: a follower worker maps the segment and serves zero-copy views
+
+Private memory is resident memory not backed by a file (RSS minus shared
+pages), i.e. what each additional worker costs. Linux only.
+
+Usage:
+    python -m fang_service.benchmarks.segment_benchmark --sweep 100,1000,5000 --bars 1000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def _private_mb(process) -> float:
+    info = process.memory_info()
+    return (info.rss - info.shared) / 1024 / 1024
+
+
+def write_segment(path: str, symbols: int, bars: int):
+    """Write a segment of synthetic hourly bars."""
+    from fang_service.core.series import SymbolSeries
+    from fang_service.core.snapshot import write_snapshot
+
+    rng = np.random.default_rng(42)
+    timestamps = 1_700_000_000 + np.arange(bars, dtype=np.int64) * 3600
+    series = {}
+    for i in range(symbols):
+        close = 100 + np.cumsum(rng.normal(0, 0.5, bars))
+        series[f"SYM{i:05d}"] = SymbolSeries(
+            timestamps, close - 0.1, close + 0.5, close - 0.5, close, rng.integers(1000, 100000, bars)
+        )
+    write_snapshot(path, symbols, "60min", series, {symbol: i + 1 for i, symbol in enumerate(series)})
+
+
+def run_single(path: str, mode: str):
+    """
+    Read every symbol in this process and print a JSON result line.
+
+    Must run before any fang_service module that reads the configuration is imported.
+    """
+    os.environ.update({"DB_DIR": os.path.dirname(path), "LOG_LEVEL": "ERROR"})
+
+    import psutil
+    from fang_service.core.db_service import StockDataService
+    from fang_service.core.snapshot import load_snapshot
+
+    process = psutil.Process()
+    before = _private_mb(process)
+    start = time.perf_counter()
+
+    if mode == "copies":
+        snapshot = load_snapshot(path)
+        held = {symbol: snapshot.series(symbol).to_bars() for symbol in snapshot.symbols()}
+        checksum = sum(len(bars) for bars in held.values())
+    else:
+        service = StockDataService()
+        service.follow_segment(path)
+        checksum = 0
+        for symbol in service.symbol_versions:
+            checksum += len(service.get_series(symbol).close)
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "mode": mode,
+        "bars_read": checksum,
+        "seconds": round(elapsed, 2),
+        "private_growth_mb": round(_private_mb(process) - before, 1)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-worker memory with a shared segment")
+    parser.add_argument("--sweep", type=str, default="100,1000,5000", help="Comma-separated universe sizes")
+    parser.add_argument("--bars", type=int, default=1000, help="Bars per symbol")
+    parser.add_argument("--run", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_single(*args.run)
+        return
+
+    print(f"{'symbols':>8} {'segment MB':>11} {'copies private MB':>18} {'segment private MB':>19}")
+    for size in (int(s) for s in args.sweep.split(",")):
+        workdir = tempfile.mkdtemp(prefix="fang_segment_")
+        path = os.path.join(workdir, "fang_stocks.snapshot")
+        write_segment(path, size, args.bars)
+
+        results = {}
+        for mode in ("copies", "segment"):
+            output = subprocess.run(
+                [sys.executable, "-m", "fang_service.benchmarks.segment_benchmark", "--run", path, mode],
+                capture_output=True, text=True, check=True
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+        print(
+            f"{size:>8} {os.path.getsize(path) / 1024 / 1024:>11.1f} "
+            f"{results['copies']['private_growth_mb']:>18} {results['segment']['private_growth_mb']:>19}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# fang_service/benchmarks/serialization_benchmark.py
+
+"""
+Response serialization benchmark: FastAPI model path vs the fast path.
+
+Compares per-request CPU time for producing response bytes:
+  - /getStock: response_model=StockResponse validation + alias serialization
+    (what FastAPI does for a returned dict) vs encode_json on the same dict
+  - /symbolData: jsonable_encoder + JSONResponse over 1000 bars vs splicing
+    the version-cached pre-encoded bars (and vs encoding them once, as the
+    first read after each update does)
+
+Both paths are checked to produce the same JSON before timing.
+
+Usage:
+    python -m fang_service.benchmarks.serialization_benchmark --iterations 2000 --bars 1000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from fang_service.core.av_stub_server import generate_intraday_series
+from fang_service.core.encoders import encode_json
+from fang_service.main import app
+
+
+def _route(path: str):
+    return next(route for route in app.routes if getattr(route, "path", None) == path)
+
+
+def _cpu_per_call(func, iterations: int) -> float:
+    """Return mean CPU microseconds per call."""
+    func()  # Warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def run_benchmark(iterations: int, bars: int) -> dict:
+    """
+    Time both serialization paths and return microseconds per request.
+
+    Args:
+        iterations: Requests timed per path (the bulk case runs a tenth as many)
+        bars: Bars in the bulk payload
+
+    Returns:
+        Dictionary of per-endpoint timings and speedups
+    """
+    series = generate_intraday_series("AMZN", "60min", bars)
+    timestamp, bar = next(iter(series.items()))
+    point = {"symbol": "AMZN", "timestamp": timestamp, "data": bar}
+
+    response_field = _route("/api/getStock").response_field
+    loop = asyncio.new_event_loop()
+
+    def model_point() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=response_field, response_content=point, is_coroutine=True)
+        )
+        return JSONResponse(content).body
+
+    def fast_point() -> bytes:
+        return encode_json(point)
+
+    encoded_bars = encode_json(series)  # Built once per data version in the service
+
+    def model_bulk() -> bytes:
+        return JSONResponse(jsonable_encoder({"AMZN": series})).body
+
+    def fast_bulk() -> bytes:
+        return b"{" + encode_json("AMZN") + b":" + encoded_bars + b"}"
+
+    def fast_bulk_cold() -> bytes:
+        # First read after an update: the bars have to be encoded once
+        return b"{" + encode_json("AMZN") + b":" + encode_json(series) + b"}"
+
+    assert json.loads(model_point()) == json.loads(fast_point())
+    assert model_bulk() == fast_bulk()
+
+    results = {}
+    for name, model, fast, count in (
+        ("getStock", model_point, fast_point, iterations),
+        (f"symbolData ({bars} bars)", model_bulk, fast_bulk, max(1, iterations // 10)),
+        ("  first read per version", model_bulk, fast_bulk_cold, max(1, iterations // 10)),
+    ):
+        model_us = _cpu_per_call(model, count)
+        fast_us = _cpu_per_call(fast, count)
+        results[name] = {
+            "model_us": round(model_us, 1),
+            "fast_us": round(fast_us, 1),
+            "saved_us": round(model_us - fast_us, 1),
+            "speedup": round(model_us / fast_us, 1) if fast_us else None
+        }
+    loop.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization paths")
+    parser.add_argument("--iterations", type=int, default=2000, help="Requests timed per path")
+    parser.add_argument("--bars", type=int, default=1000, help="Bars in the bulk payload")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.iterations, args.bars)
+    print(f"{'endpoint':<24} {'model us':>10} {'fast us':>10} {'saved us':>10} {'speedup':>8}")
+    for name, r in results.items():
+        print(f"{name:<24} {r['model_us']:>10} {r['fast_us']:>10} {r['saved_us']:>10} {r['speedup']:>7}x")
+
+
+if __name__ == "__main__":
+    main()
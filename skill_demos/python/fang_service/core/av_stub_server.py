@@ -0,0 +1,419 @@
+# fang_service/core/av_stub_server.py
+
+"""
+Local Alpha Vantage stand-in server.
+
+Serves synthetic TIME_SERIES_INTRADAY payloads for any symbol so the ingest
+pipeline can be exercised and benchmarked offline. Failure modes seen on the
+real API (frequency "Note" responses, daily-limit "Information" responses,
+5xx bursts, truncated bodies, slow links) can be injected via StubBehavior.
+
+Run standalone:
+    python -m fang_service.core.av_stub_server --port 8100 --note-rate 0.05
+
+Then point the service at it:
+    ALPHAVANTAGE_BASE_URL=http://127.0.0.1:8100/query python -m fang_service.main
+"""
+
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse, parse_qs
+
+from fang_service.core.logging_config import get_logger
+from fang_service.core.timezones import get_zone
+
+logger = get_logger(__name__)
+
+# Constants for the module
+SUPPORTED_INTERVALS = {"1min": 1, "5min": 5, "15min": 15, "30min": 30, "60min": 60}
+COMPACT_BARS = 100
+DEFAULT_FULL_BARS = 1000
+WRITE_CHUNK_BYTES = 16 * 1024
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+NOTE_MESSAGE = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is "
+    "5 calls per minute and 500 calls per day."
+)
+INFORMATION_MESSAGE = (
+    "Thank you for using Alpha Vantage! Our standard API rate limit is "
+    "25 requests per day. Please subscribe to any of the premium plans to "
+    "instantly remove all daily rate limits."
+)
+
+
+class StubBehavior:
+    """
+    Tunable behavior of the stub server.
+
+    Rates are probabilities in [0, 1] evaluated per request. Error bursts are
+    deterministic: out of every `error_burst_every` requests, the first
+    `error_burst_length` fail with `error_status`.
+    """
+
+    def __init__(
+        self,
+        full_bars: int = DEFAULT_FULL_BARS,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        bandwidth_bytes_per_sec: int = 0,
+        note_rate: float = 0.0,
+        information_rate: float = 0.0,
+        error_burst_every: int = 0,
+        error_burst_length: int = 0,
+        error_status: int = 503,
+        truncate_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the stub behavior.
+
+        Args:
+            full_bars: Number of bars returned for outputsize=full
+            latency_ms: Fixed delay before the response is sent
+            latency_jitter_ms: Uniform random delay added on top of latency_ms
+            bandwidth_bytes_per_sec: Throttle for the response body (0 = unlimited)
+            note_rate: Probability of an "API call frequency" Note response
+            information_rate: Probability of a daily-limit Information response
+            error_burst_every: Length of the error burst cycle in requests (0 = off)
+            error_burst_length: Number of failing requests at the start of each cycle
+            error_status: HTTP status used for burst errors
+            truncate_rate: Probability of a body cut off halfway through
+            seed: Seed for the failure injection random generator
+        """
+        self.full_bars = full_bars
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.bandwidth_bytes_per_sec = bandwidth_bytes_per_sec
+        self.note_rate = note_rate
+        self.information_rate = information_rate
+        self.error_burst_every = error_burst_every
+        self.error_burst_length = error_burst_length
+        self.error_status = error_status
+        self.truncate_rate = truncate_rate
+        self.seed = seed
+
+
+def generate_intraday_series(
+    symbol: str,
+    interval: str = "60min",
+    bars: int = COMPACT_BARS,
+    end: Optional[datetime.datetime] = None
+) -> Dict[str, Dict[str, str]]:
+    """
+    Generate a deterministic synthetic time series for a symbol.
+
+    The same symbol, interval and end time always produce the same prices,
+    which keeps repeated fetches stable (as they are on the real API).
+    Weekend bars are skipped.
+
+    Args:
+        symbol: Stock symbol used to seed the random walk
+        interval: Alpha Vantage interval string (e.g. 60min)
+        bars: Number of bars to generate
+        end: Timestamp of the newest bar (default: now in US/Eastern, like the
+            real API's labels, aligned to the interval)
+
+    Returns:
+        Dictionary of bars keyed by timestamp, newest first, in Alpha Vantage format
+    """
+    minutes = SUPPORTED_INTERVALS[interval]
+    if end is None:
+        now = datetime.datetime.now(get_zone("America/New_York")).replace(second=0, microsecond=0, tzinfo=None)
+        end = now - datetime.timedelta(minutes=now.minute % minutes)
+
+    rng = random.Random(zlib.crc32(f"{symbol}:{interval}".encode()))
+    price = 20.0 + rng.random() * 480.0
+    step = datetime.timedelta(minutes=minutes)
+
+    # Walk backwards from the newest bar, skipping weekends
+    timestamps = []
+    ts = end
+    while len(timestamps) < bars:
+        if ts.weekday() < 5:
+            timestamps.append(ts)
+        ts -= step
+
+    series = {}
+    for ts in reversed(timestamps):
+        open_price = price
+        close_price = max(1.0, price * (1 + rng.uniform(-0.01, 0.01)))
+        high_price = max(open_price, close_price) * (1 + rng.uniform(0, 0.003))
+        low_price = min(open_price, close_price) * (1 - rng.uniform(0, 0.003))
+        volume = int(rng.uniform(0.5, 1.5) * 100_000 * minutes)
+        price = close_price
+
+        series[ts.strftime(TIMESTAMP_FORMAT)] = {
+            "1. open": f"{open_price:.4f}",
+            "2. high": f"{high_price:.4f}",
+            "3. low": f"{low_price:.4f}",
+            "4. close": f"{close_price:.4f}",
+            "5. volume": str(volume)
+        }
+
+    # Alpha Vantage returns the newest bar first
+    return dict(reversed(list(series.items())))
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    """Request handler emulating the Alpha Vantage /query endpoint."""
+
+    server: "_StubHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """Serve a single Alpha Vantage style request."""
+        stub = self.server.stub
+        outcome = stub._next_outcome()
+        stub._sleep_latency()
+
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+        if outcome == "error":
+            self._send_json({"error": "Service temporarily unavailable"}, status=stub.behavior.error_status)
+            return
+        if outcome == "note":
+            self._send_json({"Note": NOTE_MESSAGE})
+            return
+        if outcome == "information":
+            self._send_json({"Information": INFORMATION_MESSAGE})
+            return
+
+        payload = stub.build_payload(params)
+        self._send_json(payload, truncate=(outcome == "truncate"))
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200, truncate: bool = False):
+        """Write a JSON body, honoring bandwidth throttling and truncation."""
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if truncate:
+            self.send_header("Connection", "close")
+        self.end_headers()
+
+        if truncate:
+            body = body[:len(body) // 2]
+            self.close_connection = True
+
+        self.server.stub._write_throttled(self.wfile, body)
+
+    def log_message(self, format, *args):
+        """Route http.server access logs through the service logger."""
+        logger.debug(f"Stub request: {format % args}")
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    """Threading HTTP server carrying a reference to its stub."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, stub: "AlphaVantageStubServer"):
+        self.stub = stub
+        super().__init__(address, _StubRequestHandler)
+
+
+class AlphaVantageStubServer:
+    """
+    In-process Alpha Vantage stand-in, usable as a context manager.
+
+    Example:
+        with AlphaVantageStubServer(behavior=StubBehavior(note_rate=0.1)) as stub:
+            os.environ["ALPHAVANTAGE_BASE_URL"] = stub.base_url
+            ...
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, behavior: Optional[StubBehavior] = None):
+        """
+        Initialize the stub server (not started).
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            behavior: Failure injection and sizing behavior
+        """
+        self.behavior = behavior or StubBehavior()
+        self._httpd = _StubHTTPServer((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.behavior.seed)
+
+        # Statistics for benchmarks and assertions
+        self.stats = {
+            "requests": 0,
+            "ok": 0,
+            "notes": 0,
+            "informations": 0,
+            "errors": 0,
+            "truncated": 0,
+            "bytes_sent": 0
+        }
+
+    @property
+    def base_url(self) -> str:
+        """URL to use as ALPHAVANTAGE_BASE_URL."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/query"
+
+    def start(self) -> "AlphaVantageStubServer":
+        """Start serving on a background daemon thread."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            name="AlphaVantageStub",
+            daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Alpha Vantage stub listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        """Stop serving and release the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def __enter__(self) -> "AlphaVantageStubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def build_payload(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Build a successful Alpha Vantage response body for the given query.
+
+        Args:
+            params: Query string parameters (function, symbol, interval, outputsize)
+
+        Returns:
+            Response payload in Alpha Vantage format
+        """
+        function = params.get("function")
+        symbol = params.get("symbol", "").upper()
+        interval = params.get("interval", "60min")
+
+        if function != "TIME_SERIES_INTRADAY" or not symbol or interval not in SUPPORTED_INTERVALS:
+            return {"Error Message": "Invalid API call. Please retry or visit the documentation for TIME_SERIES_INTRADAY."}
+
+        bars = self.behavior.full_bars if params.get("outputsize") == "full" else COMPACT_BARS
+        series = generate_intraday_series(symbol, interval, bars)
+
+        return {
+            "Meta Data": {
+                "1. Information": f"Intraday ({interval}) open, high, low, close prices and volume",
+                "2. Symbol": symbol,
+                "3. Last Refreshed": next(iter(series)),
+                "4. Interval": interval,
+                "5. Output Size": "Full size" if bars != COMPACT_BARS else "Compact",
+                "6. Time Zone": "US/Eastern"
+            },
+            f"Time Series ({interval})": series
+        }
+
+    def _next_outcome(self) -> str:
+        """Decide how the next request fails (or not) and record it."""
+        behavior = self.behavior
+        with self._lock:
+            request_number = self.stats["requests"]
+            self.stats["requests"] += 1
+
+            if behavior.error_burst_every and request_number % behavior.error_burst_every < behavior.error_burst_length:
+                outcome, counter = "error", "errors"
+            elif self._rng.random() < behavior.information_rate:
+                outcome, counter = "information", "informations"
+            elif self._rng.random() < behavior.note_rate:
+                outcome, counter = "note", "notes"
+            elif self._rng.random() < behavior.truncate_rate:
+                outcome, counter = "truncate", "truncated"
+            else:
+                outcome, counter = "ok", "ok"
+
+            self.stats[counter] += 1
+            return outcome
+
+    def _sleep_latency(self):
+        """Apply the configured fixed and jittered latency."""
+        behavior = self.behavior
+        delay_ms = behavior.latency_ms
+        if behavior.latency_jitter_ms:
+            with self._lock:
+                delay_ms += self._rng.uniform(0, behavior.latency_jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+    def _write_throttled(self, wfile, body: bytes):
+        """Write the body in chunks, sleeping to respect the bandwidth limit."""
+        bandwidth = self.behavior.bandwidth_bytes_per_sec
+        try:
+            if not bandwidth:
+                wfile.write(body)
+            else:
+                for offset in range(0, len(body), WRITE_CHUNK_BYTES):
+                    chunk = body[offset:offset + WRITE_CHUNK_BYTES]
+                    wfile.write(chunk)
+                    time.sleep(len(chunk) / bandwidth)
+            wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("Stub client disconnected before the body was sent")
+            return
+
+        with self._lock:
+            self.stats["bytes_sent"] += len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local Alpha Vantage stand-in server")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8100, help="Port to bind")
+    parser.add_argument("--full-bars", type=int, default=DEFAULT_FULL_BARS, help="Bars returned for outputsize=full")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed response latency")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Random extra latency")
+    parser.add_argument("--bandwidth", type=int, default=0, help="Body bandwidth in bytes/sec (0 = unlimited)")
+    parser.add_argument("--note-rate", type=float, default=0.0, help="Probability of a frequency Note")
+    parser.add_argument("--information-rate", type=float, default=0.0, help="Probability of a daily-limit Information")
+    parser.add_argument("--error-burst-every", type=int, default=0, help="Error burst cycle length in requests")
+    parser.add_argument("--error-burst-length", type=int, default=0, help="Failing requests per burst cycle")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status for burst errors")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Probability of a truncated body")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for failure injection")
+
+    args = parser.parse_args()
+
+    behavior = StubBehavior(
+        full_bars=args.full_bars,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        bandwidth_bytes_per_sec=args.bandwidth,
+        note_rate=args.note_rate,
+        information_rate=args.information_rate,
+        error_burst_every=args.error_burst_every,
+        error_burst_length=args.error_burst_length,
+        error_status=args.error_status,
+        truncate_rate=args.truncate_rate,
+        seed=args.seed
+    )
+
+    stub = AlphaVantageStubServer(args.host, args.port, behavior).start()
+    print(f"Alpha Vantage stub serving on {stub.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+        print(f"Stub statistics: {stub.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# fang_service/core/availability.py
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SECONDS_PER_DAY = 86400
+SECONDS_PER_HOUR = 3600
+
+# Dates listed in a miss response, to avoid excessive response size
+MAX_HINT_DATES = 10
+
+# How a lookup picks a bar: the one at the requested moment, the latest at or
+# before it, the earliest at or after it, or whichever is closest
+LOOKUP_MODES = ("exact", "prev", "next", "nearest")
+
+class AvailabilityIndex:
+    """
+    Which dates and hours a symbol's series has bars for.
+
+    Built once per symbol version from the series timestamps: sorted distinct
+    dates, and a 24-bit hour bitmap per date. Answering "what is there
+    instead?" for a lookup that missed is then a couple of binary searches
+    rather than a pass over every timestamp. The sorted timestamps also
+    resolve as-of lookups (see resolve()).
+    """
+
+    __slots__ = ("timestamps", "dates", "hours", "_days", "_hour_masks")
+
+    def __init__(self, timestamps: np.ndarray):
+        """
+        Build the index.
+
+        Args:
+            timestamps: Sorted epoch seconds of the series' bars
+        """
+        self.timestamps = timestamps
+        days = timestamps // SECONDS_PER_DAY
+        hours = (timestamps % SECONDS_PER_DAY) // SECONDS_PER_HOUR
+        self._days = np.unique(days)
+        masks = np.zeros(len(self._days), dtype=np.int64)
+        np.bitwise_or.at(masks, np.searchsorted(self._days, days), np.left_shift(1, hours))
+        self._hour_masks: List[int] = masks.tolist()
+
+        self.dates: List[str] = [str(day) for day in self._days.astype("datetime64[D]")]
+        all_hours = int(np.bitwise_or.reduce(masks)) if len(masks) else 0
+        self.hours: List[int] = _mask_hours(all_hours)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def hours_on(self, when: int) -> List[int]:
+        """
+        Return the hours with bars on the day containing a moment.
+
+        Args:
+            when: Epoch seconds
+
+        Returns:
+            Sorted hours (0-23), empty if the day has no bars
+        """
+        day = when // SECONDS_PER_DAY
+        position = int(np.searchsorted(self._days, day))
+        if position < len(self._days) and self._days[position] == day:
+            return _mask_hours(self._hour_masks[position])
+        return []
+
+    def nearest(self, when: int) -> Optional[int]:
+        """
+        Return the bar timestamp closest to a moment (the earlier one on a tie).
+
+        Args:
+            when: Epoch seconds
+
+        Returns:
+            Epoch seconds of the nearest bar, or None if there are no bars
+        """
+        if len(self.timestamps) == 0:
+            return None
+        position = int(np.searchsorted(self.timestamps, when))
+        if position == 0:
+            return int(self.timestamps[0])
+        if position == len(self.timestamps):
+            return int(self.timestamps[-1])
+        before, after = int(self.timestamps[position - 1]), int(self.timestamps[position])
+        return before if when - before <= after - when else after
+
+    def resolve(self, when: int, mode: str = "exact") -> Optional[int]:
+        """
+        Find the bar a lookup refers to.
+
+        Args:
+            when: Epoch seconds requested
+            mode: One of LOOKUP_MODES
+
+        Returns:
+            Epoch seconds of the bar, or None if there is none in that direction
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in LOOKUP_MODES:
+            raise ValueError(f"Invalid mode: {mode}. Expected one of: {', '.join(LOOKUP_MODES)}")
+        if mode == "nearest":
+            return self.nearest(when)
+
+        timestamps = self.timestamps
+        if mode == "prev":
+            position = int(np.searchsorted(timestamps, when, side="right")) - 1
+            return int(timestamps[position]) if position >= 0 else None
+        position = int(np.searchsorted(timestamps, when, side="left"))
+        if position == len(timestamps):
+            return None
+        found = int(timestamps[position])
+        return found if mode == "next" or found == when else None
+
+    def describe_miss(self, when: int) -> Dict[str, Any]:
+        """
+        Describe what is available around a lookup that found no bar.
+
+        Args:
+            when: Epoch seconds that were requested
+
+        Returns:
+            Dictionary with "available_dates" (the first MAX_HINT_DATES),
+            "available_hours" (any date), "hours_on_date" (the requested date)
+            and "nearest_timestamp"
+        """
+        nearest = self.nearest(when)
+        return {
+            "available_dates": self.dates[:MAX_HINT_DATES],
+            "available_hours": self.hours,
+            "hours_on_date": self.hours_on(when),
+            "nearest_timestamp": format_timestamp(nearest) if nearest is not None else None
+        }
+
+
+def _mask_hours(mask: int) -> List[int]:
+    return [hour for hour in range(24) if mask >> hour & 1]
+
+
+def format_timestamp(when: int) -> str:
+    """Format epoch seconds as a "YYYY-MM-DD HH:MM:SS" bar label."""
+    return str(np.datetime64(when, "s")).replace("T", " ")
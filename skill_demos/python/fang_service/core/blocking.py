@@ -0,0 +1,132 @@
+# fang_service/core/blocking.py
+
+import time
+import asyncio
+import threading
+import concurrent.futures
+from typing import Dict, Any, Callable, Optional, TypeVar
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+class BlockingExecutor:
+    """
+    A sized thread pool for the blocking work of async request handlers.
+
+    Handlers run on the event loop and serve data that is already in memory
+    inline; database reads and other blocking calls are submitted here, so
+    they queue for a fixed number of workers instead of each taking a thread
+    from the server's shared pool. Queue depth and queueing delay are tracked
+    for monitoring.
+
+    The pool is created on first use. Thread-safe.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "Blocking"):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Worker threads (blocking calls running at once)
+            thread_name_prefix: Name prefix of the worker threads
+        """
+        self.max_workers = max(1, max_workers)
+        self.thread_name_prefix = thread_name_prefix
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.inline = 0
+        self.max_queued = 0
+        self._queued = 0
+        self._active = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.thread_name_prefix
+                )
+            return self._pool
+
+    async def run(self, func: Callable[[], T], inline: bool = False) -> T:
+        """
+        Run a blocking call without blocking the event loop.
+
+        Args:
+            func: Zero-argument callable
+            inline: Call it directly on the loop instead, for work the caller
+                knows is served from memory (counted, not queued)
+
+        Returns:
+            The call's result
+
+        Raises:
+            Whatever `func` raised
+        """
+        if inline:
+            with self._lock:
+                self.inline += 1
+            return func()
+
+        submitted_at = time.monotonic()
+        with self._lock:
+            self.submitted += 1
+            self._queued += 1
+            self.max_queued = max(self.max_queued, self._queued)
+
+        def call() -> T:
+            waited = time.monotonic() - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                return func()
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self.completed += 1
+
+        future = self._get_pool().submit(call)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # The client went away; drop the call if it hasn't started yet
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+                    self.cancelled += 1
+            raise
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers (queued calls still run when `wait` is set)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return pool size, queue depth and queueing delay for monitoring."""
+        with self._lock:
+            started = self.completed + self._active
+            return {
+                "workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "max_queued": self.max_queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "served_inline": self.inline,
+                "avg_queue_wait_ms": round(self._wait_total / started * 1000, 2) if started else 0.0,
+                "max_queue_wait_ms": round(self._wait_max * 1000, 2)
+            }
@@ -0,0 +1,242 @@
+# fang_service/core/broadcaster.py
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Iterable
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+class Subscription:
+    """
+    One streaming client's bounded, coalescing queue of bar deltas.
+
+    Deltas are queued per symbol. A new delta for a symbol that is already
+    queued is merged into it (newer bars win), so a slow consumer never holds
+    more than one pending entry per symbol. If more than `max_pending`
+    distinct symbols back up, the subscription is dropped instead of growing.
+
+    `offer` is called from the updater thread; `next_batch` is awaited on the
+    event loop that created the subscription.
+    """
+
+    def __init__(
+        self,
+        symbols: Optional[Iterable[str]] = None,
+        max_pending: int = 256,
+        max_bars: int = 100
+    ):
+        """
+        Initialize the subscription.
+
+        Must be created on the event loop that will consume it.
+
+        Args:
+            symbols: Symbols to receive (None for all)
+            max_pending: Maximum distinct symbols queued before the client is dropped
+            max_bars: Maximum bars kept per queued symbol (newest kept)
+        """
+        self.symbols = self._normalize(symbols)
+        self.max_pending = max_pending
+        self.max_bars = max_bars
+        self.dropped = False
+        self.closed = False
+        self.delivered = 0
+        self.coalesced = 0
+
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    @staticmethod
+    def _normalize(symbols: Optional[Iterable[str]]) -> Optional[set]:
+        if symbols is None:
+            return None
+        normalized = {s.strip().upper() for s in symbols if s and s.strip()}
+        return normalized or None
+
+    def set_symbols(self, symbols: Optional[Iterable[str]]):
+        """Replace the symbol filter (None for all symbols)."""
+        with self._lock:
+            self.symbols = self._normalize(symbols)
+
+    def wants(self, symbol: str) -> bool:
+        """Return True if this client is subscribed to the symbol."""
+        symbols = self.symbols
+        return symbols is None or symbol in symbols
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue a delta, coalescing with any pending delta for the same symbol.
+
+        Args:
+            event: Delta with "symbol", "version" and "bars" (newest first)
+
+        Returns:
+            False if the subscription is (now) dropped
+        """
+        symbol = event["symbol"]
+        with self._lock:
+            if self.dropped:
+                return False
+
+            pending = self._pending.get(symbol)
+            if pending is not None:
+                merged = dict(pending["bars"])
+                merged.update(event["bars"])
+                bars = dict(sorted(merged.items(), reverse=True)[:self.max_bars])
+                self._pending[symbol] = dict(event, bars=bars, coalesced=pending["coalesced"] + 1)
+                self.coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self.dropped = True
+                self._pending.clear()
+            else:
+                bars = event["bars"]
+                if len(bars) > self.max_bars:
+                    bars = dict(list(bars.items())[:self.max_bars])
+                self._pending[symbol] = dict(event, bars=bars, coalesced=0)
+
+        self._wake()
+        return not self.dropped
+
+    def close(self):
+        """Mark the subscription finished and wake its consumer."""
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass  # Loop already closed; the client is gone
+
+    async def next_batch(self, timeout: float) -> List[Dict[str, Any]]:
+        """
+        Wait for queued deltas and take all of them.
+
+        Args:
+            timeout: Seconds to wait before returning an empty batch (for heartbeats)
+
+        Returns:
+            Pending deltas in the order their symbols were first queued
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        with self._lock:
+            self._ready.clear()
+            batch = list(self._pending.values())
+            self._pending.clear()
+            self.delivered += len(batch)
+        return batch
+
+
+class UpdateBroadcaster:
+    """
+    Fans published bar deltas out to streaming subscribers.
+
+    Thread-safe: the updater publishes from its own thread while subscriptions
+    are added and removed on the event loop.
+    """
+
+    def __init__(self, max_pending: int = 256, max_bars: int = 100):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            max_pending: Per-subscription symbol backlog before dropping the client
+            max_bars: Per-symbol bar cap in a queued delta
+        """
+        self.max_pending = max_pending
+        self.max_bars = max_bars
+        self.dropped_total = 0
+        self.closing = False
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, symbols: Optional[Iterable[str]] = None) -> Subscription:
+        """
+        Register a new subscription (call from the event loop).
+
+        Once the broadcaster is closing, the subscription comes back already closed.
+        """
+        subscription = Subscription(symbols, max_pending=self.max_pending, max_bars=self.max_bars)
+        with self._lock:
+            if self.closing:
+                subscription.closed = True
+            else:
+                self._subscriptions.append(subscription)
+        return subscription
+
+    def close_all(self) -> int:
+        """
+        Close every subscription and refuse new ones, for shutdown.
+
+        Consumers wake up, see `closing` and end their streams, so open
+        streams don't hold the server's drain until its deadline.
+
+        Returns:
+            Number of subscriptions closed
+        """
+        with self._lock:
+            self.closing = True
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.close()
+        if subscriptions:
+            logger.info(f"Closed {len(subscriptions)} stream subscriptions for shutdown")
+        return len(subscriptions)
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription; safe to call more than once."""
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def has_subscribers(self, symbol: Optional[str] = None) -> bool:
+        """Return True if anyone is listening (to `symbol`, if given)."""
+        with self._lock:
+            return any(symbol is None or s.wants(symbol) for s in self._subscriptions)
+
+    def publish(self, symbol: str, version: int, bars: Dict[str, Dict[str, str]]) -> int:
+        """
+        Offer a delta to every subscriber of the symbol.
+
+        Subscribers that overflow are removed.
+
+        Args:
+            symbol: Stock symbol
+            version: Published data version the delta belongs to
+            bars: New bars, Alpha Vantage style, newest first
+
+        Returns:
+            Number of subscribers the delta was queued for
+        """
+        event = {"symbol": symbol, "version": version, "bars": bars}
+        with self._lock:
+            targets = [s for s in self._subscriptions if s.wants(symbol)]
+
+        delivered = 0
+        for subscription in targets:
+            if subscription.offer(event):
+                delivered += 1
+            else:
+                logger.warning(f"Dropping slow stream subscriber (backlog over {self.max_pending} symbols)")
+                with self._lock:
+                    if subscription in self._subscriptions:
+                        self._subscriptions.remove(subscription)
+                        self.dropped_total += 1
+        return delivered
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return subscriber counts for monitoring."""
+        with self._lock:
+            return {
+                "subscribers": len(self._subscriptions),
+                "dropped_total": self.dropped_total
+            }
@@ -0,0 +1,234 @@
+# fang_service/core/circuit_breaker.py
+
+import time
+import datetime
+import threading
+from typing import Dict, Any, Optional, Hashable
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency after consecutive failures.
+
+    Closed: calls go through. After `failure_threshold` consecutive failures the
+    circuit opens and calls are refused for the reset timeout. Then it is
+    half-open: one probe call goes through; success closes the circuit, failure
+    reopens it with the timeout doubled (up to `max_reset_timeout_seconds`).
+
+    All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout_seconds: float = 60.0,
+        max_reset_timeout_seconds: float = 900.0
+    ):
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Dependency name for logs
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout_seconds: How long the circuit stays open before a probe
+            max_reset_timeout_seconds: Cap on the timeout after repeated failed probes
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.max_reset_timeout_seconds = max(reset_timeout_seconds, max_reset_timeout_seconds)
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._timeout = reset_timeout_seconds
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Ask to make a call.
+
+        Returns:
+            True if the call may go ahead (in half-open state, only the probe)
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN and time.time() >= self._opened_at + self._timeout:
+                self.state = STATE_HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info(f"Circuit for {self.name} half-open; sending a probe")
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        """Record a successful call (closes the circuit)."""
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state != STATE_CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = STATE_CLOSED
+            self._timeout = self.reset_timeout_seconds
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call (may open or reopen the circuit)."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == STATE_HALF_OPEN:
+                self._timeout = min(self._timeout * 2, self.max_reset_timeout_seconds)
+                self._open()
+            elif self.state == STATE_CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def cancel(self):
+        """Record that an allowed call was abandoned before it had an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _open(self):
+        """Open the circuit (caller holds the lock)."""
+        self.state = STATE_OPEN
+        self._opened_at = time.time()
+        self._probe_in_flight = False
+        self.times_opened += 1
+        logger.warning(
+            f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive failures; "
+            f"probing again in {self._timeout:.0f}s"
+        )
+
+    def probe_limit(self) -> Optional[int]:
+        """
+        Return how many calls a caller batching work should start now.
+
+        Returns:
+            None when closed (no limit), 1 when a probe may be sent, 0 otherwise
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return None
+            if self.state == STATE_OPEN:
+                return 1 if time.time() >= self._opened_at + self._timeout else 0
+            return 0 if self._probe_in_flight else 1
+
+    def seconds_until_probe(self) -> float:
+        """Return how long until a probe may be sent (0 unless the circuit is open)."""
+        with self._lock:
+            if self.state != STATE_OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._timeout - time.time())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the breaker state for monitoring."""
+        probe_in = self.seconds_until_probe()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+                "probe_in_seconds": round(probe_in, 1) if self.state == STATE_OPEN else None
+            }
+
+
+class FailureBackoff:
+    """
+    Consecutive-failure tracking with exponential cool-down, per key.
+
+    The first failure costs nothing extra (the key is retried at its next
+    regular opportunity). From the second, the key cools down for
+    `base_seconds`, doubling with each further failure up to `max_seconds`;
+    the attempt after a cool-down acts as a probe, and one success clears it.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, base_seconds: float, max_seconds: float):
+        """
+        Initialize the tracker.
+
+        Args:
+            base_seconds: Cool-down after the second consecutive failure
+            max_seconds: Longest cool-down
+        """
+        self.base_seconds = base_seconds
+        self.max_seconds = max(base_seconds, max_seconds)
+        self._failures: Dict[Hashable, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _cooldown(self, failures: int) -> float:
+        if failures < 2:
+            return 0.0
+        return min(self.max_seconds, self.base_seconds * 2 ** (failures - 2))
+
+    def record_failure(self, key: Hashable, error: str, now: Optional[float] = None) -> int:
+        """
+        Record a failed attempt.
+
+        Args:
+            key: What failed (e.g. a symbol)
+            error: Short description for monitoring
+            now: Current epoch seconds (default: time.time())
+
+        Returns:
+            Consecutive failures so far
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._failures.setdefault(key, {"failures": 0})
+            entry["failures"] += 1
+            entry["last_error"] = error
+            entry["last_failure"] = now
+            return entry["failures"]
+
+    def record_success(self, key: Hashable):
+        """Clear a key's failures."""
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def retry_at(self, key: Hashable) -> Optional[float]:
+        """
+        Return when a key may next be tried.
+
+        Returns:
+            Epoch seconds, or None if it isn't cooling down
+        """
+        with self._lock:
+            entry = self._failures.get(key)
+            if entry is None or entry["failures"] < 2:
+                return None
+            return entry["last_failure"] + self._cooldown(entry["failures"])
+
+    def get_stats(self, now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Return every failing key's state for monitoring.
+
+        Returns:
+            Dictionary of key to failures, last error, last failure time and
+            seconds until the next attempt
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return {
+                key: {
+                    "failures": entry["failures"],
+                    "last_error": entry["last_error"],
+                    "last_failure": datetime.datetime.utcfromtimestamp(entry["last_failure"]).isoformat() + "Z",
+                    "retry_in_seconds": round(max(0.0, entry["last_failure"] + self._cooldown(entry["failures"]) - now), 1)
+                }
+                for key, entry in self._failures.items()
+            }
@@ -0,0 +1,255 @@
+# fang_service/core/compression.py
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Callable, Iterable, Any
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Levels chosen for throughput: large JSON compresses nearly as well as at max level
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+# Bodies at least this large are compressed on a worker thread, off the event loop
+THREADPOOL_THRESHOLD_BYTES = 64 * 1024
+
+# Already-compressed content types are sent as-is
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+def _zstd_compress(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+def available_encodings() -> Dict[str, Callable[[bytes], bytes]]:
+    """Return content-codings this installation supports, in server preference order."""
+    encodings: Dict[str, Callable[[bytes], bytes]] = {}
+    if BROTLI_AVAILABLE:
+        encodings["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    if ZSTD_AVAILABLE:
+        encodings["zstd"] = _zstd_compress
+    encodings["gzip"] = lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return encodings
+
+def choose_encoding(accept_encoding: Optional[str], supported: Iterable[str]) -> Optional[str]:
+    """
+    Pick a content-coding from an Accept-Encoding header.
+
+    The client's q-values decide; ties go to the server's preference order
+    (brotli, zstd, gzip). "identity" or no match means no compression.
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+        supported: Supported codings, most preferred first
+
+    Returns:
+        The chosen coding, or None to send the body uncompressed
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        fields = [f.strip() for f in part.split(";")]
+        coding = fields[0].lower()
+        quality = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    best: Optional[Tuple[float, int, str]] = None
+    for preference, coding in enumerate(supported):
+        quality = qualities.get(coding, qualities.get("*", 0.0))
+        if quality > 0 and (best is None or (-quality, preference) < best[:2]):
+            best = (-quality, preference, coding)
+    return best[2] if best else None
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by (coding, digest of the uncompressed body).
+
+    Version-cached payloads serialize to identical bytes until the data
+    changes, so repeat requests hash the body (far cheaper than compressing
+    it) and reuse the stored result. Bounded by total compressed bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(coding: str, body: bytes) -> Tuple[str, bytes]:
+        return coding, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return compressed
+
+    def put(self, key: Tuple[str, bytes], compressed: bytes):
+        if len(compressed) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = compressed
+            self._size += len(compressed)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+class CompressionMiddleware:
+    """
+    Compress complete responses with brotli, zstd or gzip.
+
+    Like Starlette's GZipMiddleware, but negotiates the best installed
+    coding, leaves small bodies, excluded paths and streaming responses
+    (e.g. Server-Sent Events) untouched, and reuses compressed bodies for
+    byte-identical payloads through a CompressedBodyCache.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        excluded_paths: Iterable[str] = (),
+        cache_max_bytes: int = 32 * 1024 * 1024
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            minimum_size: Bodies smaller than this are sent uncompressed
+            excluded_paths: Path prefixes never compressed (probes, streams)
+            cache_max_bytes: Budget for reusable compressed bodies (0 disables reuse)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_paths = tuple(excluded_paths)
+        self.encoders = available_encodings()
+        self.cache = CompressedBodyCache(cache_max_bytes) if cache_max_bytes > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        coding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.encoders)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, coding, send)
+        await self.app(scope, receive, responder.send)
+
+    async def compress(self, coding: str, body: bytes) -> bytes:
+        """Compress a body, reusing a cached result for identical bytes."""
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(coding, body)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        encoder = self.encoders[coding]
+        if len(body) >= THREADPOOL_THRESHOLD_BYTES:
+            compressed = await run_in_threadpool(encoder, body)
+        else:
+            compressed = encoder(body)
+
+        if key is not None:
+            self.cache.put(key, compressed)
+        return compressed
+
+
+class _CompressionResponder:
+    """Holds the response start until the first body chunk shows whether to compress."""
+
+    def __init__(self, middleware: CompressionMiddleware, coding: str, send: Send):
+        self.middleware = middleware
+        self.coding = coding
+        self._send = send
+        self.initial_message: Optional[Message] = None
+        self.passthrough = False
+
+    def _eligible(self, initial_message: Message, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=initial_message["headers"])
+        content_type = headers.get("content-type", "")
+        return (
+            not more_body
+            and len(body) >= self.middleware.minimum_size
+            and "content-encoding" not in headers
+            and not content_type.startswith(INCOMPRESSIBLE_PREFIXES)
+        )
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.initial_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough or self.initial_message is None:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        initial_message = self.initial_message
+        if not self._eligible(initial_message, body, more_body):
+            self.passthrough = True
+            await self._send(initial_message)
+            await self._send(message)
+            return
+
+        self.passthrough = True
+        compressed = await self.middleware.compress(self.coding, body)
+        headers = MutableHeaders(raw=initial_message["headers"])
+        headers["Content-Encoding"] = self.coding
+        headers["Content-Length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and etag.endswith('"'):
+            # A different representation needs a different validator
+            headers["ETag"] = f'{etag[:-1]}-{self.coding}"'
+
+        await self._send(initial_message)
+        await self._send({"type": "http.response.body", "body": compressed})
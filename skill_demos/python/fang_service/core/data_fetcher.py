@@ -4,26 +4,92 @@ import requests
 import datetime
 import time
 import json
+import threading
 from typing import Dict, Optional, Any, Tuple
 from requests.exceptions import RequestException, Timeout, HTTPError
 
-from fang_service.app_variables import ALPHAVANTAGE_API_KEY, ALPHAVANTAGE_BASE_URL
+from fang_service.app_variables import (
+    ALPHAVANTAGE_API_KEY, ALPHAVANTAGE_BASE_URL,
+    UPSTREAM_CONNECT_TIMEOUT_SECONDS, UPSTREAM_READ_TIMEOUT_SECONDS
+)
 from fang_service.core.logging_config import get_logger
-from fang_service.core.exceptions import RateLimitError, NetworkError, DataRetrievalError, AuthenticationError
+from fang_service.core.timezones import label_to_epoch
+from fang_service.core.exceptions import (
+    APIError, RateLimitError, NetworkError, DataRetrievalError, AuthenticationError,
+    DeadlineExceededError, FetchCancelledError
+)
 
 logger = get_logger(__name__)
 
 # Constants for the module
-DEFAULT_TIMEOUT = 30  # seconds
+DEFAULT_TIMEOUT = (UPSTREAM_CONNECT_TIMEOUT_SECONDS, UPSTREAM_READ_TIMEOUT_SECONDS)  # (connect, read) seconds
 MAX_RETRIES = 3
 RETRY_DELAY = 10  # seconds
 TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+def _request_timeout(symbol: str, deadline: Optional[float]) -> Tuple[float, float]:
+    """
+    Return the (connect, read) timeout for the next attempt, cut to fit the deadline.
+    
+    Raises:
+        DeadlineExceededError: If the deadline has already passed
+    """
+    if deadline is None:
+        return DEFAULT_TIMEOUT
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError(
+            message=f"Deadline exceeded before fetching {symbol}",
+            details={"symbol": symbol}
+        )
+    return min(DEFAULT_TIMEOUT[0], remaining), min(DEFAULT_TIMEOUT[1], remaining)
+
+def _check_cancelled(symbol: str, cancel: Optional[threading.Event]):
+    """
+    Stop before the next attempt if the fetch was cancelled.
+    
+    Raises:
+        FetchCancelledError: If the cancellation token is set
+    """
+    if cancel is not None and cancel.is_set():
+        raise FetchCancelledError(
+            message=f"Fetch of {symbol} cancelled",
+            details={"symbol": symbol}
+        )
+
+def _sleep_before_retry(
+    symbol: str, wait_time: float, deadline: Optional[float], cancel: Optional[threading.Event] = None
+):
+    """
+    Wait before a retry, unless the retry couldn't start before the deadline.
+    
+    The wait ends as soon as the cancellation token is set, so a long
+    rate-limit backoff doesn't hold up shutdown or keep a worker busy.
+    
+    Raises:
+        DeadlineExceededError: If the deadline would pass while waiting
+        FetchCancelledError: If cancelled before or during the wait
+    """
+    if deadline is not None and time.monotonic() + wait_time >= deadline:
+        raise DeadlineExceededError(
+            message=f"Deadline too close to retry {symbol} after {wait_time}s",
+            details={"symbol": symbol, "retry_after_seconds": wait_time}
+        )
+    if cancel is None:
+        time.sleep(wait_time)
+    elif cancel.wait(wait_time):
+        raise FetchCancelledError(
+            message=f"Fetch of {symbol} cancelled while waiting {wait_time}s to retry",
+            details={"symbol": symbol, "retry_after_seconds": wait_time}
+        )
+
 def fetch_intraday_data(
     symbol: str, 
     interval: str = "60min", 
     output_size: str = "full",
-    max_retries: int = MAX_RETRIES
+    max_retries: int = MAX_RETRIES,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None
 ) -> Dict[str, Dict[str, str]]:
     """
     Fetch intraday stock data for a given symbol using the Alpha Vantage API.
@@ -36,6 +102,11 @@ def fetch_intraday_data(
         interval: Time interval between data points (default: 60min)
         output_size: Amount of data to retrieve (default: full)
         max_retries: Maximum number of retry attempts for failed requests
+        deadline: time.monotonic() by which the call must finish; each attempt's
+            connect and read timeouts are cut to fit, and retries that can't
+            start in time aren't made (default: no deadline)
+        cancel: Cancellation token; once set, no further attempt is made and a
+            backoff in progress ends immediately (default: none)
         
     Returns:
         Dictionary of time series data keyed by timestamp
@@ -45,11 +116,14 @@ def fetch_intraday_data(
         NetworkError: If network issues occur
         DataRetrievalError: If data cannot be retrieved
         AuthenticationError: If API key is invalid
+        DeadlineExceededError: If the deadline passed first
+        FetchCancelledError: If cancelled first
     """
     time_series_key = f"Time Series ({interval})"
     retry_count = 0
     
     while retry_count < max_retries:
+        _check_cancelled(symbol, cancel)
         try:
             # Prepare request parameters
             params = {
@@ -65,11 +139,12 @@ def fetch_intraday_data(
             safe_params["apikey"] = "***"
             logger.info(f"Fetching data from Alpha Vantage: {safe_params}")
             
-            # Make the request with timeout
+            # Make the request with split connect/read timeouts
+            timeout = _request_timeout(symbol, deadline)
             response = requests.get(
                 ALPHAVANTAGE_BASE_URL, 
                 params=params, 
-                timeout=DEFAULT_TIMEOUT
+                timeout=timeout
             )
             response.raise_for_status()
             
@@ -128,9 +203,10 @@ def fetch_intraday_data(
                     "retry_after_seconds": wait_time
                 }
                 
-                logger.info(f"Rate limit detected, waiting {wait_time} seconds before retry")
-                time.sleep(wait_time)
                 retry_count += 1
+                if retry_count < max_retries:
+                    logger.info(f"Rate limit detected, waiting {wait_time} seconds before retry")
+                    _sleep_before_retry(symbol, wait_time, deadline, cancel)
                 continue
                 
             # Check for missing time series data
@@ -162,6 +238,11 @@ def fetch_intraday_data(
             
         except Timeout:
             logger.warning(f"Timeout fetching data for {symbol}. Attempt {retry_count + 1}/{max_retries}")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DeadlineExceededError(
+                    message=f"Deadline exceeded fetching {symbol}",
+                    details={"symbol": symbol, "attempts": retry_count + 1}
+                )
             
         except HTTPError as e:
             status_code = getattr(e.response, 'status_code', 0)
@@ -195,6 +276,10 @@ def fetch_intraday_data(
                     details={"symbol": symbol, "error": str(e)}
                 )
             
+        except APIError:
+            # Already classified (rate limit, auth, bad data) - don't re-wrap
+            raise
+            
         except (KeyError, ValueError, TypeError) as e:
             logger.error(f"Data parsing error for {symbol}: {str(e)}")
             raise DataRetrievalError(
@@ -209,11 +294,12 @@ def fetch_intraday_data(
                 details={"symbol": symbol, "error": str(e)}
             )
             
-        # Exponential backoff for retries
+        # Exponential backoff for retries (no wait once the last attempt has failed)
         wait_time = RETRY_DELAY * (2 ** retry_count)
-        logger.info(f"Retrying in {wait_time} seconds... (Attempt {retry_count + 1}/{max_retries})")
-        time.sleep(wait_time)
         retry_count += 1
+        if retry_count < max_retries:
+            logger.info(f"Retrying in {wait_time} seconds... (Attempt {retry_count}/{max_retries})")
+            _sleep_before_retry(symbol, wait_time, deadline, cancel)
         
     # If we've exhausted retries without raising an exception, raise one now
     logger.error(f"Failed to fetch data for {symbol} after {max_retries} attempts")
@@ -222,15 +308,17 @@ def fetch_intraday_data(
         details={"symbol": symbol, "attempts": max_retries}
     )
 
-def filter_data_past_72_hours(intraday_data: Dict[str, Any]) -> Dict[str, Any]:
+def filter_data_past_72_hours(intraday_data: Dict[str, Any], timezone: Optional[str] = None) -> Dict[str, Any]:
     """
     Returns only the data from the past 72 hours from the provided intraday data.
     
     This function filters a dictionary of time-series data to only include entries
-    from the past 72 hours, based on the current UTC time.
+    from the past 72 hours. Labels are exchange wall-clock times, so they are
+    converted to epoch seconds in the exchange timezone before comparing.
     
     Args:
         intraday_data: Dictionary of time series data keyed by timestamp strings
+        timezone: IANA timezone of the labels (default: MARKET_TIMEZONE)
         
     Returns:
         Filtered dictionary containing only data from the past 72 hours
@@ -242,17 +330,15 @@ def filter_data_past_72_hours(intraday_data: Dict[str, Any]) -> Dict[str, Any]:
         logger.debug("No intraday data to filter")
         return {}
 
-    # Calculate the cutoff timestamp (72 hours ago)
-    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=72)
+    # Calculate the cutoff (72 hours ago, epoch seconds)
+    cutoff = time.time() - 72 * 3600
     filtered = {}
     discarded_count = 0
 
     try:
         for timestamp_str, values in intraday_data.items():
-            # Convert string time to datetime object for comparison
-            dt = datetime.datetime.strptime(timestamp_str, TIMESTAMP_FORMAT)
             # Include data points newer than the cutoff
-            if dt >= cutoff:
+            if label_to_epoch(timestamp_str, timezone) >= cutoff:
                 filtered[timestamp_str] = values
             else:
                 discarded_count += 1
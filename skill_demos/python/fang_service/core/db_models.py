@@ -1,7 +1,9 @@
 # fang_service/core/db_models.py
 
 import os
+import time
 import sqlite3
+import threading
 from typing import Dict, Any, List, Optional, Tuple
 import datetime
 from contextlib import contextmanager
@@ -9,6 +11,7 @@ from pathlib import Path
 
 from fang_service.core.logging_config import get_logger
 from fang_service.app_variables import FANG_SYMBOLS, MAX_CACHE_AGE_HOURS
+from fang_service.core.timezones import exchange_timezone, label_to_epoch
 
 logger = get_logger(__name__)
 
@@ -16,6 +19,13 @@ logger = get_logger(__name__)
 DB_DIR = os.environ.get('DB_DIR', 'data')
 DB_NAME = os.environ.get('DB_NAME', 'fang_stocks.db')
 DB_PATH = os.path.join(DB_DIR, DB_NAME)
+SNAPSHOT_PATH = os.path.join(DB_DIR, os.environ.get('SNAPSHOT_NAME', 'fang_stocks.snapshot'))
+UPDATER_LOCK_PATH = os.path.join(DB_DIR, 'updater.lock')
+DB_BUSY_TIMEOUT_SECONDS = 30
+
+# SQLite allows one writer at a time. Serializing writers in-process is much
+# cheaper than letting them collide and back off in SQLite's busy handler.
+_write_lock = threading.Lock()
 
 # Ensure database directory exists
 os.makedirs(DB_DIR, exist_ok=True)
@@ -24,20 +34,52 @@ def get_db_path() -> str:
     """Return the path to the SQLite database file."""
     return DB_PATH
 
+def get_snapshot_path() -> str:
+    """Return the path to the columnar snapshot file (see core.snapshot)."""
+    return SNAPSHOT_PATH
+
+def get_updater_lock_path() -> str:
+    """Return the path to the lock file held by the worker running the updater."""
+    return UPDATER_LOCK_PATH
+
+# One connection per thread, reused across calls. Opening and closing a
+# connection per query costs more than most of our queries, and in WAL mode
+# closing the last connection forces a checkpoint every time.
+_local = threading.local()
+
+def _get_thread_connection() -> sqlite3.Connection:
+    """Return this thread's connection, opening it on first use."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        # Generous busy timeout: updater workers write concurrently with readers
+        conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT_SECONDS)
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        # With WAL, NORMAL only fsyncs at checkpoints; commits stay durable across app crashes
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+    return conn
+
 @contextmanager
 def get_db_connection():
     """Context manager for database connections."""
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        conn = _get_thread_connection()
         yield conn
     except sqlite3.Error as e:
         logger.error(f"Database connection error: {e}")
         raise
     finally:
-        if conn:
-            conn.close()
+        # Never leave a half-finished transaction on a reused connection
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
+
+def close_thread_connection():
+    """Close the calling thread's database connection, if it has one."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
 
 def init_db() -> bool:
     """Initialize the database schema."""
@@ -49,22 +91,44 @@ def init_db() -> bool:
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         symbol TEXT NOT NULL,
         timestamp TEXT NOT NULL,
+        ts_epoch INTEGER,
         open REAL NOT NULL,
         high REAL NOT NULL,
         low REAL NOT NULL,
         close REAL NOT NULL,
         volume INTEGER NOT NULL,
         created_at TEXT NOT NULL,
+        revision INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT,
         UNIQUE(symbol, timestamp)
     );
     
     CREATE INDEX IF NOT EXISTS idx_stock_data_symbol ON stock_data(symbol);
-    CREATE INDEX IF NOT EXISTS idx_stock_data_timestamp ON stock_data(timestamp);
+    
+    CREATE TABLE IF NOT EXISTS symbol_timezones (
+        symbol TEXT PRIMARY KEY,
+        timezone TEXT NOT NULL
+    );
+    
+    CREATE TABLE IF NOT EXISTS refresh_schedule (
+        symbol TEXT PRIMARY KEY,
+        next_due REAL NOT NULL,
+        last_success TEXT
+    );
     """
     
     try:
         with get_db_connection() as conn:
+            # WAL lets readers proceed while updater workers are writing
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.executescript(create_tables_sql)
+            _add_missing_columns(conn)
+            # Range filters and purges compare integers on these, not TEXT labels
+            conn.executescript("""
+            DROP INDEX IF EXISTS idx_stock_data_timestamp;
+            CREATE INDEX IF NOT EXISTS idx_stock_data_symbol_epoch ON stock_data(symbol, ts_epoch);
+            CREATE INDEX IF NOT EXISTS idx_stock_data_epoch ON stock_data(ts_epoch);
+            """)
             conn.commit()
         logger.info("Database initialized successfully")
         return True
@@ -72,14 +136,70 @@ def init_db() -> bool:
         logger.error(f"Database initialization error: {e}")
         return False
 
-def insert_stock_data(symbol: str, timestamp: str, data: Dict[str, str]) -> bool:
+def _add_missing_columns(conn: sqlite3.Connection):
+    """Bring a stock_data table created by an older version up to the current schema."""
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(stock_data)")}
+    if "revision" not in columns:
+        logger.info("Adding revision tracking columns to stock_data")
+        conn.execute("ALTER TABLE stock_data ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        conn.execute("ALTER TABLE stock_data ADD COLUMN updated_at TEXT")
+    if "ts_epoch" not in columns:
+        conn.execute("ALTER TABLE stock_data ADD COLUMN ts_epoch INTEGER")
+    
+    # Labels stored before epochs were: convert them in their symbol's exchange timezone
+    rows = conn.execute("SELECT id, symbol, timestamp FROM stock_data WHERE ts_epoch IS NULL").fetchall()
+    if rows:
+        logger.info(f"Converting {len(rows)} stored timestamps to UTC epoch seconds")
+        conn.executemany(
+            "UPDATE stock_data SET ts_epoch = ? WHERE id = ?",
+            [(label_to_epoch(row["timestamp"], exchange_timezone(row["symbol"])), row["id"]) for row in rows]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO symbol_timezones (symbol, timezone) VALUES (?, ?)",
+            [(symbol, exchange_timezone(symbol)) for symbol in {row["symbol"] for row in rows}]
+        )
+
+def _record_timezone(conn: sqlite3.Connection, symbol: str, timezone: str):
+    """Record the exchange timezone a symbol's labels are in (caller commits)."""
+    conn.execute(
+        """
+        INSERT INTO symbol_timezones (symbol, timezone) VALUES (?, ?)
+        ON CONFLICT(symbol) DO UPDATE SET timezone = excluded.timezone
+        WHERE timezone IS NOT excluded.timezone
+        """,
+        (symbol, timezone)
+    )
+
+# Insert new bars; a bar that already exists is only rewritten when its values
+# differ, and then counts as a revision. Unchanged bars cost no write and no WAL.
+UPSERT_SQL = """
+INSERT INTO stock_data
+(symbol, timestamp, open, high, low, close, volume, created_at, ts_epoch)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(symbol, timestamp) DO UPDATE SET
+    open = excluded.open,
+    high = excluded.high,
+    low = excluded.low,
+    close = excluded.close,
+    volume = excluded.volume,
+    revision = revision + 1,
+    updated_at = excluded.created_at
+WHERE open IS NOT excluded.open
+    OR high IS NOT excluded.high
+    OR low IS NOT excluded.low
+    OR close IS NOT excluded.close
+    OR volume IS NOT excluded.volume
+"""
+
+def insert_stock_data(symbol: str, timestamp: str, data: Dict[str, str], timezone: Optional[str] = None) -> bool:
     """
     Insert stock data into the database.
     
     Args:
         symbol: Stock symbol (e.g., FB, AMZN, NFLX, GOOG)
-        timestamp: Timestamp string in format "YYYY-MM-DD HH:MM:SS"
+        timestamp: Timestamp string in format "YYYY-MM-DD HH:MM:SS", exchange time
         data: Dictionary with keys "1. open", "2. high", etc.
+        timezone: IANA timezone of the timestamp (default: the symbol's exchange timezone)
     
     Returns:
         True if successful, False otherwise
@@ -92,24 +212,100 @@ def insert_stock_data(symbol: str, timestamp: str, data: Dict[str, str]) -> bool
         close_price = float(data.get("4. close", 0))
         volume = int(data.get("5. volume", 0))
         created_at = datetime.datetime.utcnow().isoformat() + "Z"
+        timezone = timezone or exchange_timezone(symbol)
+        ts_epoch = label_to_epoch(timestamp, timezone)
         
-        insert_sql = """
-        INSERT OR REPLACE INTO stock_data 
-        (symbol, timestamp, open, high, low, close, volume, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
-        with get_db_connection() as conn:
+        with _write_lock, get_db_connection() as conn:
             conn.execute(
-                insert_sql, 
-                (symbol, timestamp, open_price, high_price, low_price, close_price, volume, created_at)
+                UPSERT_SQL, 
+                (symbol, timestamp, open_price, high_price, low_price, close_price, volume, created_at, ts_epoch)
             )
+            _record_timezone(conn, symbol, timezone)
             conn.commit()
         return True
     except (sqlite3.Error, ValueError) as e:
         logger.error(f"Error inserting stock data for {symbol} at {timestamp}: {e}")
         return False
 
+def upsert_stock_data_batch(
+    symbol: str, data: Dict[str, Dict[str, str]], timezone: Optional[str] = None
+) -> Optional[Dict[str, int]]:
+    """
+    Store a fetch of bars for a symbol, writing only what changed, in a single transaction.
+    
+    Each fetch mostly repeats bars already stored. The incoming bars are
+    diffed against the stored ones first, and only new or corrected bars are
+    written; a corrected bar has its revision count bumped. Labels are
+    converted to UTC epoch seconds here, once, and the symbol's exchange
+    timezone is recorded alongside. The symbol's
+    changes become visible to readers atomically at commit, which is what
+    lets the updater publish symbols one at a time.
+    
+    Args:
+        symbol: Stock symbol (e.g., FB, AMZN, NFLX, GOOG)
+        data: Dictionary of bars keyed by timestamp, in Alpha Vantage format
+        timezone: IANA timezone of the labels (default: the symbol's exchange timezone)
+    
+    Returns:
+        Dictionary with the number of bars "inserted", "revised" and
+        "unchanged", or None if the write failed
+    """
+    created_at = datetime.datetime.utcnow().isoformat() + "Z"
+    timezone = timezone or exchange_timezone(symbol)
+    rows = []
+    for timestamp, values in data.items():
+        try:
+            rows.append((
+                symbol, timestamp,
+                float(values.get("1. open", 0)),
+                float(values.get("2. high", 0)),
+                float(values.get("3. low", 0)),
+                float(values.get("4. close", 0)),
+                int(values.get("5. volume", 0)),
+                created_at,
+                label_to_epoch(timestamp, timezone)
+            ))
+        except (ValueError, TypeError) as e:
+            logger.error(f"Skipping malformed bar for {symbol} at {timestamp}: {e}")
+    
+    counts = {"inserted": 0, "revised": 0, "unchanged": 0}
+    if not rows:
+        return counts
+    
+    try:
+        with _write_lock, get_db_connection() as conn:
+            stored = {
+                row["ts_epoch"]: (row["open"], row["high"], row["low"], row["close"], row["volume"])
+                for row in conn.execute(
+                    """
+                    SELECT ts_epoch, open, high, low, close, volume FROM stock_data
+                    WHERE symbol = ? AND ts_epoch BETWEEN ? AND ?
+                    """,
+                    (symbol, min(row[8] for row in rows), max(row[8] for row in rows))
+                )
+            }
+            
+            changed = []
+            for row in rows:
+                previous = stored.get(row[8])
+                if previous is None:
+                    counts["inserted"] += 1
+                elif previous != row[2:7]:
+                    counts["revised"] += 1
+                else:
+                    counts["unchanged"] += 1
+                    continue
+                changed.append(row)
+            
+            if changed:
+                conn.executemany(UPSERT_SQL, changed)
+                _record_timezone(conn, symbol, timezone)
+                conn.commit()
+        return counts
+    except sqlite3.Error as e:
+        logger.error(f"Error inserting stock data batch for {symbol}: {e}")
+        return None
+
 def get_stock_data(symbol: str) -> Dict[str, Dict[str, str]]:
     """
     Get all stock data for a specific symbol.
@@ -123,19 +319,18 @@ def get_stock_data(symbol: str) -> Dict[str, Dict[str, str]]:
     result = {}
     
     try:
-        # Get recent data (within MAX_CACHE_AGE_HOURS)
-        cutoff_time = (datetime.datetime.utcnow() - datetime.timedelta(hours=MAX_CACHE_AGE_HOURS))
-        cutoff_str = cutoff_time.strftime("%Y-%m-%d %H:%M:%S")
+        # Get recent data (within MAX_CACHE_AGE_HOURS), an integer range on (symbol, ts_epoch)
+        cutoff = int(time.time()) - MAX_CACHE_AGE_HOURS * 3600
         
         select_sql = """
         SELECT timestamp, open, high, low, close, volume
         FROM stock_data
-        WHERE symbol = ? AND timestamp >= ?
-        ORDER BY timestamp DESC
+        WHERE symbol = ? AND ts_epoch >= ?
+        ORDER BY ts_epoch DESC
         """
         
         with get_db_connection() as conn:
-            rows = conn.execute(select_sql, (symbol.upper(), cutoff_str)).fetchall()
+            rows = conn.execute(select_sql, (symbol.upper(), cutoff)).fetchall()
             
             for row in rows:
                 # Convert back to the Alpha Vantage format expected by the existing code
@@ -184,9 +379,9 @@ def get_available_timestamps(symbol: str = None) -> List[str]:
     try:
         if symbol:
             select_sql = """
-            SELECT DISTINCT timestamp FROM stock_data
+            SELECT timestamp FROM stock_data
             WHERE symbol = ?
-            ORDER BY timestamp
+            ORDER BY ts_epoch
             """
             params = (symbol.upper(),)
         else:
@@ -211,16 +406,15 @@ def purge_old_data() -> int:
         Number of rows deleted
     """
     try:
-        cutoff_time = (datetime.datetime.utcnow() - datetime.timedelta(hours=MAX_CACHE_AGE_HOURS))
-        cutoff_str = cutoff_time.strftime("%Y-%m-%d %H:%M:%S")
+        cutoff = int(time.time()) - MAX_CACHE_AGE_HOURS * 3600
         
         delete_sql = """
         DELETE FROM stock_data
-        WHERE timestamp < ?
+        WHERE ts_epoch < ?
         """
         
-        with get_db_connection() as conn:
-            cursor = conn.execute(delete_sql, (cutoff_str,))
+        with _write_lock, get_db_connection() as conn:
+            cursor = conn.execute(delete_sql, (cutoff,))
             deleted_count = cursor.rowcount
             conn.commit()
             
@@ -230,6 +424,91 @@ def purge_old_data() -> int:
         logger.error(f"Error purging old data: {e}")
         return 0
 
+def checkpoint_wal() -> bool:
+    """
+    Copy the write-ahead log into the database file and truncate it.
+
+    Called at shutdown, once writers have stopped, so the database file is
+    complete on its own and the next start doesn't replay a large WAL. Closes
+    the calling thread's connection afterwards.
+
+    Returns:
+        True if every WAL frame was checkpointed
+    """
+    try:
+        with _write_lock, get_db_connection() as conn:
+            busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            logger.warning(f"WAL checkpoint incomplete: {checkpointed}/{log_frames} frames (readers still open)")
+            return False
+        logger.info("WAL checkpointed and truncated")
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Error checkpointing WAL: {e}")
+        return False
+    finally:
+        close_thread_connection()
+
+def load_refresh_schedule() -> Dict[str, float]:
+    """
+    Load the persisted per-symbol "next due" times.
+    
+    Returns:
+        Dictionary mapping symbol to next due time (epoch seconds)
+    """
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute("SELECT symbol, next_due FROM refresh_schedule").fetchall()
+            return {row['symbol']: row['next_due'] for row in rows}
+    except sqlite3.Error as e:
+        logger.error(f"Error loading refresh schedule: {e}")
+        return {}
+
+def load_last_refresh_success() -> Dict[str, str]:
+    """
+    Load when each symbol was last refreshed successfully.
+
+    Returns:
+        Dictionary mapping symbol to ISO timestamp (symbols never refreshed are omitted)
+    """
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute(
+                "SELECT symbol, last_success FROM refresh_schedule WHERE last_success IS NOT NULL"
+            ).fetchall()
+            return {row['symbol']: row['last_success'] for row in rows}
+    except sqlite3.Error as e:
+        logger.error(f"Error loading last refresh times: {e}")
+        return {}
+
+def save_refresh_due(symbol: str, next_due: float, last_success: Optional[str] = None) -> bool:
+    """
+    Persist the next due time for a symbol.
+    
+    Args:
+        symbol: Stock symbol
+        next_due: Next due time (epoch seconds)
+        last_success: ISO timestamp of the last successful refresh, if this was one
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    upsert_sql = """
+    INSERT INTO refresh_schedule (symbol, next_due, last_success)
+    VALUES (?, ?, ?)
+    ON CONFLICT(symbol) DO UPDATE SET
+        next_due = excluded.next_due,
+        last_success = COALESCE(excluded.last_success, refresh_schedule.last_success)
+    """
+    try:
+        with _write_lock, get_db_connection() as conn:
+            conn.execute(upsert_sql, (symbol, next_due, last_success))
+            conn.commit()
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"Error saving refresh schedule for {symbol}: {e}")
+        return False
+
 def get_db_stats() -> Dict[str, Any]:
     """
     Get statistics about the database.
@@ -243,6 +522,7 @@ def get_db_stats() -> Dict[str, Any]:
         "oldest_record": None,
         "newest_record": None,
         "symbols_with_data": [],
+        "revised_records": 0,
         "db_path": DB_PATH,
         "db_size_bytes": 0
     }
@@ -262,6 +542,10 @@ def get_db_stats() -> Dict[str, Any]:
             for row in cursor.fetchall():
                 stats["records_by_symbol"][row['symbol']] = row['count']
             
+            # Bars corrected by the provider after they were first stored
+            cursor = conn.execute("SELECT COUNT(*) as count FROM stock_data WHERE revision > 0")
+            stats["revised_records"] = cursor.fetchone()['count']
+            
             # Symbols with data
             stats["symbols_with_data"] = list(stats["records_by_symbol"].keys())
             
@@ -5,18 +5,67 @@ import threading
 import datetime
 from typing import Dict, Any, Optional, List
 import concurrent.futures
+import numpy as np
+from collections import OrderedDict
 
-from fang_service.core.data_fetcher import fetch_intraday_data
+from fang_service.core.providers.orchestrator import FetchOrchestrator
+from fang_service.core.providers.base import is_provider_failure
 from fang_service.core.logging_config import get_logger
-from fang_service.app_variables import FANG_SYMBOLS, FETCH_INTERVAL_HOURS
+from fang_service.core.scheduler import RefreshScheduler
+from fang_service.core.market_calendar import MarketCalendar, load_holidays
+from fang_service.core.series import (
+    SymbolSeries, rollup, interval_minutes, validate_rollup_interval, parse_timestamp
+)
+from fang_service.core.indicators import compute_indicator, indicator_params
+from fang_service.core.availability import AvailabilityIndex
+from fang_service.core.broadcaster import UpdateBroadcaster
+from fang_service.core.encoders import encode_json
+from fang_service.core.snapshot import (
+    Snapshot, SnapshotError, write_snapshot, load_snapshot, snapshot_signature
+)
+from fang_service.core.updater_lock import UpdaterLock
+from fang_service.core.singleflight import SingleFlight
+from fang_service.core.on_demand import OnDemandTracker, valid_symbol
+from fang_service.core.circuit_breaker import CircuitBreaker, FailureBackoff
+from fang_service.core.blocking import BlockingExecutor
+from fang_service.core.refresh_cycle import CycleTracker, FETCHING, UPDATED, FAILED, DEFERRED
+from fang_service.app_variables import (
+    FANG_SYMBOLS, FETCH_INTERVAL_HOURS, UPDATER_MAX_WORKERS, UPDATER_SHARD_COUNT,
+    INGEST_INTERVAL, SERIES_CACHE_MAX_ENTRIES, INDICATOR_CACHE_MAX_ENTRIES,
+    STREAM_MAX_PENDING_SYMBOLS, STREAM_MAX_DELTA_BARS, SNAPSHOT_INTERVAL_SECONDS,
+    SEGMENT_POLL_SECONDS, NEGATIVE_CACHE_TTL_SECONDS, NEGATIVE_CACHE_MAX_ENTRIES,
+    ON_DEMAND_ENABLED, ON_DEMAND_MAX_SYMBOLS, ON_DEMAND_IDLE_TTL_HOURS,
+    ON_DEMAND_FAILURE_TTL_SECONDS, ON_DEMAND_MAX_WORKERS,
+    MARKET_HOURS_ENABLED, MARKET_TIMEZONE, MARKET_EXTENDED_HOURS, MARKET_HOLIDAYS_FILE,
+    MARKET_REFRESH_MINUTES, BAR_CLOSE_DELAY_SECONDS,
+    PROVIDER_FAILURE_THRESHOLD, PROVIDER_RESET_SECONDS, PROVIDER_MAX_RESET_SECONDS,
+    SYMBOL_BACKOFF_BASE_SECONDS, SYMBOL_BACKOFF_MAX_SECONDS, UPDATER_CYCLE_BUDGET_SECONDS,
+    DB_EXECUTOR_WORKERS, UPDATER_STOP_TIMEOUT_SECONDS
+)
 from fang_service.core.db_models import (
-    get_stock_data, insert_stock_data, get_symbols_with_data,
-    purge_old_data, get_db_stats
+    get_stock_data, upsert_stock_data_batch, get_symbols_with_data,
+    purge_old_data, get_db_stats, get_snapshot_path, get_updater_lock_path,
+    load_last_refresh_success, checkpoint_wal
+)
+from fang_service.core.exceptions import (
+    RateLimitError, NetworkError, DataRetrievalError, AuthenticationError, CircuitOpenError,
+    DeadlineExceededError
 )
-from fang_service.core.exceptions import RateLimitError, NetworkError, DataRetrievalError
 
 logger = get_logger(__name__)
 
+# Open-ended batch ranges are clamped to these epoch-second bounds
+BATCH_MIN_TIMESTAMP = np.iinfo(np.int64).min
+BATCH_MAX_TIMESTAMP = np.iinfo(np.int64).max
+
+# Shortest pause between updater passes, so overdue shards can't spin the loop
+MIN_UPDATER_SLEEP_SECONDS = 1.0
+
+# A symbol's last successful refresh is recorded just after it is published;
+# one later than its snapshot publish time by more than this means the
+# database holds newer data than the snapshot
+SNAPSHOT_PUBLISH_SLACK_SECONDS = 5.0
+
 class StockDataService:
     """
     Service for managing stock data in SQLite database with automatic background updates.
@@ -24,16 +73,122 @@ class StockDataService:
     This service manages stock data with a SQLite database backend, replacing the 
     in-memory cache with persistent storage. It maintains the same interface as
     the original StocksCache class for compatibility with the existing code.
+    
+    Refreshes are driven by a RefreshScheduler: symbols are fetched on a bounded
+    worker pool as they come due, and each symbol is published (committed and
+    versioned) as soon as it lands rather than at the end of a full cycle.
     """
     
     def __init__(self):
         """Initialize the data service with thread synchronization."""
         self.last_update: Optional[datetime.datetime] = None
+        self.symbols: List[str] = list(FANG_SYMBOLS)
         
         # Thread synchronization
-        self._lock = threading.RLock()  # Reentrant lock allows nested locking from same thread
+        self._lock = threading.RLock()  # Protects statistics and published state
+        self._update_lock = threading.Lock()  # Serializes refresh passes; readers never take it
         self._updater_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
+        # Set once the process is shutting down; fetches not yet started are skipped
+        self._shutdown_event = threading.Event()
+        # Wakes the updater early (resume, interval change, stop)
+        self._wakeup = threading.Event()
+        self._paused = False
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._pools_closed = False  # Set by shutdown(); no pool is created after it
+        
+        # Per-symbol refresh schedule (persisted across restarts)
+        self.scheduler = self._create_scheduler()
+        
+        # Market data providers (failover and hedging across them)
+        # Shutdown cuts provider backoffs short instead of waiting them out
+        self.fetcher = FetchOrchestrator.from_config(cancel=self._shutdown_event)
+        
+        # Provider-wide circuit breaker, plus per-symbol cool-down so a symbol that
+        # keeps failing (e.g. delisted) stops costing quota every cycle
+        self.breaker = CircuitBreaker(
+            "market data providers",
+            failure_threshold=PROVIDER_FAILURE_THRESHOLD,
+            reset_timeout_seconds=PROVIDER_RESET_SECONDS,
+            max_reset_timeout_seconds=PROVIDER_MAX_RESET_SECONDS
+        )
+        self.symbol_backoff = FailureBackoff(SYMBOL_BACKOFF_BASE_SECONDS, SYMBOL_BACKOFF_MAX_SECONDS)
+        
+        # Published state: bumped every time a symbol's new data is committed
+        self.data_version = 0
+        self.symbol_versions: Dict[str, int] = {}
+        self.symbol_updated_at: Dict[str, datetime.datetime] = {}
+        
+        # Bars stored by fetches since startup, by outcome (see upsert_stock_data_batch)
+        self.ingest_counts = {"inserted": 0, "revised": 0, "unchanged": 0}
+        
+        # Streaming clients are pushed the bars each publish adds; the latest
+        # published bar per symbol (epoch seconds) marks where the next delta starts
+        self.broadcaster = UpdateBroadcaster(
+            max_pending=STREAM_MAX_PENDING_SYMBOLS,
+            max_bars=STREAM_MAX_DELTA_BARS
+        )
+        self._latest_published_bar: Dict[str, int] = {}
+        
+        # Columnar series per (symbol, interval), tagged with the symbol version
+        # they were built from: { (symbol, interval): (version, series, bars) }
+        self._series_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
+        # Pre-encoded JSON of get_data() per (symbol, interval): { key: (version, bytes) }
+        self._json_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
+        # Indicator results keyed by (symbol, interval, indicator, params, version);
+        # a new version simply misses, and old keys age out of the LRU
+        self._indicator_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
+        # Date/hour availability per (symbol, interval), for lookups that miss:
+        # { (symbol, interval): (version, AvailabilityIndex) }
+        self._availability_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
+        # Concurrent identical loads share one execution, and symbols with no
+        # data are remembered briefly: { symbol: expiry (epoch seconds) }
+        self._flights = SingleFlight()
+        self._missing_symbols: "OrderedDict[str, float]" = OrderedDict()
+        self.negative_hits = 0
+        # Symbols with data, keyed by (data_version, update_count) so publishes and purges refresh it
+        self._symbols_with_data: Optional[tuple] = None
+        
+        # Untracked symbols clients asked for (ON_DEMAND_ENABLED), fetched on
+        # their own small pool so they don't queue behind a refresh pass
+        self.on_demand = OnDemandTracker(
+            ON_DEMAND_MAX_SYMBOLS,
+            idle_ttl_seconds=ON_DEMAND_IDLE_TTL_HOURS * 3600,
+            failure_ttl_seconds=ON_DEMAND_FAILURE_TTL_SECONDS
+        )
+        self._on_demand_pending: set = set()
+        self._on_demand_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        
+        # Async request handlers serve reads that are in memory on the event loop
+        # and submit the rest (database reads, stats queries) to this pool
+        self.db_executor = BlockingExecutor(DB_EXECUTOR_WORKERS, thread_name_prefix="DBRead")
+        
+        # Memory-mapped snapshot restored at startup; serves each symbol's base
+        # series until that symbol is republished
+        self._snapshot: Optional[Snapshot] = None
+        self._snapshot_version = 0
+        self._snapshot_written_at = 0.0
+        self._snapshot_bytes = 0
+        self._segment_signature: Optional[tuple] = None
+        
+        # Only the worker holding this lock runs the updater; the others follow
+        # the snapshot segments it writes ("updater", "follower", or None until started)
+        self._updater_lock = UpdaterLock(get_updater_lock_path())
+        self.role: Optional[str] = None
+        
+        # Progress of the pass in progress, and refreshes triggered through the
+        # admin API: requested symbols wait in _refresh_pending, are taken as one
+        # batch (_refresh_waiting until its pass starts) by a single thread
+        self.cycles = CycleTracker()
+        self._refresh_pending: set = set()
+        self._refresh_waiting: set = set()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.refresh_triggers = 0
+        self.refresh_coalesced = 0
         
         # Statistics for monitoring and debugging
         self.update_count = 0
@@ -41,54 +196,181 @@ class StockDataService:
         self.cache_hits = 0
         self.cache_misses = 0
 
-    def update_cache(self) -> bool:
+    def _create_scheduler(self) -> RefreshScheduler:
+        """
+        Build the refresh schedule from the market-hours settings.
+        
+        With MARKET_HOURS_ENABLED, symbols refresh every MARKET_REFRESH_MINUTES
+        (one ingest bar by default) while the market is open, BAR_CLOSE_DELAY_SECONDS
+        after each bar closes. Bar boundaries of up to an hour fall on the same
+        epoch multiples in exchange time, since its UTC offset is whole hours.
+        Otherwise they refresh every FETCH_INTERVAL_HOURS around the clock.
+        """
+        if not MARKET_HOURS_ENABLED:
+            return RefreshScheduler(
+                self.symbols,
+                interval_seconds=FETCH_INTERVAL_HOURS * 3600,
+                shard_count=UPDATER_SHARD_COUNT
+            )
+        
+        calendar = MarketCalendar(
+            timezone=MARKET_TIMEZONE,
+            holidays=load_holidays(MARKET_HOLIDAYS_FILE),
+            extended_hours=MARKET_EXTENDED_HOURS
+        )
+        return RefreshScheduler(
+            self.symbols,
+            interval_seconds=(MARKET_REFRESH_MINUTES or interval_minutes(INGEST_INTERVAL)) * 60,
+            shard_count=UPDATER_SHARD_COUNT,
+            calendar=calendar,
+            offset_seconds=BAR_CLOSE_DELAY_SECONDS
+        )
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        Return the shared fetch pool, sized independently of the universe.
+        
+        Raises:
+            RuntimeError: If shutdown() already shut the pools down
+        """
+        with self._lock:
+            if self._executor is None:
+                if self._pools_closed:
+                    raise RuntimeError("Fetch pool is shut down")
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=UPDATER_MAX_WORKERS,
+                    thread_name_prefix="StockFetch"
+                )
+            return self._executor
+
+    def _get_on_demand_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """
+        Return the pool for on-demand fetches, separate from the refresh pool.
+        
+        Raises:
+            RuntimeError: If shutdown() already shut the pools down
+        """
+        with self._lock:
+            if self._on_demand_executor is None:
+                if self._pools_closed:
+                    raise RuntimeError("On-demand fetch pool is shut down")
+                self._on_demand_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=ON_DEMAND_MAX_WORKERS,
+                    thread_name_prefix="OnDemandFetch"
+                )
+            return self._on_demand_executor
+
+    def update_cache(self, symbols: Optional[List[str]] = None) -> bool:
         """
         Fetch fresh intraday data for all configured symbols and store in the database.
         
-        Uses a thread pool to parallelize fetching data for multiple symbols,
-        significantly improving update performance.
+        Uses the bounded fetch pool to parallelize fetching, publishing each
+        symbol as soon as its data is committed.
+        
+        Args:
+            symbols: Symbols to refresh (default: the whole tracked universe)
         
         Returns:
             bool: True if update was successful (all symbols updated), False otherwise
         """
-        logger.info("Updating stock database...")
+        with self._update_lock:
+            targets = self.scheduler.claim(symbols if symbols is not None else self.symbols)
+            return self._run_pass(targets, trigger="manual")
+
+    def run_due_cycle(self) -> int:
+        """
+        Refresh only the symbols whose scheduled time has come.
+        
+        Returns:
+            Number of symbols refreshed in this pass
+        """
+        with self._update_lock:
+            # While the provider's circuit is open nothing is claimed; half-open, only the probe
+            limit = self.breaker.probe_limit()
+            if limit == 0:
+                return 0
+            due = self.scheduler.pop_due(limit=limit)
+            if not due:
+                return 0
+            self._run_pass(due)
+            return len(due)
+
+    def _fetch_tracked(self, symbol: str, deadline: Optional[float]) -> tuple[bool, int]:
+        """Run _fetch_and_store for a pass, recording when the symbol starts fetching."""
+        self.cycles.mark(symbol, FETCHING)
+        return self._fetch_and_store(symbol, deadline)
+
+    def _run_pass(self, symbols: List[str], trigger: str = "schedule") -> bool:
+        """
+        Fetch the claimed symbols on the fetch pool and publish each as it lands.
+        
+        Args:
+            symbols: Symbols already claimed from the scheduler
+            trigger: What started the pass, for the cycle tracker
+        
+        Returns:
+            bool: True if every symbol was updated
+        """
+        logger.info(f"Updating stock database for {len(symbols)} symbols...")
+        executor = self._get_executor()
+        self.cycles.start(symbols, trigger)
         update_start_time = time.time()
         update_success = True
         symbols_updated = 0
+        symbols_deferred = 0
+        # Symbols the pass couldn't reach within its budget wait for the next one
+        deadline = time.monotonic() + UPDATER_CYCLE_BUDGET_SECONDS if UPDATER_CYCLE_BUDGET_SECONDS > 0 else None
         
-        # Use thread lock to prevent concurrent updates
-        with self._lock:
-            max_workers = min(10, len(FANG_SYMBOLS))  # Limit max concurrency
-            # Use ThreadPoolExecutor for parallel fetching
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Start all fetch tasks
-                future_to_symbol = {
-                    executor.submit(self._fetch_and_store, symbol): symbol 
-                    for symbol in FANG_SYMBOLS
-                }
+        future_to_symbol = {
+            executor.submit(self._fetch_tracked, symbol, deadline): symbol 
+            for symbol in symbols
+        }
+        
+        # Process results as they complete
+        for future in concurrent.futures.as_completed(future_to_symbol):
+            symbol = future_to_symbol[future]
+            success = False
+            try:
+                # Get result from the future
+                success, count = future.result()
                 
-                # Process results as they complete
-                for future in concurrent.futures.as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        # Get result from the future
-                        success, count = future.result()
-                        
-                        if success:
-                            symbols_updated += 1
-                            logger.info(f"Updated database for {symbol} with {count} data points")
-                        else:
-                            logger.warning(f"Failed to update database for {symbol}")
-                            update_success = False
-                            
-                    except Exception as e:
-                        logger.error(f"Exception updating database for {symbol}: {str(e)}", exc_info=True)
-                        update_success = False
+                if success:
+                    symbols_updated += 1
+                    self._publish_fetch(symbol, count)
+                    self.cycles.mark(symbol, UPDATED)
+                    logger.info(f"Updated database for {symbol} with {count} new or revised data points")
+                else:
+                    logger.warning(f"Failed to update database for {symbol}")
+                    
+            except CircuitOpenError:
+                # Not attempted: due again once the provider may be probed
+                self.scheduler.defer(symbol, time.time() + self.breaker.seconds_until_probe())
+                self.cycles.mark(symbol, DEFERRED)
+                symbols_deferred += 1
+                update_success = False
+                continue
+            except DeadlineExceededError:
+                # Cut off by the pass budget: due again right away, without a failure
+                self.scheduler.defer(symbol, time.time())
+                self.cycles.mark(symbol, DEFERRED)
+                symbols_deferred += 1
+                update_success = False
+                continue
+            except Exception as e:
+                logger.error(f"Exception updating database for {symbol}: {str(e)}", exc_info=True)
             
-            # Purge old data
+            self.scheduler.mark_done(symbol, success, not_before=self.symbol_backoff.retry_at(symbol))
+            if not success:
+                self.cycles.mark(symbol, FAILED)
+                update_success = False
+        self.cycles.finish()
+        
+        # Purge old data (left for the next start when shutting down)
+        if not self._shutdown_event.is_set():
             purge_old_data()
-            
-            # Update timestamp and statistics
+        
+        # Update timestamp and statistics
+        with self._lock:
             self.last_update = datetime.datetime.utcnow()
             self.update_count += 1
             if not update_success:
@@ -98,13 +380,75 @@ class StockDataService:
         update_time = time.time() - update_start_time
         logger.info(
             f"Database update completed in {update_time:.2f}s. "
-            f"Updated {symbols_updated}/{len(FANG_SYMBOLS)} symbols. "
+            f"Updated {symbols_updated}/{len(symbols)} symbols"
+            f"{f', deferred {symbols_deferred} (provider circuit open or pass budget spent)' if symbols_deferred else ''}. "
             f"Success: {update_success}"
         )
         
         return update_success
+
+    def _publish(self, symbol: str):
+        """
+        Mark a symbol's freshly committed data as the current version.
+        
+        Args:
+            symbol: Stock symbol whose data was just stored
+        """
+        with self._lock:
+            self.data_version += 1
+            version = self.data_version
+            self.symbol_versions[symbol] = version
+            self.symbol_updated_at[symbol] = datetime.datetime.utcnow()
+            self._missing_symbols.pop(symbol, None)
+        
+        if self.broadcaster.has_subscribers(symbol):
+            self._broadcast_delta(symbol, version)
     
-    def _fetch_and_store(self, symbol: str) -> tuple[bool, int]:
+    def _publish_fetch(self, symbol: str, written: int):
+        """
+        Publish a successful fetch, keeping the symbol's version when nothing changed.
+        
+        An unchanged fetch only records that the symbol is fresh, so its cached
+        series, JSON and indicators stay valid and streams get no empty delta.
+        
+        Args:
+            symbol: Stock symbol that was just fetched
+            written: Bars the fetch inserted or revised
+        """
+        with self._lock:
+            unchanged = written == 0 and symbol in self.symbol_versions
+            if unchanged:
+                self.symbol_updated_at[symbol] = datetime.datetime.utcnow()
+        if not unchanged:
+            self._publish(symbol)
+    
+    def _broadcast_delta(self, symbol: str, version: int):
+        """
+        Push the bars newer than the last broadcast for a symbol to stream subscribers.
+        
+        The series is loaded through the normal cache, so readers reuse it. With
+        nothing to compare against (first broadcast since startup), only the
+        latest bar is sent; clients backfill from /symbolData.
+        
+        Args:
+            symbol: Stock symbol that was just published
+            version: The version it was published at
+        """
+        entry = self._get_series_entry(symbol, INGEST_INTERVAL)
+        if entry is None or len(entry[1]) == 0:
+            return
+        
+        timestamps = entry[1].timestamps
+        previous = self._latest_published_bar.get(symbol)
+        first = int(np.searchsorted(timestamps, previous, side="right")) if previous is not None else len(timestamps) - 1
+        self._latest_published_bar[symbol] = int(timestamps[-1])
+        if first >= len(timestamps):
+            return  # No new bars, only revisions of existing ones
+        
+        bars = entry[1].to_bars(np.arange(max(first, len(timestamps) - STREAM_MAX_DELTA_BARS), len(timestamps)))
+        self.broadcaster.publish(symbol, version, bars)
+    
+    def _fetch_and_store(self, symbol: str, deadline: Optional[float] = None) -> tuple[bool, int]:
         """
         Helper method to fetch data for a single symbol and store in the database.
         
@@ -113,66 +457,857 @@ class StockDataService:
         
         Args:
             symbol: Stock symbol to fetch data for
+            deadline: time.monotonic() by which the fetch must finish (default: none)
             
         Returns:
-            Tuple of (success, data_points_count)
+            Tuple of (success, bars inserted or revised)
+            
+        Raises:
+            CircuitOpenError: If the provider's circuit is open (nothing was attempted)
+            DeadlineExceededError: If the deadline passed, or shutdown began, before the fetch started
         """
+        # Shutting down ends the pass like a spent budget: the symbol stays due
+        if self._shutdown_event.is_set() or (deadline is not None and time.monotonic() >= deadline):
+            raise DeadlineExceededError(details={"symbol": symbol})
+        if not self.breaker.allow():
+            raise CircuitOpenError(details={"symbol": symbol})
+        
         try:
-            # Fetch data from Alpha Vantage
-            raw_data = fetch_intraday_data(symbol)
-            if not raw_data:
-                return False, 0
-                
-            # Store each data point in the database
-            success_count = 0
-            for timestamp, data_point in raw_data.items():
-                if insert_stock_data(symbol, timestamp, data_point):
-                    success_count += 1
-                    
-            return True, success_count
+            # Fetch normalized bars from the first provider that can supply them
+            raw_data = self.fetcher.fetch(symbol, INGEST_INTERVAL, deadline)
+        except DeadlineExceededError:
+            # Says nothing about the provider's health
+            self.breaker.cancel()
+            raise
         except RateLimitError as e:
             # Handle rate limiting with a warning instead of an error
             logger.warning(f"Rate limit encountered for {symbol}: {e.message}")
-            # Return a partial success if we got some data
-            return success_count > 0, success_count
-        except (NetworkError, DataRetrievalError) as e:
+            self.breaker.record_failure()
+            return False, 0
+        except (NetworkError, DataRetrievalError, AuthenticationError) as e:
             logger.error(f"Error in fetch_and_store for {symbol}: {e.message}")
+            if is_provider_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+                self.symbol_backoff.record_failure(symbol, e.message)
             return False, 0
         except Exception as e:
             logger.error(f"Unexpected error in fetch_and_store for {symbol}: {str(e)}", exc_info=True)
+            self.breaker.record_failure()
             return False, 0
+        
+        # The provider answered; whatever happens next is about this symbol
+        self.breaker.record_success()
+        try:
+            if not raw_data:
+                self.symbol_backoff.record_failure(symbol, "Empty response")
+                return False, 0
+                
+            # Store what changed in one transaction so the symbol publishes atomically
+            counts = upsert_stock_data_batch(symbol, raw_data)
+            if counts is None or not any(counts.values()):
+                return False, 0
+            with self._lock:
+                for outcome, count in counts.items():
+                    self.ingest_counts[outcome] += count
+            self.symbol_backoff.record_success(symbol)
+            return True, counts["inserted"] + counts["revised"]
+        except Exception as e:
+            logger.error(f"Unexpected error in fetch_and_store for {symbol}: {str(e)}", exc_info=True)
+            return False, 0
+
+    def request_symbol(self, symbol: str) -> bool:
+        """
+        Fetch an untracked symbol in the background (on-demand mode).
+        
+        Called when a lookup finds no data. A new symbol is added to the
+        refresh rotation, claimed so the updater doesn't fetch it as well, and
+        fetched on the on-demand pool through the normal fetch-and-store path.
+        It stays in the rotation while it keeps being requested.
+        
+        Args:
+            symbol: Stock symbol
+            
+        Returns:
+            True if a fetch for the symbol is queued or running (retry shortly);
+            False if on-demand mode is off, the service is shutting down, the
+            symbol is already tracked, not a valid ticker, recently failed, or
+            the on-demand limit is reached
+        """
+        if not ON_DEMAND_ENABLED or self._shutdown_event.is_set():
+            return False
+        symbol = symbol.upper()
+        
+        with self._lock:
+            if symbol in self._on_demand_pending:
+                return True
+            if self.breaker.probe_limit() == 0:
+                return False  # Provider down: answer 404 rather than queue a doomed fetch
+            if symbol in self.scheduler or not valid_symbol(symbol) or not self.on_demand.add(symbol):
+                return False
+            self.scheduler.add(symbol)
+            self.scheduler.claim([symbol])
+            self._on_demand_pending.add(symbol)
+        
+        logger.info(f"Fetching untracked symbol {symbol} on demand")
+        self._get_on_demand_executor().submit(self._fetch_on_demand, symbol)
+        return True
+
+    def _fetch_on_demand(self, symbol: str):
+        """Fetch and publish a symbol added by request_symbol()."""
+        success = False
+        try:
+            success, count = self._fetch_and_store(symbol)
+            if success:
+                self._publish_fetch(symbol, count)
+                logger.info(f"Fetched on-demand symbol {symbol} with {count} data points")
+        except CircuitOpenError:
+            logger.warning(f"Provider circuit open; not fetching on-demand symbol {symbol}")
+        except Exception as e:
+            logger.error(f"Exception fetching on-demand symbol {symbol}: {str(e)}", exc_info=True)
+        finally:
+            if not success:
+                logger.warning(
+                    f"On-demand fetch failed for {symbol}; not retrying for {ON_DEMAND_FAILURE_TTL_SECONDS:.0f}s"
+                )
+                self.scheduler.remove(symbol)
+                self.on_demand.fail(symbol)
+            self.scheduler.mark_done(symbol, success)
+            with self._lock:
+                self._on_demand_pending.discard(symbol)
+
+    def evict_idle_symbols(self) -> List[str]:
+        """
+        Drop on-demand symbols nobody has requested within ON_DEMAND_IDLE_TTL_HOURS.
+        
+        Their stored bars stay readable until purged; they just stop being refreshed.
+        
+        Returns:
+            The evicted symbols
+        """
+        idle = self.on_demand.evict_idle()
+        for symbol in idle:
+            self.scheduler.remove(symbol)
+        if idle:
+            logger.info(f"Evicted {len(idle)} idle on-demand symbols: {', '.join(idle)}")
+        return idle
 
-    def get_data(self, symbol: str) -> Dict[str, Dict[str, str]]:
+    def get_data(self, symbol: str, interval: Optional[str] = None) -> Dict[str, Dict[str, str]]:
         """
         Return data for a symbol from the database.
         
+        Reads don't wait on a refresh pass; they see every symbol published so far.
+        
         Args:
             symbol: Stock symbol (e.g., FB, AMZN, NFLX, GOOG)
+            interval: Bar interval (default: INGEST_INTERVAL, as stored). Coarser
+                intervals are rolled up from the stored bars.
             
         Returns:
             Dictionary of stock data for the symbol, or empty dict if not found
+            
+        Raises:
+            ValueError: If the interval can't be built from the ingested data
         """
+        symbol = symbol.upper()
+        self.on_demand.touch(symbol)
+        if interval is None or interval == INGEST_INTERVAL:
+            series = self._snapshot_series(symbol)
+            result = series.to_bars() if series is not None else self._read_symbol(symbol)
+        else:
+            validate_rollup_interval(interval, INGEST_INTERVAL)
+            entry = self._get_series_entry(symbol, interval)
+            result = entry[2] if entry else {}
+        
+        # Update statistics
         with self._lock:
-            symbol = symbol.upper()
-            result = get_stock_data(symbol)
-            
-            # Update statistics
             if result:
                 self.cache_hits += 1
             else:
                 self.cache_misses += 1
                 
-            return result
+        return result
+
+    def get_data_json(self, symbol: str, interval: Optional[str] = None) -> Optional[bytes]:
+        """
+        Return get_data() for a symbol already encoded as JSON.
+        
+        The encoded bytes are cached per symbol version, so repeated reads of
+        unchanged data skip both the database and serialization, and the bytes
+        can be spliced straight into a response body.
+        
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval (default: INGEST_INTERVAL)
+            
+        Returns:
+            JSON bytes of the symbol's bars, or None if there is no data
+            
+        Raises:
+            ValueError: If the interval can't be built from the ingested data
+        """
+        symbol = symbol.upper()
+        interval = validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL)
+        self.on_demand.touch(symbol)
+        key = (symbol, interval)
+        version, cached = self._cached_json(key)
+        if cached is not None:
+            return cached
+        
+        def encode() -> Optional[bytes]:
+            data = self.get_data(symbol, interval=interval)
+            if not data:
+                return None
+            encoded = encode_json(data)
+            with self._lock:
+                self._json_cache[key] = (version, encoded)
+                self._json_cache.move_to_end(key)
+                while len(self._json_cache) > SERIES_CACHE_MAX_ENTRIES:
+                    self._json_cache.popitem(last=False)
+            return encoded
+        
+        # Concurrent misses for the same version share one load and encode
+        return self._flights.do(("json", key, version), encode)
+
+    def peek_data_json(self, symbol: str, interval: Optional[str] = None) -> Optional[bytes]:
+        """
+        Return get_data_json() only if it is already encoded for the current version.
+        
+        Never touches the database, so async handlers can call it on the event
+        loop and fall back to get_data_json() on db_executor when it misses.
+        
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval (default: INGEST_INTERVAL)
+            
+        Returns:
+            JSON bytes of the symbol's bars, or None if they aren't cached
+            
+        Raises:
+            ValueError: If the interval can't be built from the ingested data
+        """
+        symbol = symbol.upper()
+        interval = validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL)
+        _, cached = self._cached_json((symbol, interval))
+        if cached is not None:
+            self.on_demand.touch(symbol)
+        return cached
+
+    def _cached_json(self, key: tuple) -> tuple:
+        """Return (current version, cached JSON or None) for a (symbol, interval) key, counting a hit."""
+        with self._lock:
+            version = self.symbol_versions.get(key[0], 0)
+            entry = self._json_cache.get(key)
+            if entry is not None and entry[0] == version:
+                self._json_cache.move_to_end(key)
+                self.cache_hits += 1
+                return version, entry[1]
+            return version, None
+
+    def is_cached(self, symbol: str, interval: Optional[str] = None) -> bool:
+        """
+        Return whether a symbol's series is built for its current version.
+        
+        While it is, get_series, get_bar and get_batch are served from memory,
+        so async handlers call them on the event loop; otherwise they submit
+        them to db_executor. Reads that also build a derived structure check it
+        too (see is_availability_cached and is_indicator_cached). A publish
+        landing between this check and the read costs one rebuild on the
+        caller's thread.
+        
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval (default: INGEST_INTERVAL)
+            
+        Returns:
+            True if the series is cached and current
+            
+        Raises:
+            ValueError: If the interval can't be built from the ingested data
+        """
+        symbol = symbol.upper()
+        key = (symbol, validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL))
+        with self._lock:
+            entry = self._series_cache.get(key)
+            return entry is not None and entry[0] == self.symbol_versions.get(symbol, 0)
+
+    def is_availability_cached(self, symbol: str, interval: Optional[str] = None) -> bool:
+        """
+        Return whether get_availability is served from memory (see is_cached).
+        
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval (default: INGEST_INTERVAL)
+            
+        Returns:
+            True if the series and its availability index are cached and current
+            
+        Raises:
+            ValueError: If the interval can't be built from the ingested data
+        """
+        symbol = symbol.upper()
+        key = (symbol, validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL))
+        with self._lock:
+            version = self.symbol_versions.get(symbol, 0)
+            entry = self._series_cache.get(key)
+            index = self._availability_cache.get(key)
+            return entry is not None and entry[0] == version and index is not None and index[0] == version
+
+    def is_indicator_cached(
+        self,
+        symbol: str,
+        indicator: str,
+        interval: Optional[str] = None,
+        window: int = 20,
+        periods: int = 1
+    ) -> bool:
+        """
+        Return whether get_indicator with these arguments is served from memory (see is_cached).
+        
+        Returns:
+            True if the series and the indicator result are cached and current
+            
+        Raises:
+            ValueError: For an invalid interval, indicator or parameters
+        """
+        symbol = symbol.upper()
+        interval = validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL)
+        params = indicator_params(indicator, window, periods)
+        with self._lock:
+            version = self.symbol_versions.get(symbol, 0)
+            entry = self._series_cache.get((symbol, interval))
+            return (
+                entry is not None and entry[0] == version
+                and (symbol, interval, indicator, params, version) in self._indicator_cache
+            )
+
+    def get_series(self, symbol: str, interval: Optional[str] = None) -> Optional[SymbolSeries]:
+        """
+        Return a symbol's columnar series at the requested interval.
+        
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval (default: INGEST_INTERVAL)
+            
+        Returns:
+            SymbolSeries, or None if there is no data for the symbol
+            
+        Raises:
+            ValueError: If the interval can't be built from the ingested data
+        """
+        interval = validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL)
+        symbol = symbol.upper()
+        self.on_demand.touch(symbol)
+        entry = self._get_series_entry(symbol, interval)
+        return entry[1] if entry else None
+
+    def _get_series_entry(self, symbol: str, interval: str) -> Optional[tuple]:
+        """
+        Return the cached (version, series, bars) entry, rebuilding it if stale.
+        
+        The base interval is loaded from the database once per symbol version;
+        coarser intervals are rolled up from it. Rolled-up entries also keep
+        their Alpha Vantage style bars so repeated reads skip the conversion.
+        Concurrent misses for the same version share one rebuild.
+        """
+        key = (symbol, interval)
+        with self._lock:
+            version = self.symbol_versions.get(symbol, 0)
+            entry = self._series_cache.get(key)
+            if entry is not None and entry[0] == version:
+                self._series_cache.move_to_end(key)
+                return entry
+        
+        return self._flights.do(("series", key, version), lambda: self._build_series_entry(symbol, interval, version))
+
+    def _build_series_entry(self, symbol: str, interval: str, version: int) -> Optional[tuple]:
+        """Build and cache a (version, series, bars) entry; see _get_series_entry."""
+        key = (symbol, interval)
+        if interval == INGEST_INTERVAL:
+            series = self._load_base_series(symbol)
+            if series is None:
+                return None
+            entry = (version, series, None)
+        else:
+            base = self._get_series_entry(symbol, INGEST_INTERVAL)
+            if base is None:
+                return None
+            series = rollup(base[1], interval_minutes(interval))
+            entry = (base[0], series, series.to_bars())
+        
+        with self._lock:
+            self._series_cache[key] = entry
+            self._series_cache.move_to_end(key)
+            while len(self._series_cache) > SERIES_CACHE_MAX_ENTRIES:
+                self._series_cache.popitem(last=False)
+        return entry
+
+    def _load_base_series(self, symbol: str) -> Optional[SymbolSeries]:
+        """Load a symbol's stored bars as a series, from the snapshot if it is current."""
+        series = self._snapshot_series(symbol)
+        if series is not None:
+            return series
+        data = self._read_symbol(symbol)
+        return SymbolSeries.from_bars(data) if data else None
+
+    def _read_symbol(self, symbol: str) -> Dict[str, Dict[str, str]]:
+        """
+        Read a symbol's bars from the database.
+        
+        Concurrent reads of the same symbol version share one query. Symbols
+        with no data are remembered for NEGATIVE_CACHE_TTL_SECONDS (or until
+        they are published), so repeated lookups of unknown symbols never
+        reach the database.
+        """
+        with self._lock:
+            version = self.symbol_versions.get(symbol, 0)
+            expires = self._missing_symbols.get(symbol)
+            if expires is not None:
+                if expires > time.time():
+                    self.negative_hits += 1
+                    return {}
+                del self._missing_symbols[symbol]
+        
+        data = self._flights.do(("db", symbol, version), lambda: get_stock_data(symbol))
+        if not data and NEGATIVE_CACHE_TTL_SECONDS > 0:
+            with self._lock:
+                # Skip if the symbol was published while the query ran
+                if self.symbol_versions.get(symbol, 0) == version:
+                    self._missing_symbols[symbol] = time.time() + NEGATIVE_CACHE_TTL_SECONDS
+                    self._missing_symbols.move_to_end(symbol)
+                    while len(self._missing_symbols) > NEGATIVE_CACHE_MAX_ENTRIES:
+                        self._missing_symbols.popitem(last=False)
+        return data
+
+    def _snapshot_series(self, symbol: str) -> Optional[SymbolSeries]:
+        """
+        Return a symbol's base series from the restored snapshot.
+        
+        Only while the snapshot holds the symbol's current published version;
+        a symbol that fails its checksum is dropped from the snapshot and read
+        from the database from then on.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        with self._lock:
+            version = self.symbol_versions.get(symbol)
+        if version is None or snapshot.version_of(symbol) != version:
+            return None
+        try:
+            return snapshot.series(symbol)
+        except SnapshotError as e:
+            logger.error(f"{e}; reading {symbol} from the database instead")
+            snapshot.discard(symbol)
+            return None
+
+    def _open_snapshot(self, path: str) -> Optional[Snapshot]:
+        """Map a snapshot file, or return None if it is missing or unusable."""
+        try:
+            snapshot = load_snapshot(path)
+        except (OSError, ValueError, SnapshotError) as e:
+            logger.warning(f"Ignoring unusable snapshot {path}: {e}")
+            return None
+        if snapshot is not None and snapshot.interval != INGEST_INTERVAL:
+            logger.warning(f"Ignoring snapshot {path}: built from {snapshot.interval} bars, ingesting {INGEST_INTERVAL}")
+            return None
+        return snapshot
+
+    def restore_snapshot(self, path: Optional[str] = None) -> bool:
+        """
+        Memory-map the last snapshot and publish its data version.
+        
+        Call at startup, before the updater publishes anything. Only the
+        header is read, so this takes milliseconds however many symbols the
+        snapshot holds; bars are paged in as symbols are requested. Symbols
+        refreshed after the snapshot was written are left to the database.
+        
+        Args:
+            path: Snapshot file (default: next to the database)
+        
+        Returns:
+            True if a snapshot was restored
+        """
+        path = path or get_snapshot_path()
+        start_time = time.time()
+        signature = snapshot_signature(path)
+        snapshot = self._open_snapshot(path)
+        if snapshot is None:
+            return False
+        
+        updated_at = snapshot.symbol_updated_at()
+        for symbol, last_success in load_last_refresh_success().items():
+            published = updated_at.get(symbol)
+            refreshed = datetime.datetime.fromisoformat(last_success.rstrip("Z"))
+            if published is not None and (refreshed - published).total_seconds() > SNAPSHOT_PUBLISH_SLACK_SECONDS:
+                snapshot.discard(symbol)
+        
+        with self._lock:
+            if self.data_version > snapshot.data_version:
+                logger.warning(f"Ignoring snapshot {path}: older than the published data")
+                return False
+            self._adopt_snapshot(snapshot, signature)
+        
+        logger.info(
+            f"Restored snapshot at data version {snapshot.data_version} with {len(snapshot)} symbols "
+            f"in {(time.time() - start_time) * 1000:.1f}ms"
+        )
+        return True
+
+    def follow_segment(self, path: Optional[str] = None) -> bool:
+        """
+        Swap to the snapshot segment another worker's updater just wrote.
+        
+        Used by workers that don't run the updater. The segment replaces this
+        worker's published state wholesale: every symbol is then served as
+        zero-copy views of the shared mapping, so resident memory stays flat
+        however many symbols there are. The previous mapping is released once
+        in-flight requests drop their references to it.
+        
+        Args:
+            path: Snapshot file (default: next to the database)
+        
+        Returns:
+            True if a new segment was mapped
+        """
+        path = path or get_snapshot_path()
+        signature = snapshot_signature(path)
+        with self._lock:
+            if signature is None or signature == self._segment_signature:
+                return False
+        
+        snapshot = self._open_snapshot(path)
+        if snapshot is None:
+            return False
+        
+        with self._lock:
+            if snapshot.data_version < self.data_version:
+                # The updater restarted without a snapshot and reused version numbers
+                self._series_cache.clear()
+                self._json_cache.clear()
+                self._indicator_cache.clear()
+                self._availability_cache.clear()
+            self.symbol_versions = {}
+            self.symbol_updated_at = {}
+            self._adopt_snapshot(snapshot, signature)
+        logger.info(f"Mapped segment at data version {snapshot.data_version} with {len(snapshot)} symbols")
+        return True
+
+    def _adopt_snapshot(self, snapshot: Snapshot, signature: Optional[tuple]):
+        """Publish a mapped snapshot's versions and serve from it (caller holds the lock)."""
+        self._snapshot = snapshot
+        self._segment_signature = signature
+        self._missing_symbols.clear()
+        self.data_version = snapshot.data_version
+        self.symbol_versions.update(snapshot.symbol_versions())
+        self.symbol_updated_at.update(snapshot.symbol_updated_at())
+        self._snapshot_version = snapshot.data_version
+        self._snapshot_bytes = snapshot.size
+
+    def save_snapshot(self, path: Optional[str] = None) -> int:
+        """
+        Write every published symbol's base series to a snapshot file.
+        
+        Waits for any running refresh pass so the snapshot is one consistent
+        data version. Series already in memory are reused; the rest are read
+        without disturbing the series cache. The written file is then mapped
+        and served from, so this process doesn't keep its own copy of the bars
+        either, and other workers pick it up with follow_segment().
+        
+        Args:
+            path: Snapshot file (default: next to the database)
+        
+        Returns:
+            Number of symbols written
+            
+        Raises:
+            OSError: If the file can't be written
+        """
+        path = path or get_snapshot_path()
+        with self._update_lock:
+            with self._lock:
+                data_version = self.data_version
+                versions = dict(self.symbol_versions)
+                updated_at = dict(self.symbol_updated_at)
+            
+            series_by_symbol = {}
+            for symbol, version in versions.items():
+                with self._lock:
+                    cached = self._series_cache.get((symbol, INGEST_INTERVAL))
+                series = cached[1] if cached is not None and cached[0] == version else self._load_base_series(symbol)
+                if series is not None:
+                    series_by_symbol[symbol] = series
+            
+            size = write_snapshot(path, data_version, INGEST_INTERVAL, series_by_symbol, versions, updated_at)
+            signature = snapshot_signature(path)
+            snapshot = self._open_snapshot(path)
+            
+            with self._lock:
+                self._snapshot_written_at = time.time()
+                if snapshot is not None and self.data_version == data_version:
+                    self._adopt_snapshot(snapshot, signature)
+                    self._drop_cached_base_series()
+                else:
+                    # An on-demand fetch published while writing; map the next snapshot instead
+                    self._snapshot_version = data_version
+                    self._snapshot_bytes = size
+        
+        logger.info(f"Wrote snapshot of {len(series_by_symbol)} symbols at data version {data_version} ({size} bytes)")
+        return len(series_by_symbol)
+
+    def _drop_cached_base_series(self):
+        """Evict base series now served from the mapped snapshot (caller holds the lock)."""
+        for key in [k for k in self._series_cache if k[1] == INGEST_INTERVAL]:
+            del self._series_cache[key]
+
+    def _snapshot_due_in(self) -> Optional[float]:
+        """Return seconds until unsaved data should be snapshotted, or None if nothing is pending."""
+        with self._lock:
+            if SNAPSHOT_INTERVAL_SECONDS <= 0 or self.data_version == self._snapshot_version:
+                return None
+            return max(0.0, self._snapshot_written_at + SNAPSHOT_INTERVAL_SECONDS - time.time())
+
+    def maybe_save_snapshot(self, force: bool = False) -> bool:
+        """
+        Snapshot newly published data, at most once per SNAPSHOT_INTERVAL_SECONDS.
+        
+        Args:
+            force: Write now if anything is unsaved, ignoring the interval (e.g. at shutdown)
+        
+        Returns:
+            True if a snapshot was written
+        """
+        due_in = self._snapshot_due_in()
+        if due_in is None or (due_in > 0 and not force):
+            return False
+        try:
+            self.save_snapshot()
+            return True
+        except OSError as e:
+            logger.error(f"Failed to write snapshot: {e}")
+            return False
+
+    def get_bar(self, symbol: str, when: int, interval: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """
+        Return the bar at an exact moment.
+        
+        Args:
+            symbol: Stock symbol
+            when: Epoch seconds of the bar (as labelled)
+            interval: Bar interval (default: INGEST_INTERVAL)
+            
+        Returns:
+            The bar's Alpha Vantage style values, or None if there is no such bar
+            
+        Raises:
+            ValueError: If the interval can't be built from the ingested data
+        """
+        symbol = symbol.upper()
+        interval = validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL)
+        self.on_demand.touch(symbol)
+        entry = self._get_series_entry(symbol, interval)
+        bar = None
+        if entry is not None:
+            series = entry[1]
+            position = int(np.searchsorted(series.timestamps, when))
+            if position < len(series) and series.timestamps[position] == when:
+                bar = next(iter(series.to_bars(np.array([position])).values()))
+        
+        with self._lock:
+            if bar is not None:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        return bar
+
+    def get_batch(self, items: List[Dict[str, Any]], interval: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Resolve many point/range lookups in one pass over the in-memory series.
+        
+        Items are grouped by symbol so each symbol's series is fetched once,
+        then all of that symbol's lookups are resolved together with a single
+        vectorized searchsorted over its timestamps.
+        
+        Args:
+            items: Lookups, each with "symbol" and optionally "timestamp"
+                (exact bar) or "start"/"end" (inclusive range). An item with
+                neither returns the latest bar.
+            interval: Bar interval for every item (default: INGEST_INTERVAL)
+            
+        Returns:
+            One result per item, in request order, each with "symbol",
+            "found" and "bars" (Alpha Vantage style, newest first)
+            
+        Raises:
+            ValueError: For an invalid interval or timestamp
+        """
+        interval = validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL)
+        
+        # Parse everything up front so a bad item fails the batch before any work
+        lookups = []
+        by_symbol: Dict[str, List[int]] = {}
+        for position, item in enumerate(items):
+            symbol = item["symbol"].upper()
+            if item.get("timestamp"):
+                start = end = parse_timestamp(item["timestamp"])
+            elif item.get("start") or item.get("end"):
+                # Open-ended ranges run to the first/last bar
+                start = parse_timestamp(item["start"]) if item.get("start") else BATCH_MIN_TIMESTAMP
+                end = parse_timestamp(item["end"]) if item.get("end") else BATCH_MAX_TIMESTAMP
+                if item.get("end") and len(item["end"].strip()) == 10:
+                    end += 86400 - 1  # A bare end date includes the whole day
+            else:
+                start = end = None  # Latest bar
+            lookups.append((start, end))
+            by_symbol.setdefault(symbol, []).append(position)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(lookups)
+        hits = misses = 0
+        for symbol, positions in by_symbol.items():
+            entry = self._get_series_entry(symbol, interval)
+            if entry is None or len(entry[1]) == 0:
+                for position in positions:
+                    results[position] = {"symbol": symbol, "found": False, "bars": {}}
+                misses += len(positions)
+                continue
+            
+            series = entry[1]
+            timestamps = series.timestamps
+            latest = timestamps[-1]
+            bounds = [lookups[p] if lookups[p][0] is not None else (latest, latest) for p in positions]
+            starts = np.array([b[0] for b in bounds], dtype=np.int64)
+            ends = np.array([b[1] for b in bounds], dtype=np.int64)
+            lo = np.searchsorted(timestamps, starts, side="left")
+            hi = np.searchsorted(timestamps, ends, side="right")
+            
+            for position, first, last in zip(positions, lo.tolist(), hi.tolist()):
+                bars = series.to_bars(np.arange(first, last)) if last > first else {}
+                results[position] = {"symbol": symbol, "found": bool(bars), "bars": bars}
+                if bars:
+                    hits += 1
+                else:
+                    misses += 1
+        
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+        return results
+
+    def get_indicator(
+        self,
+        symbol: str,
+        indicator: str,
+        interval: Optional[str] = None,
+        window: int = 20,
+        periods: int = 1
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Compute an indicator over a symbol's series, memoized per data version.
+        
+        Args:
+            symbol: Stock symbol
+            indicator: Indicator name (see core.indicators.INDICATORS)
+            interval: Bar interval (default: INGEST_INTERVAL)
+            window: Window/span for windowed indicators
+            periods: Lookback for pct_change
+            
+        Returns:
+            Dictionary with "version", "timestamps" (SymbolSeries labels, oldest first)
+            and "values" (output name -> NumPy array), or None if there is no data
+            
+        Raises:
+            ValueError: For an invalid interval, indicator or parameters
+        """
+        symbol = symbol.upper()
+        interval = validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL)
+        params = indicator_params(indicator, window, periods)
+        self.on_demand.touch(symbol)
+        entry = self._get_series_entry(symbol, interval)
+        if entry is None:
+            return None
+        
+        version, series, _ = entry
+        key = (symbol, interval, indicator, params, version)
+        with self._lock:
+            cached = self._indicator_cache.get(key)
+            if cached is not None:
+                self._indicator_cache.move_to_end(key)
+                return cached
+        
+        result = {
+            "version": version,
+            "timestamps": series.labels(),
+            "values": compute_indicator(indicator, series, window=window, periods=periods)
+        }
+        
+        with self._lock:
+            self._indicator_cache[key] = result
+            while len(self._indicator_cache) > INDICATOR_CACHE_MAX_ENTRIES:
+                self._indicator_cache.popitem(last=False)
+        return result
+
+    def get_availability(self, symbol: str, interval: Optional[str] = None) -> Optional[AvailabilityIndex]:
+        """
+        Return which dates and hours a symbol has bars for.
+        
+        Built once per symbol version from its series and cached, so miss
+        responses (which scanners and bad clients hit heavily) never rescan
+        the bars.
+        
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval (default: INGEST_INTERVAL)
+            
+        Returns:
+            AvailabilityIndex, or None if there is no data for the symbol
+            
+        Raises:
+            ValueError: If the interval can't be built from the ingested data
+        """
+        symbol = symbol.upper()
+        interval = validate_rollup_interval(interval or INGEST_INTERVAL, INGEST_INTERVAL)
+        entry = self._get_series_entry(symbol, interval)
+        if entry is None:
+            return None
+        
+        version, series, _ = entry
+        key = (symbol, interval)
+        with self._lock:
+            cached = self._availability_cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._availability_cache.move_to_end(key)
+                return cached[1]
+        
+        index = AvailabilityIndex(series.timestamps)
+        with self._lock:
+            self._availability_cache[key] = (version, index)
+            self._availability_cache.move_to_end(key)
+            while len(self._availability_cache) > SERIES_CACHE_MAX_ENTRIES:
+                self._availability_cache.popitem(last=False)
+        return index
 
     def get_symbols_with_data(self) -> List[str]:
         """
         Return a list of symbols that have data in the database.
         
+        Cached until the next publish or refresh pass (which may purge
+        symbols), so error paths that list the available symbols on every
+        miss don't each run a SELECT DISTINCT over the table.
+        
         Returns:
             List of symbols with data
         """
         with self._lock:
-            return get_symbols_with_data()
+            key = (self.data_version, self.update_count)
+            cached = self._symbols_with_data
+            if cached is not None and cached[0] == key:
+                return list(cached[1])
+        
+        symbols = self._flights.do(("symbols", key), get_symbols_with_data)
+        with self._lock:
+            self._symbols_with_data = (key, symbols)
+        return list(symbols)
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """
@@ -181,10 +1316,11 @@ class StockDataService:
         Returns:
             Dictionary of database and service statistics
         """
+        # Get database stats (outside the lock; this is the slow part)
+        db_stats = get_db_stats()
+        scheduler_stats = self.scheduler.get_stats()
+        
         with self._lock:
-            # Get database stats
-            db_stats = get_db_stats()
-            
             # Calculate cache hit rate
             total_accesses = self.cache_hits + self.cache_misses
             hit_rate = (self.cache_hits / total_accesses * 100) if total_accesses > 0 else 0
@@ -204,14 +1340,61 @@ class StockDataService:
                 "hit_rate_percentage": round(hit_rate, 2),
                 "symbols_cached": db_stats["symbols_with_data"],
                 "total_data_points": db_stats["total_records"],
+                "ingest": {**self.ingest_counts, "revised_in_database": db_stats["revised_records"]},
                 "cache_age_seconds": cache_age_seconds,
+                "data_version": self.data_version,
+                "scheduler": scheduler_stats,
+                "streaming": self.broadcaster.get_stats(),
+                "provider_circuit": self.breaker.get_stats(),
+                "providers": self.fetcher.get_stats(),
+                "db_executor": self.db_executor.get_stats(),
+                "failing_symbols": self.symbol_backoff.get_stats(),
+                "on_demand": {
+                    **self.on_demand.get_stats(),
+                    "enabled": ON_DEMAND_ENABLED,
+                    "pending": len(self._on_demand_pending)
+                },
+                "coalescing": {
+                    **self._flights.get_stats(),
+                    "negative_hits": self.negative_hits,
+                    "missing_symbols_cached": len(self._missing_symbols)
+                },
+                "snapshot": {
+                    "data_version": self._snapshot_version,
+                    "bytes": self._snapshot_bytes,
+                    "mapped_symbols": len(self._snapshot) if self._snapshot is not None else 0,
+                    "role": self.role
+                },
                 "db_stats": db_stats
             }
 
+    def _take_updater_role(self) -> bool:
+        """
+        Return True if this process runs the updater, taking the role if it is free.
+        
+        A follower that takes over (the previous updater's process exited)
+        reloads the refresh schedule its predecessor persisted.
+        """
+        if not self._updater_lock.try_acquire():
+            if self.role != "follower":
+                logger.info("Another worker runs the updater; following its snapshot segments")
+                self.role = "follower"
+            return False
+        
+        if self.role == "follower":
+            logger.info("Taking over the background updater from another worker")
+            self.scheduler.reload()
+        self.role = "updater"
+        return True
+
     def start_background_updater(self):
         """
-        Starts a background thread that updates the database every FETCH_INTERVAL_HOURS.
+        Starts a background thread that refreshes each symbol as its scheduled slot comes due.
         Thread-safe, ensures only one updater thread is running.
+        
+        With several worker processes, only the one holding the updater lock
+        fetches; the others follow the snapshot segments it writes, and take
+        over if it exits.
         """
         with self._lock:
             if self._updater_thread and self._updater_thread.is_alive():
@@ -220,23 +1403,57 @@ class StockDataService:
                 
             # Reset stop event
             self._stop_event.clear()
+            self._wakeup.clear()
             
             # Define the updater function
             def updater():
-                logger.info(f"Background updater started with {FETCH_INTERVAL_HOURS} hour interval")
+                logger.info(
+                    f"Background updater started with {self.scheduler.interval_seconds / 60:.0f} minute interval"
+                    f"{' during market hours' if self.scheduler.calendar else ''}, "
+                    f"{self.scheduler.shard_count} shards, {UPDATER_MAX_WORKERS} workers"
+                )
                 
                 while not self._stop_event.is_set():
                     try:
-                        self.update_cache()
+                        self.evict_idle_symbols()
+                    except Exception as e:
+                        logger.error(f"Error evicting idle on-demand symbols: {str(e)}", exc_info=True)
+                    
+                    if not self._take_updater_role():
+                        # Another worker runs the updater; map each segment it writes
+                        try:
+                            self.follow_segment()
+                        except Exception as e:
+                            logger.error(f"Error following segment: {str(e)}", exc_info=True)
+                        self._stop_event.wait(timeout=SEGMENT_POLL_SECONDS)
+                        continue
+                    
+                    try:
+                        if not self._paused:
+                            self.run_due_cycle()
+                        self.maybe_save_snapshot()
                     except Exception as e:
                         logger.error(f"Error in background updater: {str(e)}", exc_info=True)
                         
-                    # Sleep with interruption support
-                    sleep_interval = FETCH_INTERVAL_HOURS * 3600  # Convert hours to seconds
-                    logger.debug(f"Background updater sleeping for {sleep_interval} seconds")
+                    # Sleep until the next shard (or a pending snapshot) comes due, with interruption
+                    # support; the interval can be changed at runtime (see set_refresh_interval)
+                    max_sleep = self.scheduler.interval_seconds
+                    sleep_interval = max_sleep
+                    next_due = None if self._paused else self.scheduler.next_due_time()
+                    if next_due is not None:
+                        sleep_interval = min(sleep_interval, max(MIN_UPDATER_SLEEP_SECONDS, next_due - time.time()))
+                    # With the provider's circuit open, the due symbols wait for the probe
+                    probe_in = self.breaker.seconds_until_probe()
+                    if probe_in > 0:
+                        sleep_interval = max(sleep_interval, min(probe_in, max_sleep))
+                    snapshot_due_in = self._snapshot_due_in()
+                    if snapshot_due_in is not None:
+                        sleep_interval = min(sleep_interval, max(MIN_UPDATER_SLEEP_SECONDS, snapshot_due_in))
+                    logger.debug(f"Background updater sleeping for {sleep_interval:.1f} seconds")
                     
-                    # Wait with timeout allows for clean shutdown
-                    self._stop_event.wait(timeout=sleep_interval)
+                    # Wait with timeout allows for clean shutdown (stopping also sets the wakeup)
+                    self._wakeup.wait(timeout=sleep_interval)
+                    self._wakeup.clear()
                     
                 logger.info("Background updater stopped")
 
@@ -249,24 +1466,268 @@ class StockDataService:
             self._updater_thread.start()
             logger.info("Background database updater thread started")
 
+    def _admin_unavailable(self) -> Optional[Dict[str, Any]]:
+        """
+        Return why this process can't act on the updater, or None if it can.
+        
+        A follower's pause or interval would only change its own idle state (and
+        take effect if it later took over), so admin changes are refused there.
+        """
+        if self._shutdown_event.is_set():
+            return {"status": "shutting_down", "reason": "Service is shutting down"}
+        if self.role == "follower":
+            return {"status": "unavailable", "reason": "Another worker runs the updater"}
+        return None
+
+    def pause_updater(self) -> Dict[str, Any]:
+        """
+        Stop starting scheduled passes; a pass in progress finishes.
+        
+        Triggered refreshes still run. Not persisted: a restart resumes.
+        
+        Returns:
+            Dictionary with "status" "ok", "paused" and whether anything "changed";
+            or a "shutting_down" or "unavailable" status with a "reason"
+        """
+        unavailable = self._admin_unavailable()
+        if unavailable:
+            return unavailable
+        with self._lock:
+            changed = not self._paused
+            self._paused = True
+        if changed:
+            logger.info("Background updater paused")
+        return {"status": "ok", "paused": True, "changed": changed}
+
+    def resume_updater(self) -> Dict[str, Any]:
+        """
+        Resume scheduled passes, starting with any symbols that fell due meanwhile.
+        
+        Returns:
+            Same as pause_updater()
+        """
+        unavailable = self._admin_unavailable()
+        if unavailable:
+            return unavailable
+        with self._lock:
+            changed = self._paused
+            self._paused = False
+        if changed:
+            self._wakeup.set()
+            logger.info("Background updater resumed")
+        return {"status": "ok", "paused": False, "changed": changed}
+
+    def set_refresh_interval(self, minutes: float) -> Dict[str, Any]:
+        """
+        Change the refresh interval at runtime (until restart).
+        
+        Symbols whose next slot under the new interval is sooner are moved up,
+        and the updater recomputes its sleep straight away.
+        
+        Args:
+            minutes: New interval
+        
+        Returns:
+            Dictionary with "status" "ok", the new "interval_seconds" and the
+            number of "symbols_moved_up"; or a "shutting_down" or "unavailable"
+            status with a "reason"
+        
+        Raises:
+            ValueError: If the interval isn't positive
+        """
+        unavailable = self._admin_unavailable()
+        if unavailable:
+            return unavailable
+        moved = self.scheduler.set_interval(minutes * 60)
+        self._wakeup.set()
+        return {"status": "ok", "interval_seconds": self.scheduler.interval_seconds, "symbols_moved_up": moved}
+
+    def trigger_refresh(self, symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Refresh symbols now, whatever their schedule, in the background.
+        
+        Triggers are coalesced: a symbol already waiting for a triggered
+        refresh, or queued or fetching in the pass in progress, is not queued
+        again, and triggered symbols are fetched by one thread in one pass at
+        a time (after any scheduled pass in progress), so repeated triggers
+        can't start overlapping fetches.
+        
+        Args:
+            symbols: Tracked symbols to refresh (default: all of them)
+        
+        Returns:
+            Dictionary with "status" ("started" or "coalesced") and the symbols
+            "queued" and "already_pending"; or "shutting_down" or "unavailable"
+            (another worker runs the updater) with a "reason"
+        
+        Raises:
+            ValueError: If a symbol isn't tracked, or the list is empty
+        """
+        unavailable = self._admin_unavailable()
+        if unavailable:
+            return unavailable
+        
+        if symbols is None:
+            targets = self.scheduler.symbols()
+        else:
+            targets = list(dict.fromkeys(s.strip().upper() for s in symbols if s and s.strip()))
+            if not targets:
+                raise ValueError("symbols must not be empty (omit it to refresh every symbol)")
+            unknown = [s for s in targets if s not in self.scheduler]
+            if unknown:
+                raise ValueError(f"Symbols not tracked: {', '.join(unknown)}")
+        
+        with self._lock:
+            pending = [
+                s for s in targets
+                if s in self._refresh_pending or s in self._refresh_waiting or self.cycles.is_pending(s)
+            ]
+            queued = [s for s in targets if s not in set(pending)]
+            self._refresh_pending.update(queued)
+            self.refresh_triggers += 1
+            started = self._refresh_thread is None and bool(queued)
+            if started:
+                self._refresh_thread = threading.Thread(
+                    target=self._run_triggered_refreshes,
+                    name="TriggeredRefresh",
+                    daemon=True
+                )
+                self._refresh_thread.start()
+            else:
+                self.refresh_coalesced += 1
+        
+        logger.info(f"Refresh triggered for {len(targets)} symbols: {len(queued)} queued, {len(pending)} already pending")
+        return {"status": "started" if started else "coalesced", "queued": queued, "already_pending": pending}
+
+    def _run_triggered_refreshes(self):
+        """Fetch triggered symbols, one batch per pass, until none are left."""
+        try:
+            while not self._shutdown_event.is_set():
+                with self._lock:
+                    batch = sorted(self._refresh_pending)
+                    self._refresh_pending.clear()
+                    self._refresh_waiting = set(batch)
+                if not batch:
+                    return
+                try:
+                    with self._update_lock:
+                        # Shutdown may have begun while a scheduled pass held the lock
+                        if self._shutdown_event.is_set():
+                            return
+                        targets = self.scheduler.claim(batch)
+                        with self._lock:
+                            self._refresh_waiting = set()
+                        if targets:
+                            self._run_pass(targets, trigger="admin")
+                    self.maybe_save_snapshot()
+                except Exception as e:
+                    logger.error(f"Error in triggered refresh: {str(e)}", exc_info=True)
+        finally:
+            with self._lock:
+                self._refresh_waiting = set()
+                self._refresh_thread = None
+
+    def get_updater_state(self) -> Dict[str, Any]:
+        """
+        Return the updater's settings and the pass in progress, symbol by symbol.
+        
+        Returns:
+            Dictionary for the admin API
+        """
+        updater_thread = self._updater_thread
+        with self._lock:
+            triggered = {
+                "running": self._refresh_thread is not None,
+                "pending": sorted(self._refresh_pending),
+                "waiting_for_pass": sorted(self._refresh_waiting),
+                "triggers_total": self.refresh_triggers,
+                "coalesced_total": self.refresh_coalesced
+            }
+            paused = self._paused
+        return {
+            "running": bool(updater_thread and updater_thread.is_alive()),
+            "role": self.role,
+            "paused": paused,
+            "shutting_down": self._shutdown_event.is_set(),
+            "interval_seconds": self.scheduler.interval_seconds,
+            "scheduler": self.scheduler.get_stats(),
+            "cycle": self.cycles.get_stats(),
+            "triggered": triggered
+        }
+
+    def begin_shutdown(self):
+        """
+        Ask the background updater to stop, without waiting for it.
+        
+        Fetches already running finish and are stored and published; symbols
+        not yet started stay due for the next start. Call
+        stop_background_updater() (or shutdown()) to wait.
+        """
+        self._shutdown_event.set()
+        self._stop_event.set()
+        self._wakeup.set()
+
     def stop_background_updater(self):
         """
         Signals the background updater thread to stop and waits for it to finish.
-        Ensures graceful shutdown of background thread.
+        
+        Waits up to UPDATER_STOP_TIMEOUT_SECONDS for the pass in progress to
+        reach a stage boundary: no new fetches start, and the ones running are
+        stored before the thread exits.
         """
         with self._lock:
-            if not self._updater_thread or not self._updater_thread.is_alive():
+            updater_thread = self._updater_thread
+            # A thread that already exited (after begin_shutdown()) still needs its cleanup below
+            if not updater_thread:
                 logger.warning("No active background updater to stop")
                 return
                 
             logger.info("Stopping background updater...")
             self._stop_event.set()
-            
-            # Wait for the thread to finish with timeout
-            self._updater_thread.join(timeout=10.0)
-            
-            if self._updater_thread.is_alive():
-                logger.warning("Background updater did not stop gracefully within timeout")
-            else:
-                logger.info("Background updater stopped successfully")
-                self._updater_thread = None
\ No newline at end of file
+            self._wakeup.set()
+        
+        # Wait for the thread to finish with timeout (outside the lock: the
+        # updater takes it to publish symbols that land during shutdown)
+        updater_thread.join(timeout=UPDATER_STOP_TIMEOUT_SECONDS)
+        
+        if updater_thread.is_alive():
+            logger.warning(f"Background updater did not stop within {UPDATER_STOP_TIMEOUT_SECONDS:.0f}s")
+        else:
+            logger.info("Background updater stopped successfully")
+            with self._lock:
+                self._updater_thread = None
+            # Save what the last passes published so the next start restores it
+            if self.role == "updater":
+                self.maybe_save_snapshot(force=True)
+            self._updater_lock.release()
+
+    def _stop_triggered_refreshes(self):
+        """Wait up to UPDATER_STOP_TIMEOUT_SECONDS for a triggered refresh to reach a stage boundary."""
+        with self._lock:
+            refresh_thread = self._refresh_thread
+        if refresh_thread is None:
+            return
+        refresh_thread.join(timeout=UPDATER_STOP_TIMEOUT_SECONDS)
+        if refresh_thread.is_alive():
+            logger.warning(f"Triggered refresh did not stop within {UPDATER_STOP_TIMEOUT_SECONDS:.0f}s")
+
+    def shutdown(self):
+        """
+        Stop background work and leave the database consistent on disk.
+        
+        Stops the updater and any triggered refresh at a stage boundary, lets
+        running fetches and database reads finish, then checkpoints the WAL.
+        Safe to call more than once.
+        """
+        self.begin_shutdown()
+        self.stop_background_updater()
+        self._stop_triggered_refreshes()
+        with self._lock:
+            pools = [self._executor, self._on_demand_executor]
+            self._executor = self._on_demand_executor = None
+            self._pools_closed = True
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self.db_executor.shutdown()
+        checkpoint_wal()
\ No newline at end of file
@@ -0,0 +1,155 @@
+# fang_service/core/drain.py
+
+import time
+import asyncio
+from typing import Dict, Any, Optional, Set
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# How often a drain checks whether the last request has finished
+DRAIN_POLL_SECONDS = 0.05
+
+class DrainController:
+    """
+    Tracks in-flight requests so shutdown can wait for them.
+
+    Once draining, readiness reports the instance unavailable so load
+    balancers stop routing to it, and `wait_idle` lets shutdown wait for
+    the requests already being served. Requests still running at the drain
+    deadline are cancelled rather than left to hold the process open.
+
+    Used only from the event loop.
+    """
+
+    def __init__(self):
+        """Initialize the controller."""
+        self.draining = False
+        self.started_at: Optional[float] = None
+        self.completed = 0
+        self.cancelled = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def in_flight(self) -> int:
+        """Return how many requests (including open streams) are being served."""
+        return len(self._tasks)
+
+    def begin(self) -> bool:
+        """
+        Start draining.
+
+        Returns:
+            True if this call started it, False if it was already draining
+        """
+        if self.draining:
+            return False
+        self.draining = True
+        self.started_at = time.monotonic()
+        logger.info(f"Draining: {self.in_flight} requests in flight")
+        return True
+
+    def track(self, task: asyncio.Task):
+        """Register the task serving a request."""
+        self._tasks.add(task)
+
+    def untrack(self, task: asyncio.Task):
+        """Deregister a request's task once its response is finished."""
+        if task in self._tasks:
+            self._tasks.discard(task)
+            self.completed += 1
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """
+        Wait for in-flight requests to finish.
+
+        Args:
+            timeout: Longest wait in seconds
+
+        Returns:
+            True if none are left, False if the timeout passed first
+        """
+        deadline = time.monotonic() + timeout
+        while self._tasks and time.monotonic() < deadline:
+            await asyncio.sleep(DRAIN_POLL_SECONDS)
+        return not self._tasks
+
+    def cancel_in_flight(self) -> int:
+        """
+        Cancel every request still being served.
+
+        Returns:
+            Number of requests cancelled
+        """
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        self._tasks.clear()
+        self.cancelled += len(tasks)
+        return len(tasks)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Start draining (if not started) and wait for requests until the deadline.
+
+        The deadline counts from when draining began, so a drain started by a
+        signal and finished at shutdown shares one budget.
+
+        Args:
+            timeout: Seconds after the start of the drain to give up waiting
+
+        Returns:
+            True if every request finished, False if some were cancelled
+        """
+        self.begin()
+        remaining = max(0.0, self.started_at + timeout - time.monotonic())
+        if await self.wait_idle(remaining):
+            return True
+        cancelled = self.cancel_in_flight()
+        logger.warning(f"Drain deadline of {timeout:.0f}s passed; cancelled {cancelled} requests still in flight")
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the drain state for monitoring."""
+        return {
+            "draining": self.draining,
+            "in_flight": self.in_flight,
+            "draining_for_seconds": round(time.monotonic() - self.started_at, 1) if self.draining else None,
+            "completed_requests": self.completed,
+            "cancelled_requests": self.cancelled
+        }
+
+
+class DrainMiddleware:
+    """
+    Registers each HTTP request and WebSocket with a DrainController.
+
+    Add it as the outermost middleware, so the task it registers is the
+    server's own task for the request.
+    """
+
+    def __init__(self, app: ASGIApp, controller: DrainController):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            controller: Controller tracking in-flight requests
+        """
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        self.controller.track(task)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.untrack(task)
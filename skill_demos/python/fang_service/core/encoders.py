@@ -0,0 +1,188 @@
+# fang_service/core/encoders.py
+
+import json
+from typing import Dict, Optional, List, Tuple, Any
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+from fang_service.core.logging_config import get_logger
+from fang_service.core.series import SymbolSeries
+
+logger = get_logger(__name__)
+
+# Response formats and the media types that select them
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+FORMAT_ARROW = "arrow"
+
+MEDIA_TYPES: Dict[str, str] = {
+    FORMAT_JSON: "application/json",
+    FORMAT_MSGPACK: "application/msgpack",
+    FORMAT_ARROW: "application/vnd.apache.arrow.stream",
+}
+
+ACCEPTED_MEDIA_TYPES: Dict[str, str] = {
+    "application/json": FORMAT_JSON,
+    "application/*": FORMAT_JSON,
+    "*/*": FORMAT_JSON,
+    "application/msgpack": FORMAT_MSGPACK,
+    "application/x-msgpack": FORMAT_MSGPACK,
+    "application/vnd.msgpack": FORMAT_MSGPACK,
+    "application/vnd.apache.arrow.stream": FORMAT_ARROW,
+}
+
+# Same output as FastAPI's JSONResponse.render, built once instead of per call
+JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode plain JSON-compatible data (dicts, lists, str, numbers) to bytes.
+
+    Skips FastAPI's jsonable_encoder and response-model validation; only use
+    it for data we built ourselves.
+
+    Args:
+        content: Data to encode
+
+    Returns:
+        UTF-8 JSON bytes
+    """
+    return JSON_ENCODER.encode(content).encode("utf-8")
+
+def available_formats() -> List[str]:
+    """Return the response formats this installation can produce."""
+    formats = [FORMAT_JSON]
+    if MSGPACK_AVAILABLE:
+        formats.append(FORMAT_MSGPACK)
+    if ARROW_AVAILABLE:
+        formats.append(FORMAT_ARROW)
+    return formats
+
+def negotiate_format(accept: Optional[str]) -> Optional[str]:
+    """
+    Pick a response format from an Accept header.
+
+    The highest-q media type we can produce wins; ties go to the type listed
+    first. A missing or empty header means JSON.
+
+    Args:
+        accept: Accept header value
+
+    Returns:
+        The chosen format, or None if nothing acceptable can be produced
+    """
+    if not accept or not accept.strip():
+        return FORMAT_JSON
+
+    candidates: List[Tuple[float, int, str]] = []
+    for position, part in enumerate(accept.split(",")):
+        fields = [f.strip() for f in part.split(";")]
+        media_type = fields[0].lower()
+        quality = 1.0
+        for param in fields[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        fmt = ACCEPTED_MEDIA_TYPES.get(media_type)
+        if fmt and quality > 0 and fmt in available_formats():
+            candidates.append((-quality, position, fmt))
+
+    return min(candidates)[2] if candidates else None
+
+def encode_msgpack(series_by_symbol: Dict[str, SymbolSeries], interval: str) -> bytes:
+    """
+    Encode series as columnar MessagePack.
+
+    Layout: {"interval": str, "symbols": {SYMBOL: {"timestamp": [int epoch seconds],
+    "open"/"high"/"low"/"close": [float64], "volume": [int]}}}, oldest bar first.
+
+    Args:
+        series_by_symbol: Series keyed by symbol
+        interval: Bar interval of the series
+
+    Returns:
+        Encoded payload
+
+    Raises:
+        RuntimeError: If msgpack is not installed
+    """
+    if not MSGPACK_AVAILABLE:
+        raise RuntimeError("msgpack is not installed")
+
+    return msgpack.packb({
+        "interval": interval,
+        "symbols": {
+            symbol: {
+                "timestamp": series.timestamps.tolist(),
+                "open": series.open.tolist(),
+                "high": series.high.tolist(),
+                "low": series.low.tolist(),
+                "close": series.close.tolist(),
+                "volume": series.volume.tolist(),
+            }
+            for symbol, series in series_by_symbol.items()
+        }
+    }, use_single_float=False)
+
+def encode_arrow(series_by_symbol: Dict[str, SymbolSeries], interval: str) -> bytes:
+    """
+    Encode series as an Arrow IPC stream.
+
+    One record batch per symbol, all sharing the schema (symbol: string,
+    timestamp: timestamp[s], open/high/low/close: float64, volume: int64),
+    oldest bar first. The interval is stored in the schema metadata.
+
+    Args:
+        series_by_symbol: Series keyed by symbol
+        interval: Bar interval of the series
+
+    Returns:
+        Encoded payload
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is not installed")
+
+    schema = pa.schema([
+        ("symbol", pa.string()),
+        ("timestamp", pa.timestamp("s")),
+        ("open", pa.float64()),
+        ("high", pa.float64()),
+        ("low", pa.float64()),
+        ("close", pa.float64()),
+        ("volume", pa.int64()),
+    ], metadata={"interval": interval})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for symbol, series in series_by_symbol.items():
+            # Numeric columns are handed to Arrow without copying through Python objects
+            writer.write_batch(pa.record_batch([
+                pa.repeat(pa.scalar(symbol, pa.string()), len(series)),
+                pa.array(series.timestamps, pa.timestamp("s")),
+                pa.array(series.open),
+                pa.array(series.high),
+                pa.array(series.low),
+                pa.array(series.close),
+                pa.array(series.volume),
+            ], schema=schema))
+    return sink.getvalue().to_pybytes()
+
+ENCODERS = {
+    FORMAT_MSGPACK: encode_msgpack,
+    FORMAT_ARROW: encode_arrow,
+}
@@ -41,4 +41,22 @@ class DataNotFoundError(APIError):
     """Error raised when requested data is not found."""
     
     def __init__(self, message: str = "Data not found", details: Optional[Dict[str, Any]] = None):
-        super().__init__(message, 404, details)
\ No newline at end of file
+        super().__init__(message, 404, details)
+
+class CircuitOpenError(APIError):
+    """Error raised when a call is refused because the provider's circuit is open."""
+    
+    def __init__(self, message: str = "Provider circuit open", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, 503, details)
+
+class DeadlineExceededError(APIError):
+    """Error raised when a request's time budget runs out before it completes."""
+    
+    def __init__(self, message: str = "Deadline exceeded", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, 504, details)
+
+class FetchCancelledError(DeadlineExceededError):
+    """Error raised when a fetch is cancelled (e.g. at shutdown); handled like a spent deadline."""
+    
+    def __init__(self, message: str = "Fetch cancelled", details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, details)
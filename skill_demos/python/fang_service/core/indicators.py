@@ -0,0 +1,206 @@
+# fang_service/core/indicators.py
+
+from typing import Dict, Callable, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from fang_service.core.logging_config import get_logger
+from fang_service.core.series import SymbolSeries
+
+logger = get_logger(__name__)
+
+# Longest block for the closed-form EMA; keeps decay factors well inside float64 range
+EMA_MAX_GROWTH = 1e12
+SECONDS_PER_DAY = 86400
+
+def _pad(values: np.ndarray, length: int) -> np.ndarray:
+    """Left-pad a windowed result with NaN so it lines up with the input."""
+    out = np.full(length, np.nan)
+    if len(values):
+        out[length - len(values):] = values
+    return out
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple moving average via a cumulative sum (O(n)).
+
+    Args:
+        values: Input series
+        window: Number of bars averaged
+
+    Returns:
+        Array aligned with `values`; the first window-1 entries are NaN
+    """
+    if len(values) < window:
+        return np.full(len(values), np.nan)
+    csum = np.cumsum(np.insert(values.astype(np.float64), 0, 0.0))
+    return _pad((csum[window:] - csum[:-window]) / window, len(values))
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Exponential moving average with alpha = 2 / (span + 1), seeded with the first value.
+
+    The recurrence y[t] = w*y[t-1] + a*x[t] is solved in closed form per block:
+    y[t] = w^t * (y0 + a * sum_k x[k] / w^k), with blocks short enough that
+    1/w^k stays within EMA_MAX_GROWTH so the cumulative sum keeps its precision.
+
+    Args:
+        values: Input series
+        span: EMA span in bars
+
+    Returns:
+        Array aligned with `values`
+    """
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    x = values.astype(np.float64)
+    block = n if decay == 0 else max(1, int(np.log(EMA_MAX_GROWTH) / -np.log(decay)))
+
+    prev = x[0]
+    for start in range(0, n, block):
+        chunk = x[start:start + block]
+        k = np.arange(1, len(chunk) + 1)
+        powers = decay ** k
+        out[start:start + len(chunk)] = powers * (prev + alpha * np.cumsum(chunk / powers))
+        prev = out[start + len(chunk) - 1]
+    return out
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Rolling sample standard deviation (ddof=1).
+
+    Args:
+        values: Input series
+        window: Window length in bars (>= 2)
+
+    Returns:
+        Array aligned with `values`; the first window-1 entries are NaN
+    """
+    if len(values) < window:
+        return np.full(len(values), np.nan)
+    windows = sliding_window_view(values.astype(np.float64), window)
+    return _pad(windows.std(axis=1, ddof=1), len(values))
+
+def pct_change(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """
+    Percent change over `periods` bars, as a percentage.
+
+    Args:
+        values: Input series
+        periods: Lookback in bars
+
+    Returns:
+        Array aligned with `values`; the first `periods` entries are NaN
+    """
+    x = values.astype(np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) > periods:
+        prior = x[:-periods]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[periods:] = np.where(prior != 0, (x[periods:] - prior) / prior * 100.0, np.nan)
+    return out
+
+def channel(high: np.ndarray, low: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Donchian-style high/low channel: rolling max of highs and min of lows.
+
+    Args:
+        high: High prices
+        low: Low prices
+        window: Window length in bars
+
+    Returns:
+        Tuple of (upper, lower) arrays aligned with the input
+    """
+    n = len(high)
+    if n < window:
+        return np.full(n, np.nan), np.full(n, np.nan)
+    upper = sliding_window_view(high, window).max(axis=1)
+    lower = sliding_window_view(low, window).min(axis=1)
+    return _pad(upper, n), _pad(lower, n)
+
+def vwap(series: SymbolSeries) -> np.ndarray:
+    """
+    Volume-weighted average price of the typical price (H+L+C)/3, reset each day.
+
+    Args:
+        series: Source series
+
+    Returns:
+        Array aligned with the series; NaN where the day has no volume yet
+    """
+    n = len(series)
+    if n == 0:
+        return np.empty(0)
+
+    typical = (series.high + series.low + series.close) / 3.0
+    volume = series.volume.astype(np.float64)
+    cum_pv = np.cumsum(typical * volume)
+    cum_v = np.cumsum(volume)
+
+    # Subtract the running totals at the start of each day
+    days = series.timestamps // SECONDS_PER_DAY
+    day_start = np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1])))
+    run_lengths = np.diff(np.append(day_start, n))
+    base_pv = np.repeat(np.concatenate(([0.0], cum_pv))[day_start], run_lengths)
+    base_v = np.repeat(np.concatenate(([0.0], cum_v))[day_start], run_lengths)
+
+    day_v = cum_v - base_v
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(day_v > 0, (cum_pv - base_pv) / day_v, np.nan)
+
+
+# Registry: name -> (parameters it uses, function(series, window, periods) -> {output: values})
+INDICATORS: Dict[str, Tuple[Tuple[str, ...], Callable[[SymbolSeries, int, int], Dict[str, np.ndarray]]]] = {
+    "sma": (("window",), lambda s, window, periods: {"sma": sma(s.close, window)}),
+    "ema": (("window",), lambda s, window, periods: {"ema": ema(s.close, window)}),
+    "vwap": ((), lambda s, window, periods: {"vwap": vwap(s)}),
+    "stddev": (("window",), lambda s, window, periods: {"stddev": rolling_std(s.close, window)}),
+    "pct_change": (("periods",), lambda s, window, periods: {"pct_change": pct_change(s.close, periods)}),
+    "channel": (("window",), lambda s, window, periods: dict(zip(("upper", "lower"), channel(s.high, s.low, window)))),
+}
+
+def compute_indicator(name: str, series: SymbolSeries, window: int = 20, periods: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Compute a named indicator over a series.
+
+    Args:
+        name: Indicator name (see INDICATORS)
+        series: Source series
+        window: Window/span for windowed indicators
+        periods: Lookback for pct_change
+
+    Returns:
+        Dictionary of output name to values aligned with the series
+
+    Raises:
+        ValueError: For an unknown indicator or invalid parameters
+    """
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name}. Expected one of: {', '.join(INDICATORS)}")
+    if window < 2:
+        raise ValueError(f"window must be at least 2, got: {window}")
+    if periods < 1:
+        raise ValueError(f"periods must be at least 1, got: {periods}")
+
+    _, func = INDICATORS[name]
+    return func(series, window, periods)
+
+def indicator_params(name: str, window: int, periods: int) -> Tuple[Tuple[str, int], ...]:
+    """
+    Return only the parameters an indicator actually uses (for cache keys and responses).
+
+    Raises:
+        ValueError: For an unknown indicator
+    """
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name}. Expected one of: {', '.join(INDICATORS)}")
+    used, _ = INDICATORS[name]
+    values = {"window": window, "periods": periods}
+    return tuple((param, values[param]) for param in used)
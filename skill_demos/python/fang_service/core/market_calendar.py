@@ -0,0 +1,200 @@
+# fang_service/core/market_calendar.py
+
+import os
+import time
+import datetime
+from typing import Dict, Any, Optional
+from zoneinfo import ZoneInfo
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# How far ahead next_open() looks before giving up (covers any run of holidays)
+MAX_LOOKAHEAD_DAYS = 14
+
+SESSION_PRE = "pre"
+SESSION_REGULAR = "regular"
+SESSION_POST = "post"
+SESSION_CLOSED = "closed"
+
+def load_holidays(path: Optional[str]) -> Dict[datetime.date, Optional[datetime.time]]:
+    """
+    Load an exchange holiday file.
+
+    One date per line: `YYYY-MM-DD` for a full closure, or `YYYY-MM-DD HH:MM` for an
+    early close of the regular session at that local time. Blank lines and
+    `#` comments are ignored.
+
+    Args:
+        path: Holiday file (None or missing means no holidays)
+
+    Returns:
+        Dictionary of date to early-close time (None for a full closure)
+    """
+    holidays: Dict[datetime.date, Optional[datetime.time]] = {}
+    if not path:
+        return holidays
+    if not os.path.exists(path):
+        logger.warning(f"Market holiday file {path} not found; assuming no holidays")
+        return holidays
+
+    with open(path, "r") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            try:
+                parts = line.split()
+                day = datetime.date.fromisoformat(parts[0])
+                early_close = datetime.time.fromisoformat(parts[1]) if len(parts) > 1 else None
+            except ValueError:
+                logger.warning(f"Ignoring malformed line {line_number} in {path}: {line!r}")
+                continue
+            holidays[day] = early_close
+    return holidays
+
+
+class MarketCalendar:
+    """
+    Trading sessions of one exchange, in its local time.
+
+    Weekdays have a regular session and, with `extended_hours`, the pre- and
+    post-market sessions around it. Holidays close the exchange all day; early
+    closes end the regular session early and the post-market session the same
+    amount of time after it.
+    """
+
+    def __init__(
+        self,
+        timezone: str = "America/New_York",
+        holidays: Optional[Dict[datetime.date, Optional[datetime.time]]] = None,
+        extended_hours: bool = True,
+        regular_open: datetime.time = datetime.time(9, 30),
+        regular_close: datetime.time = datetime.time(16, 0),
+        pre_market_open: datetime.time = datetime.time(4, 0),
+        post_market_close: datetime.time = datetime.time(20, 0)
+    ):
+        """
+        Initialize the calendar.
+
+        Args:
+            timezone: IANA timezone of the exchange
+            holidays: Date to early-close time (None for a full closure), see load_holidays()
+            extended_hours: Whether pre- and post-market count as open
+            regular_open: Local start of the regular session
+            regular_close: Local end of the regular session
+            pre_market_open: Local start of pre-market trading
+            post_market_close: Local end of post-market trading
+        """
+        self.timezone = ZoneInfo(timezone)
+        self.holidays = holidays or {}
+        self.extended_hours = extended_hours
+        self.regular_open = regular_open
+        self.regular_close = regular_close
+        self.pre_market_open = pre_market_open
+        self.post_market_close = post_market_close
+
+    def _at(self, day: datetime.date, local_time: datetime.time) -> float:
+        return datetime.datetime.combine(day, local_time, tzinfo=self.timezone).timestamp()
+
+    def _day_sessions(self, day: datetime.date) -> Optional[Dict[str, float]]:
+        """Return the day's session boundaries as epoch seconds, or None if it's closed."""
+        if day.weekday() >= 5 or (day in self.holidays and self.holidays[day] is None):
+            return None
+
+        regular_close = self._at(day, self.holidays.get(day) or self.regular_close)
+        post_close = regular_close + self._at(day, self.post_market_close) - self._at(day, self.regular_close)
+        return {
+            "pre_open": self._at(day, self.pre_market_open),
+            "regular_open": self._at(day, self.regular_open),
+            "regular_close": regular_close,
+            "post_close": post_close
+        }
+
+    def session(self, when: Optional[float] = None) -> str:
+        """
+        Return the session in progress at a moment.
+
+        Args:
+            when: Epoch seconds (default: now)
+
+        Returns:
+            "pre", "regular", "post" or "closed" (pre and post only with extended hours)
+        """
+        when = time.time() if when is None else when
+        day = datetime.datetime.fromtimestamp(when, self.timezone).date()
+        sessions = self._day_sessions(day)
+        if sessions is None:
+            return SESSION_CLOSED
+        if sessions["regular_open"] <= when < sessions["regular_close"]:
+            return SESSION_REGULAR
+        if self.extended_hours:
+            if sessions["pre_open"] <= when < sessions["regular_open"]:
+                return SESSION_PRE
+            if sessions["regular_close"] <= when < sessions["post_close"]:
+                return SESSION_POST
+        return SESSION_CLOSED
+
+    def is_open(self, when: Optional[float] = None) -> bool:
+        """Return True if any tracked session is in progress at a moment."""
+        return self.session(when) != SESSION_CLOSED
+
+    def session_start(self, when: Optional[float] = None) -> Optional[float]:
+        """
+        Return when the trading day in progress opened.
+
+        Args:
+            when: Epoch seconds (default: now)
+
+        Returns:
+            Epoch seconds of the day's first tracked session start, or None if closed
+        """
+        when = time.time() if when is None else when
+        if not self.is_open(when):
+            return None
+        sessions = self._day_sessions(datetime.datetime.fromtimestamp(when, self.timezone).date())
+        return sessions["pre_open"] if self.extended_hours else sessions["regular_open"]
+
+    def next_open(self, when: Optional[float] = None) -> float:
+        """
+        Return the first moment at or after `when` that the market is open.
+
+        Args:
+            when: Epoch seconds (default: now)
+
+        Returns:
+            `when` itself if the market is open then, otherwise the next session start
+            (or `when` if no session starts within MAX_LOOKAHEAD_DAYS, i.e. a
+            calendar that never opens doesn't stop refreshes altogether)
+        """
+        when = time.time() if when is None else when
+        day = datetime.datetime.fromtimestamp(when, self.timezone).date()
+        for offset in range(MAX_LOOKAHEAD_DAYS):
+            sessions = self._day_sessions(day + datetime.timedelta(days=offset))
+            if sessions is None:
+                continue
+            start = sessions["pre_open"] if self.extended_hours else sessions["regular_open"]
+            end = sessions["post_close"] if self.extended_hours else sessions["regular_close"]
+            if when < end:
+                return max(when, start)
+        logger.warning(f"No market session within {MAX_LOOKAHEAD_DAYS} days; check the holiday calendar")
+        return when
+
+    def get_stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get the current market state for monitoring.
+
+        Returns:
+            Dictionary with the current session, how long the market has been
+            open and seconds until the next open
+        """
+        now = time.time() if now is None else now
+        opened = self.session_start(now)
+        return {
+            "timezone": str(self.timezone),
+            "session": self.session(now),
+            "extended_hours": self.extended_hours,
+            "open_for_seconds": round(now - opened, 1) if opened is not None else None,
+            "next_open_in_seconds": round(self.next_open(now) - now, 1)
+        }
@@ -0,0 +1,117 @@
+# fang_service/core/on_demand.py
+
+import re
+import time
+import threading
+from typing import Dict, Any, List, Optional
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Ticker-like symbols only: anything else is never sent upstream
+SYMBOL_PATTERN = re.compile(r"^[A-Z][A-Z0-9.\-]{0,9}$")
+
+def valid_symbol(symbol: str) -> bool:
+    """Return True if the symbol looks like a ticker we could fetch."""
+    return bool(SYMBOL_PATTERN.match(symbol))
+
+
+class OnDemandTracker:
+    """
+    Symbols added to the refresh rotation because clients asked for them.
+
+    Tracks when each was last requested so idle ones can be evicted, caps how
+    many there can be, and remembers symbols whose fetch failed so repeated
+    requests for a bad symbol don't each cost an upstream call.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, max_symbols: int, idle_ttl_seconds: float, failure_ttl_seconds: float):
+        """
+        Initialize the tracker.
+
+        Args:
+            max_symbols: Maximum on-demand symbols at once
+            idle_ttl_seconds: Evict a symbol not requested for this long
+            failure_ttl_seconds: Refuse to retry a failed symbol for this long
+        """
+        self.max_symbols = max_symbols
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.failure_ttl_seconds = failure_ttl_seconds
+        self.added_total = 0
+        self.evicted_total = 0
+        self._last_requested: Dict[str, float] = {}
+        self._failed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._last_requested
+
+    def add(self, symbol: str) -> bool:
+        """
+        Start tracking a symbol.
+
+        Returns:
+            False if the symbol recently failed or the cap is reached
+        """
+        now = time.time()
+        with self._lock:
+            if symbol in self._last_requested:
+                return True
+            if self._failed.get(symbol, 0) > now:
+                return False
+            if len(self._last_requested) >= self.max_symbols:
+                logger.warning(f"On-demand symbol limit ({self.max_symbols}) reached; not adding {symbol}")
+                return False
+            self._last_requested[symbol] = now
+            self.added_total += 1
+            return True
+
+    def touch(self, symbol: str):
+        """Record a request for a symbol (ignored unless it is tracked on demand)."""
+        if symbol in self._last_requested:
+            self._last_requested[symbol] = time.time()
+
+    def fail(self, symbol: str):
+        """Stop tracking a symbol whose fetch failed and refuse it for a while."""
+        with self._lock:
+            self._last_requested.pop(symbol, None)
+            self._failed[symbol] = time.time() + self.failure_ttl_seconds
+            # Forget expired failures so scanners can't grow this without bound
+            if len(self._failed) > self.max_symbols * 10:
+                now = time.time()
+                self._failed = {s: t for s, t in self._failed.items() if t > now}
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """
+        Stop tracking symbols nobody has requested within the idle TTL.
+
+        Returns:
+            The evicted symbols
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            idle = [s for s, t in self._last_requested.items() if now - t > self.idle_ttl_seconds]
+            for symbol in idle:
+                del self._last_requested[symbol]
+            self.evicted_total += len(idle)
+        return idle
+
+    def symbols(self) -> List[str]:
+        """Return the symbols currently tracked on demand."""
+        with self._lock:
+            return list(self._last_requested)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return tracker counts for monitoring."""
+        now = time.time()
+        with self._lock:
+            return {
+                "symbols": len(self._last_requested),
+                "max_symbols": self.max_symbols,
+                "added_total": self.added_total,
+                "evicted_total": self.evicted_total,
+                "recently_failed": sum(1 for t in self._failed.values() if t > now)
+            }
@@ -0,0 +1,19 @@
+# fang_service/core/providers/alpha_vantage.py
+
+import threading
+from typing import Dict, Optional
+
+from fang_service.core.data_fetcher import fetch_intraday_data
+from fang_service.core.providers.base import MarketDataProvider, normalize_bars
+from fang_service.core.providers.quota import QuotaTracker
+
+class AlphaVantageProvider(MarketDataProvider):
+    """Alpha Vantage TIME_SERIES_INTRADAY (see core.data_fetcher for the wire format)."""
+
+    def __init__(self, quota: Optional[QuotaTracker] = None, cancel: Optional[threading.Event] = None):
+        super().__init__("alphavantage", quota, cancel)
+
+    def fetch_bars(
+        self, symbol: str, interval: str, deadline: Optional[float] = None
+    ) -> Dict[str, Dict[str, str]]:
+        return normalize_bars(symbol, fetch_intraday_data(symbol, interval=interval, deadline=deadline, cancel=self.cancel))
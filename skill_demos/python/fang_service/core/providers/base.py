@@ -0,0 +1,114 @@
+# fang_service/core/providers/base.py
+
+import datetime
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
+from fang_service.core.logging_config import get_logger
+from fang_service.core.exceptions import (
+    RateLimitError, NetworkError, DataRetrievalError, AuthenticationError
+)
+from fang_service.core.providers.quota import QuotaTracker
+
+logger = get_logger(__name__)
+
+# Bars are stored and served in one shape whatever their source: a dict keyed by
+# "YYYY-MM-DD HH:MM:SS" (bar start, exchange time) of these string fields
+BAR_FIELDS = ("1. open", "2. high", "3. low", "4. close", "5. volume")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def make_bar(open: float, high: float, low: float, close: float, volume: int) -> Dict[str, str]:
+    """Build one bar in the internal representation."""
+    return {
+        "1. open": str(float(open)),
+        "2. high": str(float(high)),
+        "3. low": str(float(low)),
+        "4. close": str(float(close)),
+        "5. volume": str(int(volume))
+    }
+
+def normalize_bars(symbol: str, bars: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """
+    Validate provider bars and convert them to the internal representation.
+
+    Bars with an unparseable timestamp or a missing or non-numeric field are
+    dropped with a warning rather than failing the whole symbol.
+
+    Args:
+        symbol: Stock symbol (for logging)
+        bars: Dictionary of bars keyed by timestamp, fields as in BAR_FIELDS
+
+    Returns:
+        Dictionary of normalized bars keyed by timestamp
+    """
+    normalized = {}
+    dropped = 0
+    for timestamp, values in bars.items():
+        try:
+            datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+            normalized[timestamp] = make_bar(*(float(values[field]) for field in BAR_FIELDS))
+        except (KeyError, ValueError, TypeError):
+            dropped += 1
+    if dropped:
+        logger.warning(f"Dropped {dropped} malformed bars for {symbol}")
+    return normalized
+
+def is_provider_failure(error: Exception) -> bool:
+    """
+    Return True if a fetch error says the provider is unhealthy rather than the symbol.
+
+    Network errors, rate limits and HTTP error statuses affect every symbol.
+    An "Invalid API call" for one symbol (e.g. delisted) or a malformed
+    payload only affects that symbol.
+    """
+    if isinstance(error, (NetworkError, RateLimitError)):
+        return True
+    return isinstance(error, (AuthenticationError, DataRetrievalError)) and "status_code" in error.details
+
+
+class MarketDataProvider(ABC):
+    """
+    A source of intraday bars.
+
+    Implementations fetch one symbol at one interval and return bars in the
+    internal representation (see normalize_bars), raising the exceptions in
+    core.exceptions on failure so callers can tell provider failures from
+    symbol failures (see is_provider_failure).
+    """
+
+    def __init__(
+        self, name: str, quota: Optional[QuotaTracker] = None, cancel: Optional[threading.Event] = None
+    ):
+        """
+        Initialize the provider.
+
+        Args:
+            name: Provider name for logs and stats
+            quota: Call accounting (default: unlimited)
+            cancel: Cancellation token; once set, retry backoffs and other waits
+                end early with FetchCancelledError (default: none)
+        """
+        self.name = name
+        self.quota = quota or QuotaTracker()
+        self.cancel = cancel
+
+    @abstractmethod
+    def fetch_bars(
+        self, symbol: str, interval: str, deadline: Optional[float] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Fetch a symbol's recent bars.
+
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval (e.g. 60min)
+            deadline: time.monotonic() by which to give up (default: none)
+
+        Returns:
+            Dictionary of normalized bars keyed by timestamp
+
+        Raises:
+            RateLimitError, NetworkError, AuthenticationError, DataRetrievalError,
+            DeadlineExceededError (FetchCancelledError once `cancel` is set)
+        """
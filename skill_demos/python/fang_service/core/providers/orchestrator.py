@@ -0,0 +1,362 @@
+# fang_service/core/providers/orchestrator.py
+
+import time
+import collections
+import concurrent.futures
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from fang_service.app_variables import (
+    MARKET_DATA_PROVIDERS, PROVIDER_HEDGE_AFTER_MS, PROVIDER_RATE_LIMIT_COOLDOWN_SECONDS,
+    PROVIDER_HEDGE_PERCENTILE, PROVIDER_HEDGE_MIN_MS,
+    ALPHAVANTAGE_CALLS_PER_MINUTE, ALPHAVANTAGE_CALLS_PER_DAY,
+    REPLAY_PATH, REPLAY_REBASE, REPLAY_LATENCY_MS
+)
+from fang_service.core.logging_config import get_logger
+from fang_service.core.exceptions import RateLimitError, DeadlineExceededError, FetchCancelledError
+from fang_service.core.providers.base import MarketDataProvider, is_provider_failure
+from fang_service.core.providers.alpha_vantage import AlphaVantageProvider
+from fang_service.core.providers.replay import ReplayProvider
+from fang_service.core.providers.quota import QuotaTracker
+
+logger = get_logger(__name__)
+
+# Successful call durations kept per provider for the latency percentiles
+LATENCY_WINDOW = 200
+
+# Samples needed before a percentile hedge delay is trusted
+MIN_LATENCY_SAMPLES = 20
+
+def create_provider(name: str, cancel: Optional[threading.Event] = None) -> MarketDataProvider:
+    """
+    Build a provider from its configured name.
+
+    Args:
+        name: "alphavantage" or "replay"
+        cancel: Cancellation token for the provider's waits (default: none)
+
+    Returns:
+        The provider
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == "alphavantage":
+        return AlphaVantageProvider(QuotaTracker(ALPHAVANTAGE_CALLS_PER_MINUTE, ALPHAVANTAGE_CALLS_PER_DAY), cancel)
+    if name == "replay":
+        return ReplayProvider(
+            REPLAY_PATH, rebase=REPLAY_REBASE, latency_seconds=REPLAY_LATENCY_MS / 1000, cancel=cancel
+        )
+    raise ValueError(f"Unknown market data provider: {name}. Expected one of: alphavantage, replay")
+
+
+class LatencyTracker:
+    """
+    Rolling window of a provider's successful call durations.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: collections.deque = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        """Record one call's duration."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Return a percentile of the recorded durations.
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            Seconds, or None if nothing was recorded
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * pct / 100))
+        return samples[index]
+
+
+class FetchOrchestrator:
+    """
+    Fetches bars from an ordered list of providers.
+
+    Failover: providers are tried in order. One that is out of quota, rate
+    limited or failing (see is_provider_failure) is skipped for the next; a
+    provider that answers for the symbol decides the outcome. A provider that
+    reports a rate limit is blocked for `rate_limit_cooldown_seconds`.
+
+    Hedging: if the current provider hasn't answered within the hedge delay,
+    the next one is started as well, and the first successful answer wins. The
+    delay is `hedge_after_seconds`, or with `hedge_percentile` that percentile
+    of the provider's recent latency (no shorter than `hedge_min_seconds`), so
+    only the slow tail is hedged. With a single provider the hedge is a second
+    request to the same one. The slower call still completes in the background
+    and counts against its provider's quota.
+
+    Deadlines: fetch() takes an optional time.monotonic() deadline, passed on
+    to the providers; when it passes, DeadlineExceededError is raised without
+    failing over (the budget is spent, not the provider). A provider built
+    with a cancellation token (see from_config) raises FetchCancelledError,
+    a DeadlineExceededError, once it is set, so it is handled the same way.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        providers: List[MarketDataProvider],
+        hedge_after_seconds: float = 0.0,
+        rate_limit_cooldown_seconds: float = 60.0,
+        hedge_percentile: float = 0.0,
+        hedge_min_seconds: float = 0.25
+    ):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            providers: Providers in priority order
+            hedge_after_seconds: Start the next provider after this long (0 disables hedging)
+            rate_limit_cooldown_seconds: How long a rate-limited provider is skipped
+            hedge_percentile: Hedge at this latency percentile instead (0 disables;
+                `hedge_after_seconds` applies until enough calls were timed)
+            hedge_min_seconds: Shortest percentile-based hedge delay
+        """
+        if not providers:
+            raise ValueError("At least one market data provider is required")
+        self.providers = providers
+        self.hedge_after_seconds = hedge_after_seconds
+        self.rate_limit_cooldown_seconds = rate_limit_cooldown_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_seconds = hedge_min_seconds
+        self.hedged = 0
+        self.deadlines_exceeded = 0
+        self._latency = {p.name: LatencyTracker() for p in providers}
+        self._stats: Dict[str, Dict[str, int]] = {
+            p.name: {"calls": 0, "successes": 0, "failures": 0, "rate_limited": 0, "skipped": 0}
+            for p in providers
+        }
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cancel: Optional[threading.Event] = None) -> "FetchOrchestrator":
+        """
+        Build the orchestrator from MARKET_DATA_PROVIDERS and the hedging settings.
+
+        Args:
+            cancel: Cancellation token shared by the providers (default: none)
+        """
+        return cls(
+            [create_provider(name, cancel) for name in MARKET_DATA_PROVIDERS],
+            hedge_after_seconds=PROVIDER_HEDGE_AFTER_MS / 1000,
+            rate_limit_cooldown_seconds=PROVIDER_RATE_LIMIT_COOLDOWN_SECONDS,
+            hedge_percentile=PROVIDER_HEDGE_PERCENTILE,
+            hedge_min_seconds=PROVIDER_HEDGE_MIN_MS / 1000
+        )
+
+    def _count(self, provider: MarketDataProvider, outcome: str):
+        with self._lock:
+            self._stats[provider.name][outcome] += 1
+
+    def _call(
+        self, provider: MarketDataProvider, symbol: str, interval: str, deadline: Optional[float]
+    ) -> Dict[str, Dict[str, str]]:
+        """Call one provider, recording the outcome."""
+        self._count(provider, "calls")
+        started = time.monotonic()
+        try:
+            bars = provider.fetch_bars(symbol, interval, deadline=deadline)
+        except RateLimitError:
+            self._count(provider, "rate_limited")
+            provider.quota.block(self.rate_limit_cooldown_seconds)
+            raise
+        except FetchCancelledError:
+            raise
+        except DeadlineExceededError:
+            with self._lock:
+                self.deadlines_exceeded += 1
+            raise
+        except Exception:
+            self._count(provider, "failures")
+            raise
+        self._latency[provider.name].record(time.monotonic() - started)
+        self._count(provider, "successes")
+        return bars
+
+    def hedge_delay(self, provider: MarketDataProvider) -> float:
+        """
+        Return how long to wait on a provider before hedging.
+
+        Returns:
+            Seconds (0 means don't hedge)
+        """
+        latency = self._latency[provider.name]
+        if self.hedge_percentile > 0 and len(latency) >= MIN_LATENCY_SAMPLES:
+            return max(self.hedge_min_seconds, latency.percentile(self.hedge_percentile))
+        return self.hedge_after_seconds
+
+    def _next_provider(self, remaining: List[MarketDataProvider]) -> Optional[MarketDataProvider]:
+        """Pop providers until one has quota left."""
+        while remaining:
+            provider = remaining.pop(0)
+            if provider.quota.try_acquire():
+                return provider
+            self._count(provider, "skipped")
+        return None
+
+    @staticmethod
+    def _final_error(symbol: str, errors: List[Tuple[MarketDataProvider, Exception]]) -> Exception:
+        """Pick the error to raise when no provider succeeded."""
+        # A spent deadline, then a provider that answered for the symbol, knows best
+        for _, error in errors:
+            if isinstance(error, DeadlineExceededError):
+                return error
+        for _, error in errors:
+            if not is_provider_failure(error):
+                return error
+        if errors:
+            return errors[0][1]
+        return RateLimitError(
+            message=f"All market data providers are out of quota; not fetching {symbol}",
+            details={"symbol": symbol}
+        )
+
+    def fetch(self, symbol: str, interval: str, deadline: Optional[float] = None) -> Dict[str, Dict[str, str]]:
+        """
+        Fetch a symbol's bars from the first provider that can supply them.
+
+        Args:
+            symbol: Stock symbol
+            interval: Bar interval
+            deadline: time.monotonic() by which to give up (default: none)
+
+        Returns:
+            Dictionary of normalized bars keyed by timestamp
+
+        Raises:
+            The deciding provider's error if none succeeded (RateLimitError if
+            every provider was out of quota, DeadlineExceededError if the
+            deadline passed)
+        """
+        if self.hedge_after_seconds > 0 or self.hedge_percentile > 0:
+            return self._fetch_hedged(symbol, interval, deadline)
+
+        remaining = list(self.providers)
+        errors: List[Tuple[MarketDataProvider, Exception]] = []
+        while True:
+            provider = self._next_provider(remaining)
+            if provider is None:
+                raise self._final_error(symbol, errors)
+            try:
+                return self._call(provider, symbol, interval, deadline)
+            except Exception as e:
+                errors.append((provider, e))
+                if not is_provider_failure(e):
+                    raise
+                if remaining:
+                    logger.warning(f"{provider.name} failed for {symbol} ({e}); failing over")
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(4, len(self.providers) * 4),
+                    thread_name_prefix="ProviderFetch"
+                )
+            return self._executor
+
+    def _fetch_hedged(self, symbol: str, interval: str, deadline: Optional[float]) -> Dict[str, Dict[str, str]]:
+        """Fetch with hedged requests: start the next provider when the current one is slow or fails as a provider."""
+        executor = self._get_executor()
+        # A lone provider is hedged with a duplicate request to itself
+        remaining = list(self.providers) if len(self.providers) > 1 else self.providers * 2
+        running: Dict[concurrent.futures.Future, MarketDataProvider] = {}
+        errors: List[Tuple[MarketDataProvider, Exception]] = []
+        hedge_at: Optional[float] = None
+
+        def launch() -> bool:
+            nonlocal hedge_at
+            provider = self._next_provider(remaining)
+            if provider is None:
+                return False
+            running[executor.submit(self._call, provider, symbol, interval, deadline)] = provider
+            delay = self.hedge_delay(provider)
+            hedge_at = time.monotonic() + delay if delay > 0 else None
+            return True
+
+        launch()
+        while running:
+            wake_at = hedge_at if remaining else None
+            if deadline is not None:
+                wake_at = deadline if wake_at is None else min(wake_at, deadline)
+            done, _ = concurrent.futures.wait(
+                running,
+                timeout=None if wake_at is None else max(0.0, wake_at - time.monotonic()),
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                if deadline is not None and time.monotonic() >= deadline:
+                    with self._lock:
+                        self.deadlines_exceeded += 1
+                    raise DeadlineExceededError(
+                        message=f"Deadline exceeded fetching {symbol}",
+                        details={"symbol": symbol}
+                    )
+                if launch():
+                    with self._lock:
+                        self.hedged += 1
+                continue
+
+            for future in done:
+                provider = running.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors.append((provider, e))
+                    # A spent deadline, or an answer about the symbol itself, decides the outcome
+                    if isinstance(e, DeadlineExceededError) or not is_provider_failure(e):
+                        raise
+            # Fail over to the next provider (a duplicate of a failed one won't do better)
+            if not running and len(self.providers) > 1:
+                launch()
+
+        raise self._final_error(symbol, errors)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return per-provider call counts and quota usage, in priority order."""
+        with self._lock:
+            counts = {name: dict(stats) for name, stats in self._stats.items()}
+            hedged = self.hedged
+            deadlines_exceeded = self.deadlines_exceeded
+        return {
+            "hedge_after_ms": round(self.hedge_after_seconds * 1000) or None,
+            "hedge_percentile": self.hedge_percentile or None,
+            "hedged_requests": hedged,
+            "deadlines_exceeded": deadlines_exceeded,
+            "providers": [
+                {
+                    "name": p.name,
+                    **counts[p.name],
+                    "latency_p50_ms": self._latency_ms(p, 50),
+                    "latency_p95_ms": self._latency_ms(p, 95),
+                    "hedge_after_ms": round(self.hedge_delay(p) * 1000) or None,
+                    "quota": p.quota.get_stats()
+                }
+                for p in self.providers
+            ]
+        }
+
+    def _latency_ms(self, provider: MarketDataProvider, pct: float) -> Optional[float]:
+        seconds = self._latency[provider.name].percentile(pct)
+        return round(seconds * 1000, 1) if seconds is not None else None
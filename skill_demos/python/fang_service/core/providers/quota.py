@@ -0,0 +1,98 @@
+# fang_service/core/providers/quota.py
+
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+DAY_SECONDS = 86400
+
+class QuotaTracker:
+    """
+    Client-side call accounting for one provider.
+
+    Counts calls in a sliding minute and a sliding day and refuses calls past
+    either limit (0 means unlimited), so a fetch is never spent on a request
+    the provider would reject. A provider that reports a rate limit anyway
+    can be blocked until its limit resets.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self, calls_per_minute: int = 0, calls_per_day: int = 0):
+        """
+        Initialize the tracker.
+
+        Args:
+            calls_per_minute: Calls allowed in any 60 seconds (0: unlimited)
+            calls_per_day: Calls allowed in any 24 hours (0: unlimited)
+        """
+        self.calls_per_minute = calls_per_minute
+        self.calls_per_day = calls_per_day
+        self.used = 0
+        self.refused = 0
+        self._minute: deque = deque()
+        self._day: deque = deque()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        """Forget calls outside the windows (caller holds the lock)."""
+        while self._minute and self._minute[0] <= now - 60:
+            self._minute.popleft()
+        while self._day and self._day[0] <= now - DAY_SECONDS:
+            self._day.popleft()
+
+    def _has_room(self, now: float) -> bool:
+        if now < self._blocked_until:
+            return False
+        if self.calls_per_minute and len(self._minute) >= self.calls_per_minute:
+            return False
+        return not (self.calls_per_day and len(self._day) >= self.calls_per_day)
+
+    def available(self, now: Optional[float] = None) -> bool:
+        """Return True if a call would be allowed now (without using it)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            return self._has_room(now)
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """
+        Use one call if the quota allows it.
+
+        Returns:
+            True if the call may be made
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if not self._has_room(now):
+                self.refused += 1
+                return False
+            if self.calls_per_minute:
+                self._minute.append(now)
+            if self.calls_per_day:
+                self._day.append(now)
+            self.used += 1
+            return True
+
+    def block(self, seconds: float):
+        """Refuse every call for a while, e.g. after the provider reported a rate limit."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.time() + seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return usage against the limits for monitoring."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            return {
+                "used": self.used,
+                "refused": self.refused,
+                "calls_per_minute": self.calls_per_minute or None,
+                "last_minute": len(self._minute) if self.calls_per_minute else None,
+                "calls_per_day": self.calls_per_day or None,
+                "last_day": len(self._day) if self.calls_per_day else None,
+                "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 1)
+            }
@@ -0,0 +1,119 @@
+# fang_service/core/providers/replay.py
+
+import os
+import json
+import time
+import datetime
+import threading
+from typing import Dict, Any, Optional
+
+from fang_service.core.logging_config import get_logger
+from fang_service.core.exceptions import DataRetrievalError, DeadlineExceededError, FetchCancelledError
+from fang_service.core.providers.base import MarketDataProvider, normalize_bars, TIMESTAMP_FORMAT
+from fang_service.core.providers.quota import QuotaTracker
+from fang_service.core.timezones import get_zone, exchange_timezone
+
+logger = get_logger(__name__)
+
+WEEK = datetime.timedelta(days=7)
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves recorded bars from local files, for tests and offline development.
+
+    `path` is either one JSON file mapping symbols to bars (the format of
+    seed_data.json) or a directory of `<SYMBOL>.json` files, each holding bars
+    or a raw Alpha Vantage intraday response. Files are read once and cached.
+
+    With `rebase`, timestamps are moved forward by whole weeks so the newest
+    bar is within the last week, keeping weekday and time of day: recordings
+    stay inside the retention window and look like recent sessions.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rebase: bool = True,
+        latency_seconds: float = 0.0,
+        quota: Optional[QuotaTracker] = None,
+        cancel: Optional[threading.Event] = None
+    ):
+        """
+        Initialize the provider.
+
+        Args:
+            path: Recording file or directory
+            rebase: Shift recordings to the most recent week
+            latency_seconds: Simulated response time per fetch
+            quota: Call accounting (default: unlimited)
+            cancel: Cancellation token that ends the simulated latency early
+        """
+        super().__init__("replay", quota, cancel)
+        self.path = path
+        self.rebase = rebase
+        self.latency_seconds = latency_seconds
+        self._recordings: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Return the recorded bars for a symbol, or None if there are none."""
+        if os.path.isdir(self.path):
+            file_path = os.path.join(self.path, f"{symbol}.json")
+            if not os.path.exists(file_path):
+                return None
+            with open(file_path, "r") as f:
+                data = json.load(f)
+            # A raw Alpha Vantage response: take its time series
+            series_keys = [key for key in data if key.startswith("Time Series")]
+            return data[series_keys[0]] if series_keys else data
+
+        with self._lock:
+            if self._recordings is None:
+                with open(self.path, "r") as f:
+                    self._recordings = {s.upper(): bars for s, bars in json.load(f).items()}
+                logger.info(f"Loaded replay recordings for {len(self._recordings)} symbols from {self.path}")
+        return self._recordings.get(symbol)
+
+    def _rebased(self, symbol: str, bars: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        """Shift bars forward by whole weeks so the newest is within the last week."""
+        newest = datetime.datetime.strptime(max(bars), TIMESTAMP_FORMAT)
+        # Labels are exchange wall-clock times: compare with the exchange's clock
+        now = datetime.datetime.now(get_zone(exchange_timezone(symbol))).replace(tzinfo=None)
+        weeks = (now - newest) // WEEK
+        if weeks <= 0:
+            return bars
+        shift = weeks * WEEK
+        return {
+            (datetime.datetime.strptime(ts, TIMESTAMP_FORMAT) + shift).strftime(TIMESTAMP_FORMAT): bar
+            for ts, bar in bars.items()
+        }
+
+    def _wait(self, symbol: str, seconds: float):
+        """Sleep for the simulated latency, ending early if cancelled."""
+        if self.cancel is None:
+            time.sleep(seconds)
+        elif self.cancel.wait(seconds):
+            raise FetchCancelledError(message=f"Replay of {symbol} cancelled", details={"symbol": symbol})
+
+    def fetch_bars(
+        self, symbol: str, interval: str, deadline: Optional[float] = None
+    ) -> Dict[str, Dict[str, str]]:
+        if self.latency_seconds:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining < self.latency_seconds:
+                self._wait(symbol, max(0.0, remaining))
+                raise DeadlineExceededError(
+                    message=f"Deadline exceeded replaying {symbol}",
+                    details={"symbol": symbol}
+                )
+            self._wait(symbol, self.latency_seconds)
+
+        recorded = self._load(symbol)
+        if not recorded:
+            raise DataRetrievalError(
+                message=f"No replay recording for {symbol}",
+                details={"symbol": symbol, "path": self.path}
+            )
+
+        bars = normalize_bars(symbol, recorded)
+        return self._rebased(symbol, bars) if self.rebase and bars else bars
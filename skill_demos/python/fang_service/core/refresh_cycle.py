@@ -0,0 +1,111 @@
+# fang_service/core/refresh_cycle.py
+
+import time
+import datetime
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional, Iterable
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Per-symbol states within a refresh pass
+QUEUED = "queued"
+FETCHING = "fetching"
+UPDATED = "updated"
+FAILED = "failed"
+DEFERRED = "deferred"
+
+FINISHED_STATES = (UPDATED, FAILED, DEFERRED)
+
+class CycleTracker:
+    """
+    Progress of the refresh pass in progress, symbol by symbol.
+
+    Each pass (scheduled, triggered through the admin API, or a manual
+    update_cache() call) is started with the symbols it claimed; workers move each symbol from queued to fetching to
+    an outcome. The current pass and a summary of the last finished one are
+    reported for monitoring.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self):
+        """Initialize the tracker."""
+        self.cycles_total = 0
+        self._current: Optional[Dict[str, Any]] = None
+        self._last: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def start(self, symbols: Iterable[str], trigger: str) -> int:
+        """
+        Record the start of a pass.
+
+        Args:
+            symbols: Symbols the pass claimed
+            trigger: What started it: "schedule" (the updater), "admin" (a
+                triggered refresh) or "manual" (update_cache(), e.g. single-run mode)
+
+        Returns:
+            The pass's id
+        """
+        with self._lock:
+            self.cycles_total += 1
+            self._current = {
+                "id": self.cycles_total,
+                "trigger": trigger,
+                "started_at": datetime.datetime.utcnow().isoformat() + "Z",
+                "_started": time.monotonic(),
+                "symbols": {symbol: QUEUED for symbol in symbols}
+            }
+            return self.cycles_total
+
+    def mark(self, symbol: str, state: str):
+        """Move a symbol of the current pass to a new state."""
+        with self._lock:
+            if self._current is not None and symbol in self._current["symbols"]:
+                self._current["symbols"][symbol] = state
+
+    def is_pending(self, symbol: str) -> bool:
+        """Return True if the current pass has the symbol queued or fetching."""
+        with self._lock:
+            return self._current is not None and self._current["symbols"].get(symbol) in (QUEUED, FETCHING)
+
+    def finish(self):
+        """Record the end of the current pass."""
+        with self._lock:
+            if self._current is None:
+                return
+            self._last = self._summary(self._current)
+            self._last["duration_seconds"] = round(time.monotonic() - self._current["_started"], 2)
+            self._current = None
+
+    @staticmethod
+    def _summary(cycle: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": cycle["id"],
+            "trigger": cycle["trigger"],
+            "started_at": cycle["started_at"],
+            "counts": dict(Counter(cycle["symbols"].values()))
+        }
+
+    def get_stats(self, include_symbols: bool = True) -> Dict[str, Any]:
+        """
+        Return the pass in progress (with per-symbol states) and the last finished one.
+
+        Args:
+            include_symbols: Include each symbol's state in the current pass
+        """
+        with self._lock:
+            current = None
+            if self._current is not None:
+                current = self._summary(self._current)
+                current["elapsed_seconds"] = round(time.monotonic() - self._current["_started"], 2)
+                if include_symbols:
+                    current["symbols"] = dict(self._current["symbols"])
+            return {
+                "cycles_total": self.cycles_total,
+                "current": current,
+                "last": dict(self._last) if self._last else None
+            }
@@ -0,0 +1,322 @@
+# fang_service/core/scheduler.py
+
+import time
+import heapq
+import zlib
+import datetime
+import threading
+from typing import Dict, List, Optional, Tuple, Iterable, Any
+
+from fang_service.core.logging_config import get_logger
+from fang_service.core.db_models import load_refresh_schedule, save_refresh_due
+from fang_service.core.market_calendar import MarketCalendar
+
+logger = get_logger(__name__)
+
+class RefreshScheduler:
+    """
+    Per-symbol "next due" queue with staggered shards.
+
+    Every symbol hashes into one of `shard_count` shards. Each shard refreshes
+    at its own fixed phase within the interval, so a large universe is spread
+    evenly across the hour instead of being fetched in one burst. Due times are
+    persisted so a restart only fetches symbols that are actually due.
+
+    With a market calendar, slots whose preceding interval saw no trading are
+    skipped, so nothing is fetched overnight, at weekends or on holidays, and
+    the first slot after the market opens picks up the new bars.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        interval_seconds: float,
+        shard_count: int = 1,
+        persist: bool = True,
+        calendar: Optional[MarketCalendar] = None,
+        offset_seconds: float = 0.0
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            symbols: Symbols to schedule
+            interval_seconds: Refresh interval for every symbol
+            shard_count: Number of staggered shards
+            persist: Whether due times are loaded from and saved to the database
+            calendar: Market calendar to skip closed periods (None refreshes around the clock)
+            offset_seconds: Delay of every slot past the interval boundary, e.g. so a
+                refresh runs just after a bar closes rather than just before
+        """
+        self.interval_seconds = interval_seconds
+        self.shard_count = max(1, shard_count)
+        self.persist = persist
+        self.calendar = calendar
+        self.offset_seconds = offset_seconds
+
+        # _due is authoritative; heap entries that disagree with it are stale
+        self._due: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._in_flight: set = set()
+        self._lock = threading.Lock()
+
+        persisted = load_refresh_schedule() if persist else {}
+        now = time.time()
+        for symbol in symbols:
+            # Symbols we've never refreshed are due immediately
+            self._set_due(symbol, persisted.get(symbol, now))
+
+    def __contains__(self, symbol: str) -> bool:
+        with self._lock:
+            return symbol in self._due
+
+    def add(self, symbol: str, due: Optional[float] = None) -> bool:
+        """
+        Add a symbol to the rotation.
+
+        Args:
+            symbol: Stock symbol
+            due: When it is first due (default: now)
+
+        Returns:
+            False if the symbol was already scheduled
+        """
+        with self._lock:
+            if symbol in self._due:
+                return False
+            self._set_due(symbol, time.time() if due is None else due)
+            return True
+
+    def remove(self, symbol: str) -> bool:
+        """
+        Drop a symbol from the rotation (a fetch in flight still completes).
+
+        Returns:
+            False if the symbol wasn't scheduled
+        """
+        with self._lock:
+            # Its heap entries become stale and are skipped
+            return self._due.pop(symbol, None) is not None
+
+    def reload(self):
+        """
+        Re-read persisted due times, e.g. after taking over from another process's updater.
+
+        Symbols in flight keep their claim; symbols with nothing persisted keep their due time.
+        """
+        if not self.persist:
+            return
+        persisted = load_refresh_schedule()
+        with self._lock:
+            for symbol, due in persisted.items():
+                if symbol in self._due and symbol not in self._in_flight:
+                    self._set_due(symbol, due)
+
+    def shard_of(self, symbol: str) -> int:
+        """Return the shard a symbol belongs to (stable across restarts)."""
+        return zlib.crc32(symbol.encode("utf-8")) % self.shard_count
+
+    def _aligned_slot(self, symbol: str, after: float) -> float:
+        """Return the symbol's first shard slot strictly after `after`, ignoring the calendar."""
+        phase = self.offset_seconds + self.shard_of(symbol) * self.interval_seconds / self.shard_count
+        cycles = int((after - phase) // self.interval_seconds) + 1
+        return phase + cycles * self.interval_seconds
+
+    def next_slot(self, symbol: str, after: float) -> float:
+        """
+        Return the first refresh slot for the symbol's shard strictly after `after`.
+
+        With a calendar, a slot only counts if the market was open at some point
+        in the interval before it (less the offset), i.e. new bars can exist.
+
+        Args:
+            symbol: Stock symbol
+            after: Epoch seconds
+
+        Returns:
+            Epoch seconds of the next slot
+        """
+        slot = self._aligned_slot(symbol, after)
+        if self.calendar is None:
+            return slot
+
+        window_end = slot - self.offset_seconds
+        opened = self.calendar.next_open(window_end - self.interval_seconds)
+        if opened >= window_end:
+            # Closed throughout: the first slot after the next open covers it
+            slot = self._aligned_slot(symbol, opened + self.offset_seconds)
+        return slot
+
+    def _set_due(self, symbol: str, due: float):
+        """Record a due time (caller holds the lock or is the constructor)."""
+        self._due[symbol] = due
+        heapq.heappush(self._heap, (due, symbol))
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[str]:
+        """
+        Claim symbols whose due time has passed.
+
+        Claimed symbols are marked in flight until `mark_done` is called, so they
+        won't be handed out twice.
+
+        Args:
+            now: Current epoch seconds (default: time.time())
+            limit: Maximum number of symbols to claim
+
+        Returns:
+            Due symbols, most overdue first
+        """
+        now = time.time() if now is None else now
+        claimed = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                if limit is not None and len(claimed) >= limit:
+                    break
+                due, symbol = heapq.heappop(self._heap)
+                if self._due.get(symbol) != due or symbol in self._in_flight:
+                    continue  # Stale entry
+                self._in_flight.add(symbol)
+                claimed.append(symbol)
+        return claimed
+
+    def claim(self, symbols: Iterable[str]) -> List[str]:
+        """
+        Claim specific symbols regardless of due time (e.g. a full refresh).
+
+        Args:
+            symbols: Symbols to claim
+
+        Returns:
+            The subset that was scheduled and not already in flight
+        """
+        claimed = []
+        with self._lock:
+            for symbol in symbols:
+                if symbol in self._due and symbol not in self._in_flight:
+                    self._in_flight.add(symbol)
+                    claimed.append(symbol)
+        return claimed
+
+    def mark_done(
+        self,
+        symbol: str,
+        success: bool,
+        now: Optional[float] = None,
+        not_before: Optional[float] = None
+    ) -> float:
+        """
+        Release a claimed symbol and schedule its next refresh.
+
+        Args:
+            symbol: Stock symbol
+            success: Whether the refresh succeeded
+            now: Current epoch seconds (default: time.time())
+            not_before: Skip slots before this time (e.g. a failure cool-down)
+
+        Returns:
+            The symbol's next due time
+        """
+        now = time.time() if now is None else now
+        next_due = self.next_slot(symbol, max(now, not_before or now))
+        with self._lock:
+            self._in_flight.discard(symbol)
+            if symbol not in self._due:
+                return next_due  # Removed while in flight
+            self._set_due(symbol, next_due)
+
+        if self.persist:
+            last_success = datetime.datetime.utcnow().isoformat() + "Z" if success else None
+            save_refresh_due(symbol, next_due, last_success)
+        return next_due
+
+    def defer(self, symbol: str, due: float):
+        """
+        Release a claimed symbol without refreshing it, due again at `due`.
+
+        Unlike mark_done(), nothing is persisted: the attempt didn't happen.
+        """
+        with self._lock:
+            self._in_flight.discard(symbol)
+            if symbol in self._due:
+                self._set_due(symbol, due)
+
+    def set_interval(self, interval_seconds: float, now: Optional[float] = None) -> int:
+        """
+        Change the refresh interval at runtime.
+
+        Symbols not in flight whose next slot under the new interval comes
+        sooner are moved up to it; the others keep their due time and pick up
+        the new interval once refreshed. Nothing is persisted until then.
+
+        Args:
+            interval_seconds: New interval
+            now: Current epoch seconds (default: time.time())
+
+        Returns:
+            Number of symbols moved up
+
+        Raises:
+            ValueError: If the interval isn't positive
+        """
+        if interval_seconds <= 0:
+            raise ValueError(f"Refresh interval must be positive, got: {interval_seconds}")
+        now = time.time() if now is None else now
+        with self._lock:
+            self.interval_seconds = interval_seconds
+            waiting = [(s, due) for s, due in self._due.items() if s not in self._in_flight and due > now]
+        moved = 0
+        for symbol, due in waiting:
+            sooner = self.next_slot(symbol, now)
+            if sooner < due:
+                with self._lock:
+                    if self._due.get(symbol) == due and symbol not in self._in_flight:
+                        self._set_due(symbol, sooner)
+                        moved += 1
+        logger.info(f"Refresh interval set to {interval_seconds / 60:.1f} minutes; {moved} symbols moved up")
+        return moved
+
+    def next_due_time(self) -> Optional[float]:
+        """Return the earliest due time among symbols not in flight, or None."""
+        with self._lock:
+            while self._heap:
+                due, symbol = self._heap[0]
+                if self._due.get(symbol) == due and symbol not in self._in_flight:
+                    return due
+                heapq.heappop(self._heap)  # Drop stale entry
+            return None
+
+    def symbols(self) -> List[str]:
+        """Return all scheduled symbols."""
+        with self._lock:
+            return list(self._due)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduling statistics for monitoring.
+
+        Returns:
+            Dictionary with universe size, in-flight count and per-shard sizes
+        """
+        now = time.time()
+        with self._lock:
+            shard_sizes = [0] * self.shard_count
+            overdue = 0
+            for symbol, due in self._due.items():
+                shard_sizes[self.shard_of(symbol)] += 1
+                if due <= now:
+                    overdue += 1
+            next_due = min(self._due.values()) if self._due else None
+            stats = {
+                "symbols": len(self._due),
+                "in_flight": len(self._in_flight),
+                "due_now": overdue,
+                "shard_count": self.shard_count,
+                "shard_sizes": shard_sizes,
+                "interval_seconds": self.interval_seconds,
+                "next_due_in_seconds": round(max(0.0, next_due - now), 1) if next_due else None
+            }
+        if self.calendar is not None:
+            stats["market"] = self.calendar.get_stats(now)
+        return stats
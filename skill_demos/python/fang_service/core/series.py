@@ -0,0 +1,200 @@
+# fang_service/core/series.py
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Alpha Vantage intraday intervals and their length in minutes
+INTERVAL_MINUTES: Dict[str, int] = {"1min": 1, "5min": 5, "15min": 15, "30min": 30, "60min": 60}
+
+def interval_minutes(interval: str) -> int:
+    """
+    Return the length of an interval in minutes.
+
+    Args:
+        interval: Alpha Vantage interval string (e.g. 15min)
+
+    Returns:
+        Interval length in minutes
+
+    Raises:
+        ValueError: If the interval is not supported
+    """
+    if interval not in INTERVAL_MINUTES:
+        raise ValueError(f"Unsupported interval: {interval}. Expected one of: {', '.join(INTERVAL_MINUTES)}")
+    return INTERVAL_MINUTES[interval]
+
+def validate_rollup_interval(interval: str, base_interval: str) -> str:
+    """
+    Check that `interval` can be computed from bars of `base_interval`.
+
+    Args:
+        interval: Requested interval
+        base_interval: Interval the data was ingested at
+
+    Returns:
+        The validated interval
+
+    Raises:
+        ValueError: If the interval is unsupported, finer than the base, or not a multiple of it
+    """
+    target = interval_minutes(interval)
+    base = interval_minutes(base_interval)
+    if target < base or target % base:
+        raise ValueError(
+            f"Interval {interval} cannot be built from {base_interval} data. "
+            f"Use a multiple of {base_interval}."
+        )
+    return interval
+
+
+class SymbolSeries:
+    """
+    Columnar OHLCV series for one symbol, sorted by time (oldest first).
+
+    Timestamps are int64 epoch seconds; prices are float64 and volumes int64.
+    Columns are plain NumPy arrays so rollups and indicators run vectorized.
+    """
+
+    __slots__ = ("timestamps", "open", "high", "low", "close", "volume")
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray
+    ):
+        self.timestamps = timestamps
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_bars(cls, bars: Dict[str, Dict[str, str]]) -> "SymbolSeries":
+        """
+        Build a series from Alpha Vantage style bars.
+
+        Args:
+            bars: Dictionary of bars keyed by "YYYY-MM-DD HH:MM:SS", any order
+
+        Returns:
+            SymbolSeries sorted by timestamp
+        """
+        labels = np.array(list(bars.keys()), dtype="datetime64[s]")
+        values = list(bars.values())
+        timestamps = labels.astype(np.int64)
+        order = np.argsort(timestamps, kind="stable")
+
+        def column(key: str, dtype) -> np.ndarray:
+            return np.array([float(v[key]) for v in values], dtype=np.float64).astype(dtype)[order]
+
+        return cls(
+            timestamps=timestamps[order],
+            open=column("1. open", np.float64),
+            high=column("2. high", np.float64),
+            low=column("3. low", np.float64),
+            close=column("4. close", np.float64),
+            volume=column("5. volume", np.int64)
+        )
+
+    def labels(self) -> np.ndarray:
+        """Return timestamps formatted as "YYYY-MM-DD HH:MM:SS" strings."""
+        iso = np.datetime_as_string(self.timestamps.astype("datetime64[s]"), unit="s")
+        return np.char.replace(iso, "T", " ")
+
+    def to_bars(self, indices: Optional[np.ndarray] = None) -> Dict[str, Dict[str, str]]:
+        """
+        Convert back to Alpha Vantage style bars, newest first.
+
+        Values are stringified the same way the database path does, so
+        responses look identical whichever path served them.
+
+        Args:
+            indices: Optional ascending positions to convert (default: all bars)
+
+        Returns:
+            Dictionary of bars keyed by timestamp
+        """
+        if indices is not None:
+            return SymbolSeries(
+                self.timestamps[indices], self.open[indices], self.high[indices],
+                self.low[indices], self.close[indices], self.volume[indices]
+            ).to_bars()
+
+        bars = {}
+        labels = self.labels().tolist()
+        opens, highs, lows = self.open.tolist(), self.high.tolist(), self.low.tolist()
+        closes, volumes = self.close.tolist(), self.volume.tolist()
+        for i in range(len(labels) - 1, -1, -1):
+            bars[labels[i]] = {
+                "1. open": str(opens[i]),
+                "2. high": str(highs[i]),
+                "3. low": str(lows[i]),
+                "4. close": str(closes[i]),
+                "5. volume": str(volumes[i])
+            }
+        return bars
+
+
+def parse_timestamp(value: str) -> int:
+    """
+    Parse a "YYYY-MM-DD HH:MM:SS" (or "YYYY-MM-DD") label into epoch seconds.
+
+    Args:
+        value: Timestamp label, in the same form the bars are keyed by
+
+    Returns:
+        Epoch seconds
+
+    Raises:
+        ValueError: If the value is not a valid timestamp
+    """
+    try:
+        return int(np.datetime64(value.strip().replace(" ", "T"), "s").astype(np.int64))
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}. Expected format: YYYY-MM-DD HH:MM:SS")
+
+
+def rollup(series: SymbolSeries, minutes: int) -> SymbolSeries:
+    """
+    Aggregate a series into coarser bars.
+
+    Bars are bucketed by flooring their timestamp to the target interval.
+    Within a bucket: open=first, high=max, low=min, close=last, volume=sum.
+    All reductions are vectorized with ufunc.reduceat over bucket boundaries.
+
+    Args:
+        series: Source series, sorted by timestamp
+        minutes: Target interval length in minutes
+
+    Returns:
+        Rolled-up series (labelled by bucket start)
+    """
+    if len(series) == 0:
+        return series
+
+    width = minutes * 60
+    buckets = series.timestamps // width
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(buckets)) - 1
+
+    return SymbolSeries(
+        timestamps=buckets[starts] * width,
+        open=series.open[starts],
+        high=np.maximum.reduceat(series.high, starts),
+        low=np.minimum.reduceat(series.low, starts),
+        close=series.close[ends],
+        volume=np.add.reduceat(series.volume, starts)
+    )
@@ -0,0 +1,85 @@
+# fang_service/core/singleflight.py
+
+import threading
+from typing import Dict, Any, Callable, Hashable, Optional, TypeVar
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+class _Call:
+    """One in-flight execution and the callers waiting on it."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs block until it finishes and receive the same result (or exception).
+    Nothing is remembered once the call completes, so keys should include
+    whatever makes a result stale (e.g. the data version).
+
+    Thread-safe; callers block, so async request handlers reach it through
+    the DB executor (see core.blocking) rather than from the event loop.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.shared = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """
+        Run `func` once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the computation
+            func: Computation to run if no identical call is in flight
+
+        Returns:
+            The computation's result
+
+        Raises:
+            Whatever `func` raised, in every caller that shared the call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return how many calls ran and how many shared another caller's result."""
+        with self._lock:
+            return {"executed": self.executed, "shared": self.shared, "in_flight": len(self._calls)}
@@ -0,0 +1,296 @@
+# fang_service/core/snapshot.py
+
+import os
+import json
+import mmap
+import zlib
+import struct
+import datetime
+import threading
+from typing import Dict, Optional, List, Any
+
+import numpy as np
+
+from fang_service.core.logging_config import get_logger
+from fang_service.core.series import SymbolSeries
+
+logger = get_logger(__name__)
+
+# File layout:
+#   preamble   magic, format version, header length, CRC32 of the header
+#   header     UTF-8 JSON: data version, interval, column offsets, per-symbol
+#              (version, start, count, crc) entries
+#   columns    one contiguous little-endian array per column holding every
+#              symbol's bars back to back, each aligned to COLUMN_ALIGNMENT
+SNAPSHOT_MAGIC = b"FANGSNAP"
+SNAPSHOT_FORMAT_VERSION = 1
+PREAMBLE = struct.Struct("<8sIII")
+COLUMN_ALIGNMENT = 64
+
+# Column name -> on-disk dtype, in file order
+COLUMNS: Dict[str, str] = {
+    "timestamps": "<i8",
+    "open": "<f8",
+    "high": "<f8",
+    "low": "<f8",
+    "close": "<f8",
+    "volume": "<i8",
+}
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is truncated, corrupt or of an unknown format."""
+
+
+def _align(offset: int) -> int:
+    return (offset + COLUMN_ALIGNMENT - 1) // COLUMN_ALIGNMENT * COLUMN_ALIGNMENT
+
+def _symbol_crc(columns: Dict[str, np.ndarray], start: int, count: int) -> int:
+    crc = 0
+    for name in COLUMNS:
+        crc = zlib.crc32(memoryview(columns[name][start:start + count]).cast("B"), crc)
+    return crc
+
+def _fsync_directory(path: str):
+    """Flush a directory entry so a rename into it survives power loss (POSIX only)."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def snapshot_signature(path: str) -> Optional[tuple]:
+    """
+    Return (inode, mtime, size) of a snapshot file, or None if it doesn't exist.
+
+    Every write renames a new file into place, so a changed signature means
+    a new snapshot to map.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def write_snapshot(
+    path: str,
+    data_version: int,
+    interval: str,
+    series_by_symbol: Dict[str, SymbolSeries],
+    symbol_versions: Dict[str, int],
+    symbol_updated_at: Optional[Dict[str, datetime.datetime]] = None
+) -> int:
+    """
+    Write a columnar snapshot of published series, atomically.
+
+    The file is written to a temporary name next to `path`, fsynced, then
+    renamed over `path`, so readers (and a restart after a crash) see either
+    the previous snapshot or the complete new one, never a torn file.
+
+    Args:
+        path: Destination file
+        data_version: Published data version the snapshot represents
+        interval: Bar interval of the series
+        series_by_symbol: Series keyed by symbol
+        symbol_versions: Published version of each symbol
+        symbol_updated_at: Optional publish time of each symbol
+
+    Returns:
+        Size of the written file in bytes
+    """
+    symbols = sorted(series_by_symbol)
+    updated_at = symbol_updated_at or {}
+    columns = {
+        name: np.ascontiguousarray(
+            np.concatenate([getattr(series_by_symbol[s], name) for s in symbols]) if symbols else np.empty(0),
+            dtype=dtype
+        )
+        for name, dtype in COLUMNS.items()
+    }
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    start = 0
+    for symbol in symbols:
+        count = len(series_by_symbol[symbol])
+        entries[symbol] = {
+            "version": symbol_versions.get(symbol, 0),
+            "start": start,
+            "count": count,
+            "crc": _symbol_crc(columns, start, count),
+            "updated_at": updated_at[symbol].isoformat() if symbol in updated_at else None
+        }
+        start += count
+    total = start
+
+    # Column offsets depend on the header length, which depends on the offsets;
+    # offsets only grow between passes, so this settles after two or three
+    created_at = datetime.datetime.utcnow().isoformat() + "Z"
+    offsets = {name: 0 for name in COLUMNS}
+    while True:
+        header = json.dumps({
+            "data_version": data_version,
+            "interval": interval,
+            "created_at": created_at,
+            "bars": total,
+            "columns": {name: {"offset": offsets[name], "dtype": dtype} for name, dtype in COLUMNS.items()},
+            "symbols": entries
+        }, separators=(",", ":")).encode("utf-8")
+        position = _align(PREAMBLE.size + len(header))
+        layout = {}
+        for name in COLUMNS:
+            layout[name] = position
+            position = _align(position + columns[name].nbytes)
+        if layout == offsets:
+            break
+        offsets = layout
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header), zlib.crc32(header)))
+            f.write(header)
+            for name in COLUMNS:
+                f.write(b"\0" * (offsets[name] - f.tell()))
+                f.write(memoryview(columns[name]).cast("B"))
+            size = f.tell()
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(path)
+    return size
+
+
+class Snapshot:
+    """
+    A memory-mapped, read-only snapshot loaded with load_snapshot().
+
+    Opening one only parses the header: column arrays are zero-copy views
+    into the mapping, so pages are read from disk as symbols are used. Each
+    symbol's checksum is verified the first time its series is requested.
+    """
+
+    def __init__(self, path: str, buffer: mmap.mmap, header: Dict[str, Any]):
+        self.path = path
+        self.size = len(buffer)
+        self.data_version: int = header["data_version"]
+        self.interval: str = header["interval"]
+        self.created_at: str = header["created_at"]
+        self._buffer = buffer
+        self._entries: Dict[str, Dict[str, Any]] = header["symbols"]
+        self._verified: set = set()
+        self._lock = threading.Lock()
+
+        total = header["bars"]
+        self._columns: Dict[str, np.ndarray] = {}
+        for name, dtype in COLUMNS.items():
+            spec = header["columns"].get(name)
+            if spec is None or spec["dtype"] != dtype:
+                raise SnapshotError(f"Snapshot {path} has no {dtype} column {name}")
+            if spec["offset"] + total * np.dtype(dtype).itemsize > self.size:
+                raise SnapshotError(f"Snapshot {path} is truncated")
+            self._columns[name] = np.frombuffer(buffer, dtype=dtype, count=total, offset=spec["offset"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def symbols(self) -> List[str]:
+        """Return the symbols in the snapshot."""
+        with self._lock:
+            return list(self._entries)
+
+    def symbol_versions(self) -> Dict[str, int]:
+        """Return the published version of every symbol in the snapshot."""
+        with self._lock:
+            return {symbol: entry["version"] for symbol, entry in self._entries.items()}
+
+    def symbol_updated_at(self) -> Dict[str, datetime.datetime]:
+        """Return the publish time of every symbol that recorded one."""
+        with self._lock:
+            return {
+                symbol: datetime.datetime.fromisoformat(entry["updated_at"])
+                for symbol, entry in self._entries.items() if entry.get("updated_at")
+            }
+
+    def version_of(self, symbol: str) -> Optional[int]:
+        """Return the snapshot's version of a symbol, or None if it isn't included."""
+        entry = self._entries.get(symbol)
+        return entry["version"] if entry else None
+
+    def discard(self, symbol: str):
+        """Stop serving a symbol from the snapshot (e.g. it is stale or corrupt)."""
+        with self._lock:
+            self._entries.pop(symbol, None)
+
+    def series(self, symbol: str) -> Optional[SymbolSeries]:
+        """
+        Return a symbol's series as read-only views into the mapping.
+
+        Args:
+            symbol: Stock symbol
+
+        Returns:
+            SymbolSeries, or None if the symbol isn't included
+
+        Raises:
+            SnapshotError: If the symbol's bars fail their checksum
+        """
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return None
+
+        start, count = entry["start"], entry["count"]
+        if symbol not in self._verified:
+            if _symbol_crc(self._columns, start, count) != entry["crc"]:
+                raise SnapshotError(f"Checksum mismatch for {symbol} in snapshot {self.path}")
+            with self._lock:
+                self._verified.add(symbol)
+
+        end = start + count
+        return SymbolSeries(*(self._columns[name][start:end] for name in COLUMNS))
+
+
+def load_snapshot(path: str) -> Optional[Snapshot]:
+    """
+    Memory-map a snapshot file.
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        Snapshot, or None if the file doesn't exist
+
+    Raises:
+        SnapshotError: If the file is truncated, corrupt or of another format
+        OSError: If the file exists but can't be read
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    with f:
+        if os.fstat(f.fileno()).st_size < PREAMBLE.size:
+            raise SnapshotError(f"Snapshot {path} is truncated")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, format_version, header_length, header_crc = PREAMBLE.unpack_from(buffer, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError(f"{path} is not a snapshot file")
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot {path} has unsupported format version {format_version}")
+
+    header = buffer[PREAMBLE.size:PREAMBLE.size + header_length]
+    if len(header) != header_length or zlib.crc32(header) != header_crc:
+        raise SnapshotError(f"Snapshot {path} has a corrupt header")
+
+    return Snapshot(path, buffer, json.loads(header))
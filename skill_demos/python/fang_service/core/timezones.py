@@ -0,0 +1,57 @@
+# fang_service/core/timezones.py
+
+import datetime
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from fang_service.app_variables import MARKET_TIMEZONE, SYMBOL_TIMEZONES
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """Return a (cached) ZoneInfo for an IANA timezone name."""
+    return ZoneInfo(name)
+
+def exchange_timezone(symbol: str) -> str:
+    """
+    Return the IANA timezone a symbol's bar labels are in.
+
+    Args:
+        symbol: Stock symbol
+
+    Returns:
+        Its SYMBOL_TIMEZONES entry, or MARKET_TIMEZONE
+    """
+    return SYMBOL_TIMEZONES.get(symbol.upper(), MARKET_TIMEZONE)
+
+def label_to_epoch(label: str, timezone: Optional[str] = None) -> int:
+    """
+    Convert a bar label to UTC epoch seconds.
+
+    Args:
+        label: "YYYY-MM-DD HH:MM:SS" wall-clock time at the exchange
+        timezone: IANA timezone of the label (default: MARKET_TIMEZONE)
+
+    Returns:
+        Epoch seconds (the earlier instant for a time repeated at a DST change)
+
+    Raises:
+        ValueError: If the label is not a valid timestamp
+    """
+    local = datetime.datetime.strptime(label, TIMESTAMP_FORMAT)
+    return int(local.replace(tzinfo=get_zone(timezone or MARKET_TIMEZONE)).timestamp())
+
+def epoch_to_label(epoch: int, timezone: Optional[str] = None) -> str:
+    """
+    Convert UTC epoch seconds to a bar label.
+
+    Args:
+        epoch: Epoch seconds
+        timezone: IANA timezone to express it in (default: MARKET_TIMEZONE)
+
+    Returns:
+        "YYYY-MM-DD HH:MM:SS" wall-clock time at the exchange
+    """
+    return datetime.datetime.fromtimestamp(epoch, get_zone(timezone or MARKET_TIMEZONE)).strftime(TIMESTAMP_FORMAT)
@@ -0,0 +1,70 @@
+# fang_service/core/updater_lock.py
+
+from typing import Optional, IO
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+from fang_service.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+class UpdaterLock:
+    """
+    Non-blocking exclusive file lock deciding which worker process runs the updater.
+
+    With several uvicorn/gunicorn workers sharing a data directory, the first
+    to take the lock fetches data and writes snapshot segments; the others map
+    those segments read-only. The OS releases the lock when its holder exits,
+    so a follower can take over. Where fcntl isn't available (Windows) every
+    process acquires the lock, i.e. each runs its own updater.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the lock.
+
+        Args:
+            path: Lock file (created if missing)
+        """
+        self.path = path
+        self.held = False
+        self._file: Optional[IO] = None
+
+    def try_acquire(self) -> bool:
+        """
+        Take the lock if no other process holds it.
+
+        Returns:
+            True if this process holds the lock
+        """
+        if self.held:
+            return True
+        if not FCNTL_AVAILABLE:
+            self.held = True
+            return True
+
+        lock_file = open(self.path, "a+")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        self.held = True
+        return True
+
+    def release(self):
+        """Release the lock if held."""
+        if self._file is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            except OSError as e:
+                logger.warning(f"Error releasing updater lock {self.path}: {e}")
+            finally:
+                self._file.close()
+                self._file = None
+        self.held = False
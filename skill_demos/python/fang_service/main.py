@@ -4,6 +4,8 @@ import os
 import time
 import signal
 import atexit
+import asyncio
+import threading
 import uvicorn
 from fastapi import FastAPI, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
@@ -21,14 +23,18 @@ import platform
 
 from fang_service.app_variables import (
     DATADOG_ENABLED, DATADOG_SERVICE_NAME, DATADOG_ENV, DATADOG_VERSION,
-    RUN_TYPE, FANG_SYMBOLS, RATE_LIMIT_PER_MINUTE
+    RUN_TYPE, FANG_SYMBOLS, RATE_LIMIT_PER_MINUTE,
+    COMPRESSION_MINIMUM_SIZE, COMPRESSION_EXCLUDED_PATHS, COMPRESSION_CACHE_MAX_BYTES,
+    DRAIN_TIMEOUT_SECONDS
 )
 from fang_service.core.logging_config import get_logger
+from fang_service.core.compression import CompressionMiddleware
+from fang_service.core.drain import DrainController, DrainMiddleware
 from fang_service.core.db_service import StockDataService
 from fang_service import __version__
 
 # Import routers
-from fang_service.routers import info, get_stock, health, alldata
+from fang_service.routers import info, get_stock, health, alldata, indicators, batch, stream, admin
 
 # Configure logging
 logger = get_logger(__name__)
@@ -54,45 +60,76 @@ if DATADOG_ENABLED:
 # Global instance for dependency injection
 stock_service = StockDataService()
 
+# Tracks in-flight requests so shutdown can let them finish
+drain = DrainController()
+_shutdown_complete = False
+
 # Setup graceful shutdown
 def shutdown_handler():
     """
     Handle graceful shutdown of resources.
     
-    Ensures background tasks and connections are properly closed.
-    Called during normal shutdown or when signaled externally.
+    Stops the background updater at a stage boundary, waits for running
+    fetches and database reads, and checkpoints the WAL. Called from the
+    lifespan shutdown once requests have drained, and at interpreter exit;
+    only the first call does anything.
     """
+    global _shutdown_complete
+    if _shutdown_complete:
+        return
+    _shutdown_complete = True
     logger.info("Shutting down service gracefully...")
     
     try:
-        # Stop the background updater thread
-        stock_service.stop_background_updater()
-        logger.info("Background updater stopped")
+        stock_service.shutdown()
     except Exception as e:
-        logger.error(f"Error stopping background updater: {e}", exc_info=True)
+        logger.error(f"Error shutting down stock data service: {e}", exc_info=True)
     
     logger.info("Service shutdown complete")
 
 # Register shutdown handler
 atexit.register(shutdown_handler)
 
-# Handle OS signals for graceful shutdown in containerized environments
-def signal_handler(sig, frame):
+def begin_drain():
     """
-    Handle OS signals like SIGTERM and SIGINT.
+    Stop taking on new work, without waiting for work in progress.
     
-    Args:
-        sig: Signal number
-        frame: Current stack frame
+    Readiness starts failing, open streams are told to reconnect elsewhere,
+    and the updater starts no new fetches. Runs on the event loop.
     """
-    logger.info(f"Received signal {sig}, shutting down...")
-    shutdown_handler()
-    # Give time for logs to flush
-    time.sleep(1)
-    os._exit(0)
+    if not drain.begin():
+        return
+    stock_service.broadcaster.close_all()
+    stock_service.begin_shutdown()
 
-signal.signal(signal.SIGTERM, signal_handler)
-signal.signal(signal.SIGINT, signal_handler)
+def _on_shutdown_signal(loop: asyncio.AbstractEventLoop):
+    """Start draining when the server is told to stop, with a deadline for in-flight requests."""
+    if drain.draining:
+        return
+    begin_drain()
+    # The server waits for open connections without a limit; cancel what is left at the deadline
+    app.state.drain_deadline = loop.create_task(drain.drain(DRAIN_TIMEOUT_SECONDS))
+
+def _install_signal_handlers(loop: asyncio.AbstractEventLoop):
+    """
+    Start draining on SIGTERM/SIGINT, ahead of the server's own shutdown.
+    
+    The server keeps its handlers: ours chain to whatever was installed before,
+    and the event loop is still woken for its own. Only the main thread can
+    install signal handlers, so this is skipped elsewhere (e.g. test clients).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+        
+        def handler(signum, frame, previous=previous):
+            logger.info(f"Received signal {signum}, draining in-flight requests...")
+            loop.call_soon_threadsafe(_on_shutdown_signal, loop)
+            if callable(previous):
+                previous(signum, frame)
+        
+        signal.signal(sig, handler)
 
 # FastAPI startup/shutdown events
 @asynccontextmanager
@@ -109,33 +146,43 @@ async def lifespan(app: FastAPI):
     instance_id = str(uuid.uuid4())
     app.state.instance_id = instance_id
     hostname = platform.node()
+    _install_signal_handlers(asyncio.get_running_loop())
     
     # Log startup with instance identification
     logger.info(f"Starting FANG Stock Data Service v{__version__} on {hostname} [instance:{instance_id}]")
     
-    # 1) Fetch data immediately upon service starting
-    cache_initialized = False
+    # Serve the last snapshot straight away; refreshes replace it symbol by symbol
     try:
-        update_success = stock_service.update_cache()
-        cache_initialized = update_success
-        if not update_success:
-            logger.warning("Initial cache update was partial or unsuccessful")
+        stock_service.restore_snapshot()
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}", exc_info=True)
+        logger.error(f"Failed to restore snapshot: {e}", exc_info=True)
     
-    # 2) Start background cache updater in persistent mode
     if RUN_TYPE == "persistent":
+        # Start the background updater; its first pass fetches every symbol that is
+        # due (all of them on a fresh database) and publishes each as it lands,
+        # so startup doesn't block on the whole universe
         try:
             stock_service.start_background_updater()
         except Exception as e:
             logger.error(f"Failed to start background updater: {e}", exc_info=True)
+    else:
+        # Single-run: fetch everything once, synchronously
+        try:
+            update_success = stock_service.update_cache()
+            if not update_success:
+                logger.warning("Initial cache update was partial or unsuccessful")
+            stock_service.maybe_save_snapshot(force=True)
+        except Exception as e:
+            logger.error(f"Failed to initialize database: {e}", exc_info=True)
     
     logger.info(f"Startup process complete - Service ready [instance:{instance_id}]")
     yield
     
-    # Shutdown: Clean up resources
+    # Shutdown: let in-flight requests finish (up to the drain deadline), then clean up resources
     logger.info(f"FastAPI shutdown event triggered [instance:{instance_id}]")
-    shutdown_handler()
+    begin_drain()
+    await drain.drain(DRAIN_TIMEOUT_SECONDS)
+    await asyncio.get_running_loop().run_in_executor(None, shutdown_handler)
 
 # Create and configure the FastAPI app
 app = FastAPI(
@@ -147,6 +194,7 @@ app = FastAPI(
     redoc_url="/api/redoc",  # ReDoc path
     openapi_url="/api/openapi.json"  # OpenAPI schema path
 )
+app.state.drain = drain
 
 # === Middleware Configuration ===
 
@@ -159,10 +207,18 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Restrict for production
     allow_credentials=True,
-    allow_methods=["GET"],
+    allow_methods=["GET", "POST"],
     allow_headers=["*"],
 )
 
+# Compress large responses (probe and streaming endpoints are excluded)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    excluded_paths=COMPRESSION_EXCLUDED_PATHS,
+    cache_max_bytes=COMPRESSION_CACHE_MAX_BYTES
+)
+
 # Simple rate limiting middleware (replace with more robust solution for production)
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
@@ -273,13 +329,18 @@ async def log_requests(request: Request, call_next):
         )
         raise
 
+# Track in-flight requests for graceful shutdown (added last, so it is the outermost)
+app.add_middleware(DrainMiddleware, controller=drain)
+
 # === Dependency Providers ===
 
 # Provide the StockDataService instance as a dependency
-def get_stock_service():
+async def get_stock_service():
     """
     Provide the shared StockDataService instance.
     
+    A coroutine so resolving it doesn't cost async handlers a threadpool hop.
+    
     Returns:
         The global StockDataService instance
     """
@@ -295,6 +356,10 @@ app.include_router(info.router, prefix=api_prefix, tags=["Information"])
 app.include_router(get_stock.router, prefix=api_prefix, tags=["Stock Data"])
 app.include_router(health.router, prefix=api_prefix, tags=["Health"])
 app.include_router(alldata.router, prefix=api_prefix, tags=["All Data"])
+app.include_router(indicators.router, prefix=api_prefix, tags=["Analytics"])
+app.include_router(batch.router, prefix=api_prefix, tags=["Stock Data"])
+app.include_router(stream.router, prefix=api_prefix, tags=["Streaming"])
+app.include_router(admin.router, prefix=api_prefix, tags=["Admin"])
 
 # === Main entry to run via "python -m fang_service.main" or "python main.py" ===
 if __name__ == "__main__":
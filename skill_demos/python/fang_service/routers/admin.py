@@ -0,0 +1,175 @@
+# fang_service/routers/admin.py
+
+import hmac
+from fastapi import APIRouter, Depends, Request, HTTPException, status
+from fastapi.responses import JSONResponse
+from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, Field
+
+from fang_service.app_variables import ADMIN_API_KEY, SERVICE_API_KEY
+from fang_service.core.logging_config import get_logger
+from fang_service.core.db_service import StockDataService
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+class RefreshRequest(BaseModel):
+    """Symbols to refresh now"""
+    symbols: Optional[List[str]] = Field(None, description="Tracked symbols to refresh (default: all)")
+
+class IntervalRequest(BaseModel):
+    """New refresh interval"""
+    minutes: float = Field(..., gt=0, description="Refresh interval in minutes")
+
+async def verify_admin_key(request: Request) -> bool:
+    """
+    Verify the admin API key provided in the request headers.
+
+    The admin API is disabled (404) unless ADMIN_API_KEY is set to a key of
+    its own: the client key can't pause the updater or spend provider quota.
+
+    Args:
+        request: FastAPI request object containing headers
+
+    Returns:
+        True if API key is valid
+
+    Raises:
+        HTTPException: 404 if the admin API is disabled, 401 if the key is missing or invalid
+    """
+    if not ADMIN_API_KEY or hmac.compare_digest(ADMIN_API_KEY.encode(), SERVICE_API_KEY.encode()):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    header_key = request.headers.get("x-api-key") or ""
+    if not hmac.compare_digest(header_key.encode(), ADMIN_API_KEY.encode()):
+        logger.warning("Invalid admin API key attempt")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing API key"
+        )
+    return True
+
+def _check_available(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a refused admin action into an HTTP error.
+
+    Raises:
+        HTTPException 409: If this worker doesn't run the updater
+        HTTPException 503: If the service is shutting down
+    """
+    if result["status"] == "shutting_down":
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=result["reason"])
+    if result["status"] == "unavailable":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=result["reason"])
+    return result
+
+@router.get("/admin/updater", summary="Updater settings and the refresh pass in progress")
+async def get_updater(
+    _: bool = Depends(verify_admin_key),
+    stock_service: StockDataService = Depends()
+) -> Dict[str, Any]:
+    """
+    Report whether the updater is running or paused, its interval, and the
+    pass in progress with each symbol's state (queued, fetching, updated,
+    failed or deferred), plus a summary of the last finished pass.
+
+    Authentication required via x-api-key header (ADMIN_API_KEY).
+    """
+    return stock_service.get_updater_state()
+
+@router.post("/admin/refresh", summary="Refresh all or selected symbols now")
+async def post_refresh(
+    request: RefreshRequest,
+    _: bool = Depends(verify_admin_key),
+    stock_service: StockDataService = Depends()
+) -> JSONResponse:
+    """
+    Start a refresh of the given symbols (or every tracked symbol) in the background.
+
+    Triggers coalesce: symbols already waiting for a triggered refresh or
+    being fetched by the pass in progress are reported as `already_pending`
+    rather than fetched again, and triggered refreshes never overlap a pass.
+
+    Authentication required via x-api-key header (ADMIN_API_KEY).
+
+    Args:
+        request: Optional symbol list
+
+    Returns:
+        202 with the symbols queued and those already pending
+
+    Raises:
+        HTTPException 400: If a symbol isn't tracked
+        HTTPException 409: If this worker doesn't run the updater
+        HTTPException 503: If the service is shutting down
+    """
+    try:
+        result = stock_service.trigger_refresh(request.symbols)
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=_check_available(result))
+
+@router.post("/admin/updater/pause", summary="Pause scheduled refreshes")
+async def pause_updater(
+    _: bool = Depends(verify_admin_key),
+    stock_service: StockDataService = Depends()
+) -> Dict[str, Any]:
+    """
+    Stop starting scheduled refresh passes until resumed or restarted.
+
+    A pass in progress finishes, and /admin/refresh still works while paused.
+
+    Authentication required via x-api-key header (ADMIN_API_KEY).
+
+    Raises:
+        HTTPException 409: If this worker doesn't run the updater
+        HTTPException 503: If the service is shutting down
+    """
+    return _check_available(stock_service.pause_updater())
+
+@router.post("/admin/updater/resume", summary="Resume scheduled refreshes")
+async def resume_updater(
+    _: bool = Depends(verify_admin_key),
+    stock_service: StockDataService = Depends()
+) -> Dict[str, Any]:
+    """
+    Resume scheduled refresh passes; symbols that fell due while paused are fetched first.
+
+    Authentication required via x-api-key header (ADMIN_API_KEY).
+
+    Raises:
+        HTTPException 409: If this worker doesn't run the updater
+        HTTPException 503: If the service is shutting down
+    """
+    return _check_available(stock_service.resume_updater())
+
+@router.put("/admin/updater/interval", summary="Change the refresh interval")
+async def put_interval(
+    request: IntervalRequest,
+    _: bool = Depends(verify_admin_key),
+    stock_service: StockDataService = Depends()
+) -> Dict[str, Any]:
+    """
+    Change the refresh interval without a restart (not persisted across restarts).
+
+    Symbols whose next slot under the new interval comes sooner are moved up.
+
+    Authentication required via x-api-key header (ADMIN_API_KEY).
+
+    Args:
+        request: New interval in minutes
+
+    Returns:
+        The new interval and how many symbols were moved up
+
+    Raises:
+        HTTPException 400: If the interval isn't positive
+        HTTPException 409: If this worker doesn't run the updater
+        HTTPException 503: If the service is shutting down
+    """
+    try:
+        result = stock_service.set_refresh_interval(request.minutes)
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+    return _check_available(result)
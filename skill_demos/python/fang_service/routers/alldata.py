@@ -1,20 +1,135 @@
 # fang_service/routers/alldata.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from typing import Dict, Any, List, Optional, Tuple
 import datetime
+import functools
 
-from fang_service.app_variables import SERVICE_API_KEY, FANG_SYMBOLS, ALPHAVANTAGE_API_KEY
+from fang_service.app_variables import (
+    SERVICE_API_KEY, FANG_SYMBOLS, ALPHAVANTAGE_API_KEY, ALPHAVANTAGE_BASE_URL, INGEST_INTERVAL
+)
 from fang_service.core.logging_config import get_logger
+from fang_service.core.encoders import (
+    FORMAT_JSON, MEDIA_TYPES, ENCODERS, negotiate_format, available_formats, encode_json
+)
 from fang_service.core.db_service import StockDataService
-from fang_service.routers.get_stock import verify_api_key
+from fang_service.routers.get_stock import verify_api_key, fetch_pending_response
 
 logger = get_logger(__name__)
 router = APIRouter()
 
+async def _get_json_or_400(stock_service: StockDataService, symbol: str, interval: Optional[str]) -> Optional[bytes]:
+    """
+    Fetch a symbol's pre-encoded JSON bars at an interval, mapping an invalid interval to HTTP 400.
+    
+    Bars already encoded for the current version are returned on the event
+    loop; the rest are loaded on the database executor.
+    
+    Args:
+        stock_service: The stock data service
+        symbol: Stock symbol
+        interval: Requested bar interval, or None for the ingested interval
+        
+    Returns:
+        JSON bytes of the symbol's bars, or None if there is no data
+        
+    Raises:
+        HTTPException 400: If the interval can't be built from the ingested data
+    """
+    try:
+        cached = stock_service.peek_data_json(symbol, interval=interval)
+        if cached is not None:
+            return cached
+        return await stock_service.db_executor.run(
+            functools.partial(stock_service.get_data_json, symbol, interval=interval)
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+
+def _json_object_response(members: List[Tuple[str, bytes]]) -> Response:
+    """
+    Build a {symbol: bars, ...} JSON response by splicing pre-encoded bars.
+    
+    The bars are already JSON (cached per data version), so the body is
+    assembled without re-encoding them or running them through jsonable_encoder.
+    
+    Args:
+        members: (symbol, encoded bars) pairs, in output order
+        
+    Returns:
+        application/json response
+    """
+    body = b"{" + b",".join(encode_json(symbol) + b":" + bars for symbol, bars in members) + b"}"
+    return Response(content=body, media_type=MEDIA_TYPES[FORMAT_JSON], headers={"Vary": "Accept"})
+
+def _negotiate_or_406(request: Request) -> str:
+    """
+    Choose the response format from the Accept header.
+    
+    Args:
+        request: Incoming request
+        
+    Returns:
+        The negotiated format (json, msgpack or arrow)
+        
+    Raises:
+        HTTPException 406: If none of the accepted types can be produced here
+    """
+    fmt = negotiate_format(request.headers.get("accept"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail={
+                "message": "None of the requested media types are available",
+                "available": [MEDIA_TYPES[f] for f in available_formats()]
+            }
+        )
+    return fmt
+
+async def _binary_response(
+    stock_service: StockDataService,
+    symbols: List[str],
+    interval: Optional[str],
+    fmt: str
+) -> Optional[Response]:
+    """
+    Encode the symbols' columnar series straight from the store.
+    
+    Cached series are read on the event loop, the rest on the database executor.
+    
+    Args:
+        stock_service: The stock data service
+        symbols: Symbols to include (those without data are skipped)
+        interval: Requested bar interval, or None for the ingested interval
+        fmt: Binary format to encode
+        
+    Returns:
+        Encoded response, or None if none of the symbols have data
+        
+    Raises:
+        HTTPException 400: If the interval can't be built from the ingested data
+    """
+    series_by_symbol = {}
+    for symbol in symbols:
+        try:
+            read = functools.partial(stock_service.get_series, symbol, interval=interval)
+            series = await stock_service.db_executor.run(read, inline=stock_service.is_cached(symbol, interval))
+        except ValueError as ve:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+        if series is not None and len(series):
+            series_by_symbol[symbol] = series
+    
+    if not series_by_symbol:
+        return None
+    
+    content = ENCODERS[fmt](series_by_symbol, interval or INGEST_INTERVAL)
+    return Response(content=content, media_type=MEDIA_TYPES[fmt], headers={"Vary": "Accept"})
+
 @router.get("/allData", summary="Get data for all FANG stocks")
-def get_all_data(
+async def get_all_data(
+    request: Request,
     response: Response,
+    interval: Optional[str] = Query(None, description="Bar interval (default: as ingested)"),
     _: bool = Depends(verify_api_key),
     stock_service: StockDataService = Depends()
 ) -> Dict[str, Any]:
@@ -24,38 +139,52 @@ def get_all_data(
     Returns a dictionary with each symbol as a key and its time series data as values.
     If no data is found for any symbol, returns a message indicating no data was found.
     
+    Send `Accept: application/msgpack` or `application/vnd.apache.arrow.stream`
+    for a columnar binary encoding of the same bars (diagnostic "no data"
+    messages are always JSON).
+    
     Authentication required via x-api-key header.
     
+    Args:
+        interval: Optional bar interval to roll the data up to
+    
     Returns:
         Dictionary of stock data by symbol, or message if no data found
     """
+    fmt = _negotiate_or_406(request)
+    response.headers["Vary"] = "Accept"
     result = {}
-    service_stats = stock_service.get_cache_stats()
     
-    # Check if DB has been initialized
-    if service_stats["update_count"] == 0:
+    # Check if DB has been initialized (the full stats, which query the database,
+    # are only gathered for the diagnostic response)
+    if stock_service.update_count == 0:
         logger.warning("Database has never been updated - initialization may have failed")
         # Force HTTP 200 response
         response.status_code = status.HTTP_200_OK
         return {
             "message": "no data found",
             "reason": "database has not been initialized",
-            "status": service_stats,
+            "status": await stock_service.db_executor.run(stock_service.get_cache_stats),
             "api_key_info": f"Using API key ending in ...{ALPHAVANTAGE_API_KEY[-4:]}",
             "likely_cause": "Alpha Vantage API rate limits or invalid API key"
         }
     
     # Check if DB update is stale
-    if service_stats["last_update"]:
-        last_update = datetime.datetime.fromisoformat(service_stats["last_update"].replace("Z", "+00:00"))
+    last_update = stock_service.last_update
+    if last_update:
         cache_age_hours = (datetime.datetime.utcnow() - last_update).total_seconds() / 3600
         if cache_age_hours > 3:  # If DB hasn't been updated in over 3 hours
             logger.warning(f"Data is stale - last updated {cache_age_hours:.1f} hours ago")
     
+    if fmt != FORMAT_JSON:
+        binary = await _binary_response(stock_service, FANG_SYMBOLS, interval, fmt)
+        if binary is not None:
+            return binary
+    
     # Gather data for all configured FANG symbols
     symbols_with_data = []
     for symbol in FANG_SYMBOLS:
-        data = stock_service.get_data(symbol)
+        data = await _get_json_or_400(stock_service, symbol, interval)
         if data:
             result[symbol] = data
             symbols_with_data.append(symbol)
@@ -83,13 +212,14 @@ def get_all_data(
         }
     
     # Successfully found data - return with 200 OK
-    response.status_code = status.HTTP_200_OK
-    return result
+    return _json_object_response(list(result.items()))
 
 @router.get("/symbolData/{symbol}", summary="Get all data for a specific symbol")
-def get_symbol_data(
+async def get_symbol_data(
     symbol: str, 
+    request: Request,
     response: Response,
+    interval: Optional[str] = Query(None, description="Bar interval (default: as ingested)"),
     _: bool = Depends(verify_api_key),
     stock_service: StockDataService = Depends()
 ) -> Dict[str, Any]:
@@ -97,25 +227,39 @@ def get_symbol_data(
     Get all available stock data for a specific symbol.
     
     Retrieves the complete time series data for the requested symbol.
-    Returns a detailed error message if no data is found for the symbol.
+    Returns a detailed error message if no data is found for the symbol, or
+    a 202 with a Retry-After hint while an untracked symbol is fetched
+    (on-demand mode).
+    Supports the same binary encodings as /allData via the Accept header.
     
     Authentication required via x-api-key header.
     
     Args:
         symbol: Stock symbol (e.g., FB, AMZN, NFLX, GOOG)
+        interval: Optional bar interval to roll the data up to
         
     Returns:
         Dictionary with symbol as the key and its time series data as the value
     """
     symbol = symbol.upper()
+    fmt = _negotiate_or_406(request)
+    response.headers["Vary"] = "Accept"
+    
+    if fmt != FORMAT_JSON:
+        binary = await _binary_response(stock_service, [symbol], interval, fmt)
+        if binary is not None:
+            return binary
     
     # Get data for the specified symbol
-    data = stock_service.get_data(symbol)
+    data = await _get_json_or_400(stock_service, symbol, interval)
     
     # Check if we have data for this symbol
     if not data:
+        if await stock_service.db_executor.run(functools.partial(stock_service.request_symbol, symbol)):
+            return fetch_pending_response(symbol)
+        
         # Get list of symbols that do have data for more helpful error message
-        symbols_with_data = stock_service.get_symbols_with_data()
+        symbols_with_data = await stock_service.db_executor.run(stock_service.get_symbols_with_data)
         
         logger.info(f"No data found in database for symbol: {symbol}")
         
@@ -132,11 +276,10 @@ def get_symbol_data(
         }
     
     # Return data in the expected format with 200 OK
-    response.status_code = status.HTTP_200_OK
-    return {symbol: data}
+    return _json_object_response([(symbol, data)])
 
 @router.get("/availableSymbols", summary="Get list of symbols with available data")
-def get_available_symbols(
+async def get_available_symbols(
     response: Response,
     _: bool = Depends(verify_api_key),
     stock_service: StockDataService = Depends()
@@ -152,7 +295,7 @@ def get_available_symbols(
     Returns:
         Dictionary with list of available symbols
     """
-    symbols = stock_service.get_symbols_with_data()
+    symbols = await stock_service.db_executor.run(stock_service.get_symbols_with_data)
     
     # Always return HTTP 200 OK
     response.status_code = status.HTTP_200_OK
@@ -168,7 +311,7 @@ def get_available_symbols(
     return {"available_symbols": symbols}
 
 @router.get("/status", summary="Get API data status")
-def get_api_status(
+async def get_api_status(
     response: Response,
     stock_service: StockDataService = Depends()
 ) -> Dict[str, Any]:
@@ -182,8 +325,9 @@ def get_api_status(
     Returns:
         Dictionary with API and data status information
     """
-    service_stats = stock_service.get_cache_stats()
-    symbols_with_data = stock_service.get_symbols_with_data()
+    service_stats, symbols_with_data = await stock_service.db_executor.run(
+        lambda: (stock_service.get_cache_stats(), stock_service.get_symbols_with_data())
+    )
     
     cache_age_seconds = service_stats.get("cache_age_seconds")
     cache_age_hours = cache_age_seconds / 3600 if cache_age_seconds else None
@@ -194,9 +338,14 @@ def get_api_status(
     return {
         "alpha_vantage": {
             "api_key_used": f"...{ALPHAVANTAGE_API_KEY[-4:]}",
-            "base_url": "https://www.alphavantage.co/query",
+            "base_url": ALPHAVANTAGE_BASE_URL,
             "documentation": "https://www.alphavantage.co/documentation/"
         },
+        "provider": {
+            "circuit": service_stats["provider_circuit"],
+            "sources": service_stats["providers"],
+            "failing_symbols": service_stats["failing_symbols"]
+        },
         "database": {
             "status": "empty" if not symbols_with_data else "populated",
             "symbols_with_data": symbols_with_data,
@@ -205,7 +354,13 @@ def get_api_status(
             "failed_updates": service_stats["failed_updates"],
             "last_update": service_stats["last_update"],
             "cache_age_hours": round(cache_age_hours, 2) if cache_age_hours else None,
-            "db_stats": service_stats.get("db_stats", {})
+            "db_stats": service_stats.get("db_stats", {}),
+            "scheduler": service_stats["scheduler"],
+            "ingest": service_stats["ingest"],
+            "on_demand": service_stats["on_demand"],
+            "coalescing": service_stats["coalescing"],
+            "snapshot": service_stats["snapshot"],
+            "executor": service_stats["db_executor"]
         },
         "diagnostics": {
             "possible_issues": [
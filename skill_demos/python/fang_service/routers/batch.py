@@ -0,0 +1,86 @@
+# fang_service/routers/batch.py
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, Any, List, Optional
+import functools
+from pydantic import BaseModel, Field, validator
+
+from fang_service.app_variables import BATCH_MAX_ITEMS, INGEST_INTERVAL
+from fang_service.core.logging_config import get_logger
+from fang_service.core.db_service import StockDataService
+from fang_service.routers.get_stock import verify_api_key
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+class BatchItem(BaseModel):
+    """A single lookup: an exact bar, an inclusive range, or (with neither) the latest bar"""
+    symbol: str = Field(..., description="Stock symbol (e.g., AMZN)")
+    timestamp: Optional[str] = Field(None, description="Exact bar, e.g. 2023-03-24 10:00:00")
+    start: Optional[str] = Field(None, description="Range start (inclusive), timestamp or date")
+    end: Optional[str] = Field(None, description="Range end (inclusive), timestamp or date")
+
+    @validator("end", always=True)
+    def point_or_range(cls, value, values):
+        if values.get("timestamp") and (value or values.get("start")):
+            raise ValueError("Use either timestamp or start/end, not both")
+        return value
+
+class BatchRequest(BaseModel):
+    """Batch lookup request"""
+    items: List[BatchItem] = Field(..., description="Lookups, resolved and returned in order")
+    interval: Optional[str] = Field(None, description="Bar interval for every item (default: as ingested)")
+
+    @validator("items")
+    def items_within_limit(cls, value):
+        if not value:
+            raise ValueError("items must not be empty")
+        if len(value) > BATCH_MAX_ITEMS:
+            raise ValueError(f"At most {BATCH_MAX_ITEMS} items per batch, got: {len(value)}")
+        return value
+
+@router.post("/batch", summary="Look up bars for many symbols in one request")
+async def post_batch(
+    request: BatchRequest,
+    _: bool = Depends(verify_api_key),
+    stock_service: StockDataService = Depends()
+) -> Dict[str, Any]:
+    """
+    Resolve many point or range lookups in a single round trip.
+
+    Each item names a symbol and either an exact `timestamp`, a `start`/`end`
+    range (inclusive; either end may be omitted), or neither for the latest
+    bar. Lookups are grouped by symbol and resolved in one pass over the
+    in-memory series, so a fan-out client pays for one authenticated,
+    rate-limited request instead of one per symbol. When every symbol's
+    series is cached the batch is resolved on the event loop; otherwise it
+    waits for a database worker.
+
+    Authentication required via x-api-key header.
+
+    Args:
+        request: Batch of lookups and an optional interval
+
+    Returns:
+        Dictionary with the interval and one result per item, in request order
+
+    Raises:
+        HTTPException 400: For an invalid interval or timestamp
+    """
+    try:
+        cached = all(stock_service.is_cached(item.symbol, request.interval) for item in request.items)
+        resolve = functools.partial(
+            stock_service.get_batch, [item.dict() for item in request.items], interval=request.interval
+        )
+        results = await stock_service.db_executor.run(resolve, inline=cached)
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+
+    found = sum(1 for result in results if result["found"])
+    logger.info(f"Batch lookup resolved {found}/{len(results)} items")
+    return {
+        "interval": request.interval or INGEST_INTERVAL,
+        "count": len(results),
+        "found": found,
+        "results": results
+    }
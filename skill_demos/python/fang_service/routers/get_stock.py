@@ -1,13 +1,18 @@
 # fang_service/routers/get_stock.py
 
-from fastapi import APIRouter, Depends, Request, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Request, Response, HTTPException, status, Query
 from typing import Dict, Any, Optional
 import datetime
+import functools
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
-from fang_service.app_variables import SERVICE_API_KEY
+from fang_service.app_variables import SERVICE_API_KEY, ON_DEMAND_RETRY_AFTER_SECONDS
 from fang_service.core.logging_config import get_logger
 from fang_service.core.db_service import StockDataService
+from fang_service.core.encoders import encode_json
+from fang_service.core.series import parse_timestamp
+from fang_service.core.availability import LOOKUP_MODES, format_timestamp
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -28,12 +33,37 @@ class StockResponse(BaseModel):
     """Stock data response structure"""
     symbol: str = Field(..., description="Stock symbol (e.g., AMZN)")
     timestamp: str = Field(..., description="Data timestamp (e.g., 2023-03-24 10:00:00)")
+    requested_timestamp: Optional[str] = Field(
+        None, description="Timestamp that was asked for, when mode resolved it to another bar"
+    )
     data: StockDataPoint = Field(..., description="Stock data point values")
 
-def verify_api_key(request: Request) -> bool:
+def fetch_pending_response(symbol: str) -> JSONResponse:
+    """
+    Build the 202 returned while an untracked symbol is fetched on demand.
+    
+    Args:
+        symbol: Stock symbol being fetched
+        
+    Returns:
+        202 Accepted response with a Retry-After hint
+    """
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "message": f"Fetching data for {symbol}; retry shortly",
+            "symbol": symbol,
+            "retry_after_seconds": ON_DEMAND_RETRY_AFTER_SECONDS
+        },
+        headers={"Retry-After": str(ON_DEMAND_RETRY_AFTER_SECONDS)}
+    )
+
+async def verify_api_key(request: Request) -> bool:
     """
     Verify the API key provided in the request headers.
     
+    A coroutine so FastAPI resolves it on the event loop rather than the threadpool.
+    
     Args:
         request: FastAPI request object containing headers
         
@@ -54,16 +84,81 @@ def verify_api_key(request: Request) -> bool:
         )
     return True
 
+def _lookup_bar(
+    stock_service: StockDataService, symbol: str, query_key: str, interval: str, mode: str
+) -> Response:
+    """
+    Find the bar a /getStock request refers to and build its response.
+    
+    Reads the symbol's series and availability index, which may hit the
+    database; the handler calls this inline only when both are cached.
+    
+    Args:
+        stock_service: The stock data service
+        symbol: Stock symbol (upper case)
+        query_key: Requested "YYYY-MM-DD HH:MM:SS" timestamp
+        interval: Bar interval
+        mode: One of LOOKUP_MODES
+        
+    Returns:
+        JSON response with the bar, or a 202 while an untracked symbol is fetched
+        
+    Raises:
+        HTTPException 404: If there is no data for the symbol, or no bar for the lookup
+        ValueError: If the interval is invalid
+    """
+    # Check if we have data for this symbol (raises ValueError for a bad interval)
+    availability = stock_service.get_availability(symbol, interval=interval)
+    if availability is None:
+        if stock_service.request_symbol(symbol):
+            return fetch_pending_response(symbol)
+        available_symbols = stock_service.get_symbols_with_data()
+        logger.info(f"No data found in database for symbol: {symbol}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail={
+                "message": f"No data for {symbol}",
+                "available_symbols": available_symbols
+            }
+        )
+
+    # Find the bar: a binary search over the sorted timestamps
+    requested = parse_timestamp(query_key)
+    resolved = availability.resolve(requested, mode)
+    result = stock_service.get_bar(symbol, resolved, interval=interval) if resolved is not None else None
+    if not result:
+        # Describe what is available to help the client troubleshoot
+        logger.info(f"No data found for {symbol} at {query_key}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, 
+            detail={"message": f"No data for {symbol} at {query_key}", **availability.describe_miss(requested)}
+        )
+        
+    # The bar comes from our own store, so skip response-model validation and
+    # alias re-serialization; response_model above still documents the schema
+    timestamp = format_timestamp(resolved)
+    body = {"symbol": symbol, "timestamp": timestamp, "data": result}
+    if timestamp != query_key:
+        body["requested_timestamp"] = query_key
+    return Response(content=encode_json(body), media_type="application/json")
+
 @router.get(
     "/getStock", 
     response_model=StockResponse,
     summary="Get stock data for a specific date and hour",
     response_description="Stock data for the requested symbol, date, and hour"
 )
-def get_stock(
+async def get_stock(
     symbol: str = Query(..., description="Stock symbol (e.g., FB, AMZN, NFLX, GOOG)"),
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
     hour: int = Query(..., description="Hour of the day (0-23)"),
+    minute: int = Query(0, description="Minute of the hour (0-59), for sub-hourly intervals"),
+    interval: str = Query("60min", description="Bar interval: 1min, 5min, 15min, 30min or 60min"),
+    mode: str = Query(
+        "exact",
+        description="exact: the bar at that time; prev/next: the latest bar at or before / "
+                    "earliest at or after it; nearest: the closest bar"
+    ),
     _: bool = Depends(verify_api_key), 
     stock_service: StockDataService = Depends()
 ) -> Dict[str, Any]:
@@ -72,7 +167,9 @@ def get_stock(
     
     This endpoint retrieves a specific data point from the database based on the 
     symbol, date, and hour provided. The data is sourced from Alpha Vantage and
-    stored in the database for performance.
+    stored in the database for performance. Bars coarser than the ingest
+    interval are rolled up from the stored bars. Lookups on a cached series
+    are answered on the event loop; the rest wait for a database worker.
     
     Authentication required via x-api-key header.
     
@@ -80,12 +177,16 @@ def get_stock(
         symbol: Stock symbol (e.g., FB, AMZN, NFLX, GOOG)
         date: Date in YYYY-MM-DD format
         hour: Hour of the day (0-23)
+        minute: Minute of the hour (0-59)
+        interval: Bar interval (default: 60min)
+        mode: How to pick the bar (exact, prev, next or nearest; default: exact)
         
     Returns:
-        Dictionary with symbol, timestamp, and stock data
+        Dictionary with symbol, timestamp, and stock data, or a 202 with a
+        Retry-After hint while an untracked symbol is fetched (on-demand mode)
         
     Raises:
-        HTTPException 400: If the date or hour is invalid
+        HTTPException 400: If the date, hour or mode is invalid
         HTTPException 404: If no data is found for the specified parameters
         HTTPException 500: For unexpected server errors
     """
@@ -100,43 +201,19 @@ def get_stock(
         # Validate hour range
         if not (0 <= hour <= 23):
             raise ValueError(f"Hour must be between 0 and 23, got: {hour}")
+        if not (0 <= minute <= 59):
+            raise ValueError(f"Minute must be between 0 and 59, got: {minute}")
+        if mode not in LOOKUP_MODES:
+            raise ValueError(f"Invalid mode: {mode}. Expected one of: {', '.join(LOOKUP_MODES)}")
 
         # Build the expected key string from the database
         # e.g. "2023-03-24 10:00:00" 
-        hour_str = f"{hour:02d}:00:00"
+        hour_str = f"{hour:02d}:{minute:02d}:00"
         query_key = f"{dt.strftime('%Y-%m-%d')} {hour_str}"
 
-        # Check if we have data for this symbol
-        data_for_symbol = stock_service.get_data(symbol)
-        if not data_for_symbol:
-            available_symbols = stock_service.get_symbols_with_data()
-            logger.info(f"No data found in database for symbol: {symbol}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail={
-                    "message": f"No data for {symbol}",
-                    "available_symbols": available_symbols
-                }
-            )
-
-        # Check if we have data for this specific timestamp
-        result = data_for_symbol.get(query_key)
-        if not result:
-            # Get available timestamps to help client troubleshoot
-            available_dates = sorted(set(ts.split()[0] for ts in data_for_symbol.keys()))
-            available_hours = sorted(set(int(ts.split()[1].split(':')[0]) for ts in data_for_symbol.keys()))
-            
-            logger.info(f"No data found for {symbol} at {query_key}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, 
-                detail={
-                    "message": f"No data for {symbol} at {query_key}",
-                    "available_dates": available_dates[:10],  # Limit to avoid excessive response size
-                    "available_hours": available_hours
-                }
-            )
-            
-        return {"symbol": symbol, "timestamp": query_key, "data": result}
+        lookup = functools.partial(_lookup_bar, stock_service, symbol, query_key, interval, mode)
+        cached = stock_service.is_availability_cached(symbol, interval)
+        return await stock_service.db_executor.run(lookup, inline=cached)
 
     except ValueError as ve:
         logger.warning(f"Validation error: {ve}")
@@ -4,7 +4,7 @@ import time
 import datetime
 import platform
 import psutil
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
 import os
@@ -15,7 +15,7 @@ from fang_service.core.db_service import StockDataService
 from fang_service.core.logging_config import get_logger
 from fang_service.app_variables import (
     DATADOG_ENABLED, DATADOG_ENV, FANG_SYMBOLS,
-    RUN_TYPE, FETCH_INTERVAL_HOURS
+    RUN_TYPE
 )
 # Import __version__ from the main package instead of app_variables
 from fang_service import __version__
@@ -71,6 +71,15 @@ class HealthResponse(BaseModel):
     database: DatabaseStats = Field(..., description="Database statistics")
     system: SystemMetrics = Field(..., description="System resource metrics")
 
+def _system_metrics() -> Dict[str, float]:
+    """Sample resource utilization (blocks for the 0.1s CPU sampling window)."""
+    return {
+        "cpu_percent": psutil.cpu_percent(interval=0.1),
+        "memory_percent": psutil.virtual_memory().percent,
+        "disk_percent": psutil.disk_usage('/').percent,
+        "process_memory_mb": psutil.Process().memory_info().rss / (1024 * 1024)
+    }
+
 @router.get(
     "/health", 
     response_model=HealthResponse,
@@ -91,11 +100,16 @@ async def health_check(response: Response, stock_service: StockDataService = Dep
     - "degraded": Some non-critical checks are failing
     - "unhealthy": Critical checks are failing
     
+    The database statistics and resource sampling block, so they run on the
+    database executor rather than the event loop.
+    
     Returns:
         Dict with detailed health status information
     """
-    # Get database statistics
-    service_stats = stock_service.get_cache_stats()
+    # Get database statistics and sample system resources (both blocking)
+    service_stats, system_metrics = await stock_service.db_executor.run(
+        lambda: (stock_service.get_cache_stats(), _system_metrics())
+    )
     
     # Determine overall health status
     is_healthy = True
@@ -108,9 +122,18 @@ async def health_check(response: Response, stock_service: StockDataService = Dep
         is_healthy = False
         status_reasons.append(f"Missing data for symbols: {', '.join(missing_symbols)}")
     
-    # Check cache age (if too old, service might be having issues)
-    cache_max_age_sec = FETCH_INTERVAL_HOURS * 3600 * 1.5  # 1.5x the fetch interval
-    if service_stats["cache_age_seconds"] and service_stats["cache_age_seconds"] > cache_max_age_sec:
+    # Check cache age (if too old, service might be having issues). With market-hours
+    # scheduling nothing is fetched while the market is closed, so data only counts
+    # as stale once it has been open for a full refresh interval
+    refresh_interval_sec = service_stats["scheduler"]["interval_seconds"]
+    cache_max_age_sec = refresh_interval_sec * 1.5  # 1.5x the refresh interval
+    market = service_stats["scheduler"].get("market")
+    age_expected_to_grow = market is not None and (market["open_for_seconds"] or 0) < refresh_interval_sec
+    if (
+        not age_expected_to_grow
+        and service_stats["cache_age_seconds"]
+        and service_stats["cache_age_seconds"] > cache_max_age_sec
+    ):
         is_healthy = False
         status_reasons.append(
             f"Data is stale: {int(service_stats['cache_age_seconds']//60)} minutes old "
@@ -118,7 +141,7 @@ async def health_check(response: Response, stock_service: StockDataService = Dep
         )
         
         # If cache is extremely stale (3x the interval), mark as critical
-        if service_stats["cache_age_seconds"] > FETCH_INTERVAL_HOURS * 3600 * 3:
+        if service_stats["cache_age_seconds"] > refresh_interval_sec * 3:
             is_critical = True
     
     # Check for multiple failed updates
@@ -130,14 +153,6 @@ async def health_check(response: Response, stock_service: StockDataService = Dep
         if service_stats["failed_updates"] > 5:
             is_critical = True
     
-    # Check system resource utilization
-    system_metrics = {
-        "cpu_percent": psutil.cpu_percent(interval=0.1),
-        "memory_percent": psutil.virtual_memory().percent,
-        "disk_percent": psutil.disk_usage('/').percent,
-        "process_memory_mb": psutil.Process().memory_info().rss / (1024 * 1024)
-    }
-    
     # Check for resource constraints
     if system_metrics["memory_percent"] > 90:
         is_healthy = False
@@ -232,21 +247,31 @@ async def ping() -> Dict[str, Any]:
     summary="Readiness check",
     response_description="Service readiness status"
 )
-async def readiness_check(stock_service: StockDataService = Depends()) -> Dict[str, Any]:
+async def readiness_check(request: Request, stock_service: StockDataService = Depends()) -> Dict[str, Any]:
     """
     Readiness check to determine if the service is ready to handle requests.
     
-    This endpoint checks if the database has been populated with data.
+    This endpoint checks if the database has been populated with data, and
+    reports not ready once shutdown has begun so load balancers stop routing
+    new requests here while in-flight ones finish.
     It's suitable for use with Kubernetes readiness probes.
     
     Returns:
         Dictionary with readiness status and details
         
     Raises:
-        HTTPException 503: If the service is not ready
+        HTTPException 503: If the service is not ready or is draining
     """
-    # Check if database has been initialized with any data
-    service_stats = stock_service.get_cache_stats()
+    drain = getattr(request.app.state, "drain", None)
+    if drain is not None and drain.draining:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"status": "draining", **drain.get_stats()}
+        )
+    
+    # Check if database has been initialized with any data (the stats query the
+    # database, so they are gathered off the event loop)
+    service_stats = await stock_service.db_executor.run(stock_service.get_cache_stats)
     
     if not service_stats["symbols_cached"]:
         # No symbols cached means the service isn't ready yet
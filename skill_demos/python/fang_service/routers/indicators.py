@@ -0,0 +1,97 @@
+# fang_service/routers/indicators.py
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Dict, Any, Optional, List
+import functools
+
+import numpy as np
+
+from fang_service.app_variables import INGEST_INTERVAL
+from fang_service.core.logging_config import get_logger
+from fang_service.core.db_service import StockDataService
+from fang_service.core.indicators import INDICATORS, indicator_params
+from fang_service.routers.get_stock import verify_api_key
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+# Decimal places kept in indicator values
+VALUE_PRECISION = 4
+
+def _to_json_list(values: np.ndarray) -> List[Optional[float]]:
+    """Round an indicator column and turn NaN warm-up values into null."""
+    rounded = np.round(values, VALUE_PRECISION)
+    return np.where(np.isnan(rounded), None, rounded).tolist()
+
+@router.get("/indicators", summary="Compute a rolling indicator over a symbol's series")
+async def get_indicator(
+    symbol: str = Query(..., description="Stock symbol (e.g., AMZN)"),
+    indicator: str = Query(..., description=f"Indicator: {', '.join(INDICATORS)}"),
+    interval: Optional[str] = Query(None, description="Bar interval (default: as ingested)"),
+    window: int = Query(20, ge=2, le=1000, description="Window/span in bars (sma, ema, stddev, channel)"),
+    periods: int = Query(1, ge=1, le=1000, description="Lookback in bars (pct_change)"),
+    limit: Optional[int] = Query(None, ge=1, description="Return only the most recent N points"),
+    _: bool = Depends(verify_api_key),
+    stock_service: StockDataService = Depends()
+) -> Dict[str, Any]:
+    """
+    Compute SMA, EMA, VWAP, rolling stddev, percent change or a high/low channel.
+
+    The whole stored series is used as input so windows are fully warmed up;
+    `limit` only trims what is returned. Results are memoized per
+    (symbol, indicator, params, interval, data version), so repeated requests
+    between refreshes don't recompute anything. A memoized result is returned
+    on the event loop; otherwise the request waits for a database worker.
+
+    Authentication required via x-api-key header.
+
+    Args:
+        symbol: Stock symbol
+        indicator: Indicator name
+        interval: Optional bar interval to roll the data up to first
+        window: Window/span for windowed indicators
+        periods: Lookback for pct_change
+        limit: Optional number of most recent points to return
+
+    Returns:
+        Columnar result: timestamps (oldest first) and one value list per output,
+        with null for points inside the warm-up window
+
+    Raises:
+        HTTPException 400: For an unknown indicator or invalid interval
+        HTTPException 404: If there is no data for the symbol
+    """
+    symbol = symbol.upper()
+
+    try:
+        compute = functools.partial(
+            stock_service.get_indicator, symbol, indicator, interval=interval, window=window, periods=periods
+        )
+        cached = stock_service.is_indicator_cached(symbol, indicator, interval, window=window, periods=periods)
+        result = await stock_service.db_executor.run(compute, inline=cached)
+    except ValueError as ve:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(ve))
+
+    if result is None:
+        logger.warning(f"No data found for symbol {symbol}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No data found for symbol {symbol}"
+        )
+
+    timestamps = result["timestamps"]
+    values = result["values"]
+    if limit is not None:
+        timestamps = timestamps[-limit:]
+        values = {name: column[-limit:] for name, column in values.items()}
+
+    return {
+        "symbol": symbol,
+        "indicator": indicator,
+        "interval": interval or INGEST_INTERVAL,
+        "params": dict(indicator_params(indicator, window, periods)),
+        "data_version": result["version"],
+        "points": len(timestamps),
+        "timestamps": timestamps.tolist(),
+        "values": {name: _to_json_list(column) for name, column in values.items()}
+    }
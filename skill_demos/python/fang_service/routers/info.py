@@ -7,7 +7,7 @@ from datetime import datetime, timedelta
 import platform
 import sys
 
-from fang_service.app_variables import FANG_SYMBOLS, MAX_CACHE_AGE_HOURS
+from fang_service.app_variables import FANG_SYMBOLS, MAX_CACHE_AGE_HOURS, INGEST_INTERVAL
 from fang_service import __version__  # Import from main package
 from fang_service.core.db_service import StockDataService
 
@@ -49,7 +49,7 @@ class APIInfo(BaseModel):
     summary="Get API documentation",
     response_description="Information about API usage and endpoints"
 )
-def get_info(stock_service: StockDataService = Depends()) -> Dict[str, Any]:
+async def get_info(stock_service: StockDataService = Depends()) -> Dict[str, Any]:
     """
     Provides comprehensive documentation for the FANG Stock Data API.
     
@@ -63,7 +63,7 @@ def get_info(stock_service: StockDataService = Depends()) -> Dict[str, Any]:
     generated_at = datetime.utcnow().isoformat() + "Z"
     
     # Get available symbols from database for more helpful documentation
-    available_symbols = stock_service.get_symbols_with_data()
+    available_symbols = await stock_service.db_executor.run(stock_service.get_symbols_with_data)
     
     # Calculate the data availability window
     data_start = datetime.utcnow() - timedelta(hours=MAX_CACHE_AGE_HOURS)
@@ -102,6 +102,20 @@ def get_info(stock_service: StockDataService = Depends()) -> Dict[str, Any]:
                         "type": "integer",
                         "required": True,
                         "example": "10"
+                    },
+                    {
+                        "name": "minute",
+                        "description": "Minute of the hour (0-59), for sub-hourly intervals",
+                        "type": "integer",
+                        "required": False,
+                        "example": "0"
+                    },
+                    {
+                        "name": "interval",
+                        "description": f"Bar interval (1min, 5min, 15min, 30min, 60min; multiples of {INGEST_INTERVAL})",
+                        "type": "string",
+                        "required": False,
+                        "example": "60min"
                     }
                 ],
                 "auth_required": True,
@@ -111,7 +125,15 @@ def get_info(stock_service: StockDataService = Depends()) -> Dict[str, Any]:
                 "endpoint": "/allData",
                 "method": "GET",
                 "description": "Fetch all available stock data for all FANG symbols",
-                "query_params": [],
+                "query_params": [
+                    {
+                        "name": "interval",
+                        "description": f"Optional bar interval (multiples of {INGEST_INTERVAL})",
+                        "type": "string",
+                        "required": False,
+                        "example": "60min"
+                    }
+                ],
                 "auth_required": True,
                 "rate_limited": True
             },
@@ -126,6 +148,95 @@ def get_info(stock_service: StockDataService = Depends()) -> Dict[str, Any]:
                         "type": "string",
                         "required": True,
                         "example": "NFLX"
+                    },
+                    {
+                        "name": "interval",
+                        "description": f"Optional bar interval (multiples of {INGEST_INTERVAL})",
+                        "type": "string",
+                        "required": False,
+                        "example": "60min"
+                    }
+                ],
+                "auth_required": True,
+                "rate_limited": True
+            },
+            {
+                "endpoint": "/batch",
+                "method": "POST",
+                "description": "Look up bars for many symbols in one request. JSON body: {\"items\": [{\"symbol\", \"timestamp\" | \"start\"/\"end\"}], \"interval\"}; an item with neither returns the latest bar",
+                "query_params": [],
+                "auth_required": True,
+                "rate_limited": True
+            },
+            {
+                "endpoint": "/stream",
+                "method": "GET",
+                "description": "Server-Sent Events: pushes the bars each update adds, per symbol. Also available as a WebSocket at /ws/stream",
+                "query_params": [
+                    {
+                        "name": "symbols",
+                        "description": "Comma-separated symbols to subscribe to (default: all)",
+                        "type": "string",
+                        "required": False,
+                        "example": "AMZN,NFLX"
+                    },
+                    {
+                        "name": "api_key",
+                        "description": "API key, for clients that can't set the x-api-key header",
+                        "type": "string",
+                        "required": False,
+                        "example": "your-service-api-key"
+                    }
+                ],
+                "auth_required": True,
+                "rate_limited": False
+            },
+            {
+                "endpoint": "/indicators",
+                "method": "GET",
+                "description": "Compute a rolling indicator (sma, ema, vwap, stddev, pct_change, channel) over a symbol's series",
+                "query_params": [
+                    {
+                        "name": "symbol",
+                        "description": "Stock symbol",
+                        "type": "string",
+                        "required": True,
+                        "example": "AMZN"
+                    },
+                    {
+                        "name": "indicator",
+                        "description": "Indicator name: sma, ema, vwap, stddev, pct_change or channel",
+                        "type": "string",
+                        "required": True,
+                        "example": "sma"
+                    },
+                    {
+                        "name": "window",
+                        "description": "Window/span in bars for sma, ema, stddev and channel (default 20)",
+                        "type": "integer",
+                        "required": False,
+                        "example": "20"
+                    },
+                    {
+                        "name": "periods",
+                        "description": "Lookback in bars for pct_change (default 1)",
+                        "type": "integer",
+                        "required": False,
+                        "example": "1"
+                    },
+                    {
+                        "name": "interval",
+                        "description": f"Optional bar interval (multiples of {INGEST_INTERVAL})",
+                        "type": "string",
+                        "required": False,
+                        "example": "60min"
+                    },
+                    {
+                        "name": "limit",
+                        "description": "Return only the most recent N points",
+                        "type": "integer",
+                        "required": False,
+                        "example": "100"
                     }
                 ],
                 "auth_required": True,
@@ -0,0 +1,177 @@
+# fang_service/routers/stream.py
+
+import json
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional, List, AsyncIterator
+
+from fang_service.app_variables import SERVICE_API_KEY, STREAM_HEARTBEAT_SECONDS
+from fang_service.core.logging_config import get_logger
+from fang_service.core.broadcaster import Subscription
+from fang_service.core.db_service import StockDataService
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+# WebSocket close code for a client dropped because it fell too far behind
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+
+# Sent to streaming clients when the instance shuts down
+SHUTDOWN_MESSAGE = {"reason": "server shutting down; reconnect and backfill from /symbolData"}
+
+def _parse_symbols(symbols: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated symbol filter; None or empty means all symbols."""
+    if not symbols:
+        return None
+    return [s for s in symbols.split(",") if s.strip()] or None
+
+def _stream_key_valid(headers, api_key: Optional[str]) -> bool:
+    """
+    Check the API key from the x-api-key header or the api_key query parameter.
+
+    Browsers can't set headers on EventSource or WebSocket connections, so the
+    streaming endpoints also accept the key as a query parameter.
+    """
+    return (headers.get("x-api-key") or api_key) == SERVICE_API_KEY
+
+def _subscribed_message(subscription: Subscription, stock_service: StockDataService) -> Dict[str, Any]:
+    return {
+        "symbols": sorted(subscription.symbols) if subscription.symbols else None,
+        "data_version": stock_service.data_version
+    }
+
+def _sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Event."""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+@router.get("/stream", summary="Server-Sent Events stream of new bars")
+async def stream_events(
+    request: Request,
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols (default: all)"),
+    api_key: Optional[str] = Query(None, description="API key, for clients that can't set headers"),
+    stock_service: StockDataService = Depends()
+) -> StreamingResponse:
+    """
+    Push the bars added by each published update as Server-Sent Events.
+
+    Emits a `subscribed` event, then one `bars` event per symbol update with
+    the new bars (newest first) and the data version as the event id. Idle
+    streams get a comment keepalive every STREAM_HEARTBEAT_SECONDS. A client
+    that falls too far behind receives a `dropped` event and the stream ends;
+    repeated updates to a symbol it hasn't consumed yet are coalesced. When the
+    instance shuts down, the stream ends with a `shutdown` event.
+
+    Authentication required via x-api-key header or api_key query parameter.
+
+    Args:
+        symbols: Optional comma-separated symbol filter
+        api_key: API key (alternative to the header)
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        HTTPException 401: If the API key is missing or invalid
+    """
+    if not _stream_key_valid(request.headers, api_key):
+        logger.warning("Invalid API key attempt")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing API key")
+
+    broadcaster = stock_service.broadcaster
+    subscription = broadcaster.subscribe(_parse_symbols(symbols))
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            yield _sse("subscribed", _subscribed_message(subscription, stock_service))
+            while not subscription.closed:
+                batch = await subscription.next_batch(STREAM_HEARTBEAT_SECONDS)
+                if subscription.dropped:
+                    yield _sse("dropped", {"reason": "client too slow; reconnect and backfill from /symbolData"})
+                    break
+                if await request.is_disconnected():
+                    break
+                if not batch:
+                    yield ": keepalive\n\n"
+                    continue
+                for delta in batch:
+                    yield _sse("bars", delta, event_id=delta["version"])
+            if broadcaster.closing:
+                yield _sse("shutdown", SHUTDOWN_MESSAGE)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws/stream")
+async def stream_websocket(
+    websocket: WebSocket,
+    symbols: Optional[str] = Query(None),
+    api_key: Optional[str] = Query(None),
+    stock_service: StockDataService = Depends()
+):
+    """
+    Push the bars added by each published update over a WebSocket.
+
+    Sends JSON messages typed `subscribed`, `bars`, `heartbeat`, `dropped`
+    and `shutdown`. The client may send {"symbols": [...]} (or {"symbols": null}
+    for all) at any time to change its subscription. Slow clients are coalesced
+    and, past the backlog limit, closed with code 1013 (try again later); on
+    shutdown, sockets are closed with code 1012 (service restart).
+
+    Authentication via x-api-key header or api_key query parameter; invalid
+    keys are closed with code 1008 (policy violation).
+    """
+    if not _stream_key_valid(websocket.headers, api_key):
+        logger.warning("Invalid API key attempt")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    broadcaster = stock_service.broadcaster
+    subscription = broadcaster.subscribe(_parse_symbols(symbols))
+
+    async def receive_subscriptions():
+        try:
+            while True:
+                message = await websocket.receive_json()
+                if isinstance(message, dict) and "symbols" in message:
+                    subscription.set_symbols(message["symbols"])
+                    await websocket.send_json({"type": "subscribed", **_subscribed_message(subscription, stock_service)})
+        except (WebSocketDisconnect, RuntimeError, ValueError):
+            pass
+        finally:
+            subscription.close()
+
+    receiver = asyncio.create_task(receive_subscriptions())
+    try:
+        await websocket.send_json({"type": "subscribed", **_subscribed_message(subscription, stock_service)})
+        while not subscription.closed:
+            batch = await subscription.next_batch(STREAM_HEARTBEAT_SECONDS)
+            if subscription.dropped:
+                await websocket.send_json({"type": "dropped", "reason": "client too slow; reconnect and backfill from /symbolData"})
+                await websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER)
+                break
+            if subscription.closed:
+                break
+            if not batch:
+                await websocket.send_json({"type": "heartbeat", "data_version": stock_service.data_version})
+                continue
+            for delta in batch:
+                await websocket.send_json({"type": "bars", **delta})
+        if broadcaster.closing and not subscription.dropped:
+            await websocket.send_json({"type": "shutdown", **SHUTDOWN_MESSAGE})
+            await websocket.close(code=status.WS_1012_SERVICE_RESTART)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        receiver.cancel()
+        broadcaster.unsubscribe(subscription)
@@ -13,7 +13,8 @@ project_root = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, project_root)
 
 from fang_service.core.db_models import init_db, insert_stock_data, get_db_stats
-from fang_service.app_variables import FANG_SYMBOLS
+from fang_service.core.timezones import get_zone
+from fang_service.app_variables import FANG_SYMBOLS, MARKET_TIMEZONE
 
 def load_seed_data(file_path):
     """Load stock data from a JSON file."""
@@ -31,7 +32,9 @@ def generate_test_data(symbols, hours=72):
     Returns:
         Dictionary of stock data by symbol and timestamp
     """
-    now = datetime.datetime.utcnow()
+    # Bars are labeled in exchange time, like Alpha Vantage's
+    exchange = get_zone(MARKET_TIMEZONE)
+    now = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
     
     # Initial price points for each symbol (realistic values as of 2023)
     base_prices = {
@@ -66,11 +69,11 @@ def generate_test_data(symbols, hours=72):
         for hour_offset in range(hours, 0, -1):
             # Only generate data for trading hours (9:30 AM - 4:00 PM ET, Monday-Friday)
             # This is a simplification - in reality, we'd need to account for holidays
-            timestamp = now - datetime.timedelta(hours=hour_offset)
+            # Step in UTC so DST changes neither skip nor repeat an hour
+            timestamp = (now - datetime.timedelta(hours=hour_offset)).astimezone(exchange)
             
             # Skip non-trading hours
-            hour_et = (timestamp.hour - 5) % 24  # Convert UTC to ET (simplified)
-            if hour_et < 9 or hour_et >= 16:
+            if timestamp.hour < 9 or timestamp.hour >= 16:
                 continue
                 
             # Skip weekends (0 = Monday, 6 = Sunday in Python's weekday())
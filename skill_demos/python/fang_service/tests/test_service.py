@@ -3,14 +3,66 @@
 import unittest
 from unittest.mock import patch, MagicMock, call
 import datetime
+import time
 import json
+import gzip
+import os
+import asyncio
+import threading
+import tempfile
+import sqlite3
+import atexit
+import shutil
+import numpy as np
+
+# Keep the database, snapshot and updater lock out of the source tree; must be
+# set before fang_service.core.db_models is imported
+TEST_DB_DIR = tempfile.mkdtemp(prefix="fang_service_tests_")
+os.environ["DB_DIR"] = TEST_DB_DIR
+atexit.register(shutil.rmtree, TEST_DB_DIR, ignore_errors=True)
+
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 
-from fang_service.core.data_fetcher import fetch_intraday_data, filter_data_past_72_hours
+from fang_service.core import data_fetcher
+from fang_service.core.data_fetcher import fetch_intraday_data, filter_data_past_72_hours, test_api_connectivity
+from fang_service.core.av_stub_server import AlphaVantageStubServer, StubBehavior
+from fang_service.core.exceptions import (
+    NetworkError, RateLimitError, DataRetrievalError, AuthenticationError, DeadlineExceededError,
+    FetchCancelledError
+)
 from fang_service.core.stocks_cache import StocksCache
+from fang_service.core.scheduler import RefreshScheduler
+from fang_service.core.market_calendar import MarketCalendar, load_holidays
+from fang_service.core.db_service import StockDataService
+from fang_service.core.db_models import (
+    get_db_connection, get_stock_data, upsert_stock_data_batch, _add_missing_columns,
+    get_db_path, checkpoint_wal, init_db, close_thread_connection
+)
+from fang_service.core.timezones import label_to_epoch, epoch_to_label, exchange_timezone
+from fang_service.core.series import SymbolSeries, rollup, validate_rollup_interval, parse_timestamp
+from fang_service.core.availability import AvailabilityIndex
+from fang_service.core.indicators import (
+    sma, ema, vwap, rolling_std, pct_change, channel, compute_indicator
+)
+from fang_service.core.broadcaster import UpdateBroadcaster
+from fang_service.core.compression import CompressionMiddleware, choose_encoding
+from fang_service.core.snapshot import write_snapshot, load_snapshot, SnapshotError
+from fang_service.core.updater_lock import UpdaterLock, FCNTL_AVAILABLE
+from fang_service.core.singleflight import SingleFlight
+from fang_service.core.blocking import BlockingExecutor
+from fang_service.core.drain import DrainController, DrainMiddleware
+from fang_service.core.circuit_breaker import CircuitBreaker, FailureBackoff
+from fang_service.core.providers.base import MarketDataProvider, make_bar
+from fang_service.core.providers.quota import QuotaTracker
+from fang_service.core.providers.replay import ReplayProvider
+from fang_service.core.providers.orchestrator import FetchOrchestrator
+from fang_service.core.encoders import (
+    negotiate_format, encode_arrow, FORMAT_JSON, FORMAT_MSGPACK, MSGPACK_AVAILABLE, ARROW_AVAILABLE
+)
 from fang_service.core.random_tests import run_random_tests
-from fang_service.main import app
-from fang_service.app_variables import SERVICE_API_KEY
+from fang_service.main import app, stock_service as main_stock_service
+from fang_service.app_variables import SERVICE_API_KEY, MARKET_HOLIDAYS_FILE, REPLAY_PATH
 
 class TestDataFetcher(unittest.TestCase):
     """Tests for the data_fetcher module"""
@@ -54,6 +106,27 @@ class TestDataFetcher(unittest.TestCase):
         # Assertions
         self.assertIsNone(result)
     
+    @patch('fang_service.core.data_fetcher.requests.get')
+    def test_rate_limit_backoff_is_cancellable(self, mock_get):
+        """Test a rate-limit backoff ends as soon as the cancellation token is set"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."}
+        mock_get.return_value = mock_response
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        
+        start = time.monotonic()
+        with self.assertRaises(FetchCancelledError) as ctx:
+            fetch_intraday_data("AAPL", cancel=cancel)
+        
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(ctx.exception.details["retry_after_seconds"], data_fetcher.RETRY_DELAY)
+        
+        with self.assertRaises(FetchCancelledError):
+            fetch_intraday_data("AAPL", cancel=cancel)
+        self.assertEqual(mock_get.call_count, 1)
+    
     def test_filter_data_past_72_hours(self):
         """Test filtering data to past 72 hours"""
         # Create test data
@@ -80,6 +153,80 @@ class TestDataFetcher(unittest.TestCase):
         self.assertEqual(filter_data_past_72_hours({}), {})
 
 
+class TestAlphaVantageStub(unittest.TestCase):
+    """Tests for the local Alpha Vantage stand-in server"""
+    
+    def _serve(self, **behavior):
+        """Start a stub with the given behavior and point the fetcher at it"""
+        stub = AlphaVantageStubServer(behavior=StubBehavior(**behavior)).start()
+        self.addCleanup(stub.stop)
+        for target in (
+            patch.object(data_fetcher, "ALPHAVANTAGE_BASE_URL", stub.base_url),
+            patch.object(data_fetcher.time, "sleep")  # Skip retry backoff
+        ):
+            target.start()
+            self.addCleanup(target.stop)
+        return stub
+    
+    def test_fetch_from_stub(self):
+        """Test a full-size fetch is served with synthetic bars"""
+        self._serve(full_bars=250)
+        
+        result = fetch_intraday_data("ZZZZ")
+        
+        self.assertEqual(len(result), 250)
+        bar = next(iter(result.values()))
+        self.assertEqual(set(bar), {"1. open", "2. high", "3. low", "4. close", "5. volume"})
+        # Deterministic per symbol
+        self.assertEqual(result, fetch_intraday_data("ZZZZ"))
+    
+    def test_note_responses_exhaust_retries(self):
+        """Test frequency Notes are retried and then surface as a NetworkError"""
+        stub = self._serve(note_rate=1.0)
+        
+        with self.assertRaises(NetworkError):
+            fetch_intraday_data("ZZZZ", max_retries=3)
+        self.assertEqual(stub.stats["notes"], 3)
+    
+    def test_daily_limit_information(self):
+        """Test the daily-limit Information response raises RateLimitError"""
+        stub = self._serve(information_rate=1.0)
+        
+        with self.assertRaises(RateLimitError):
+            fetch_intraday_data("ZZZZ")
+        self.assertEqual(stub.stats["requests"], 1)
+    
+    def test_error_burst_then_recovery(self):
+        """Test a 5xx burst is retried until the stub recovers"""
+        stub = self._serve(full_bars=10, error_burst_every=10, error_burst_length=2)
+        
+        result = fetch_intraday_data("ZZZZ")
+        
+        self.assertEqual(len(result), 10)
+        self.assertEqual(stub.stats["errors"], 2)
+    
+    def test_deadline_stops_retries(self):
+        """Test a retry that couldn't start before the deadline isn't made"""
+        stub = self._serve(error_burst_every=10, error_burst_length=2)
+        
+        with self.assertRaises(DeadlineExceededError):
+            fetch_intraday_data("ZZZZ", deadline=time.monotonic() + 5)
+        self.assertEqual(stub.stats["requests"], 1)
+        
+        with self.assertRaises(DeadlineExceededError):
+            fetch_intraday_data("ZZZZ", deadline=time.monotonic() - 1)
+        self.assertEqual(stub.stats["requests"], 1)
+    
+    def test_api_connectivity_against_stub(self):
+        """Test the connectivity probe succeeds against the stub"""
+        self._serve()
+        
+        success, message, details = test_api_connectivity()
+        
+        self.assertTrue(success, message)
+        self.assertEqual(details["api_url"], data_fetcher.ALPHAVANTAGE_BASE_URL)
+
+
 class TestStocksCache(unittest.TestCase):
     """Tests for the StocksCache class"""
     
@@ -143,6 +290,1545 @@ class TestStocksCache(unittest.TestCase):
         mock_thread_instance.start.assert_called_once()
 
 
+class TestRefreshScheduler(unittest.TestCase):
+    """Tests for the sharded refresh scheduler"""
+    
+    def setUp(self):
+        self.symbols = [f"SYM{i:03d}" for i in range(60)]
+        self.scheduler = RefreshScheduler(self.symbols, interval_seconds=3600, shard_count=6, persist=False)
+    
+    def test_new_symbols_due_immediately(self):
+        """Test never-refreshed symbols are all due right away"""
+        due = self.scheduler.pop_due()
+        self.assertEqual(sorted(due), self.symbols)
+        # Claimed symbols aren't handed out twice
+        self.assertEqual(self.scheduler.pop_due(), [])
+    
+    def test_shards_are_staggered(self):
+        """Test each shard's next slot falls at its own phase of the interval"""
+        now = float(int(time.time()) + 1)
+        for symbol in self.scheduler.pop_due(now=now):
+            self.scheduler.mark_done(symbol, True, now=now)
+        
+        for symbol in self.symbols:
+            phase = self.scheduler.shard_of(symbol) * 600
+            next_due = self.scheduler._due[symbol]
+            self.assertGreater(next_due, now)
+            self.assertLessEqual(next_due - now, 3600)
+            self.assertEqual(next_due % 3600, phase)
+        
+        # Only the first shard to come due is claimed at its slot
+        first_due = self.scheduler.next_due_time()
+        batch = self.scheduler.pop_due(now=first_due)
+        self.assertTrue(batch)
+        self.assertEqual(len({self.scheduler.shard_of(s) for s in batch}), 1)
+    
+    def test_limit_and_stats(self):
+        """Test pop_due honors the limit and stats report in-flight symbols"""
+        batch = self.scheduler.pop_due(limit=5)
+        
+        self.assertEqual(len(batch), 5)
+        stats = self.scheduler.get_stats()
+        self.assertEqual(stats["symbols"], 60)
+        self.assertEqual(stats["in_flight"], 5)
+        self.assertEqual(sum(stats["shard_sizes"]), 60)
+
+
+class TestMarketCalendar(unittest.TestCase):
+    """Tests for market-hours sessions and calendar-aware scheduling"""
+    
+    def setUp(self):
+        self.calendar = MarketCalendar(holidays=load_holidays(MARKET_HOLIDAYS_FILE))
+    
+    def _et(self, *args) -> float:
+        return datetime.datetime(*args, tzinfo=self.calendar.timezone).timestamp()
+    
+    def test_sessions_holidays_and_early_closes(self):
+        """Test sessions on a normal day, a weekend, a holiday and an early close"""
+        self.assertEqual(self.calendar.session(self._et(2026, 10, 19, 5, 0)), "pre")
+        self.assertEqual(self.calendar.session(self._et(2026, 10, 19, 10, 0)), "regular")
+        self.assertEqual(self.calendar.session(self._et(2026, 10, 19, 19, 59)), "post")
+        self.assertEqual(self.calendar.session(self._et(2026, 10, 19, 20, 0)), "closed")
+        self.assertEqual(self.calendar.session(self._et(2026, 10, 17, 12, 0)), "closed")
+        self.assertEqual(self.calendar.session(self._et(2026, 11, 26, 12, 0)), "closed")
+        self.assertEqual(self.calendar.session(self._et(2026, 11, 27, 14, 0)), "post")
+        self.assertEqual(self.calendar.session(self._et(2026, 11, 27, 17, 30)), "closed")
+        
+        # Friday evening to Monday pre-market
+        self.assertEqual(self.calendar.next_open(self._et(2026, 10, 16, 20, 30)), self._et(2026, 10, 19, 4, 0))
+        self.assertEqual(self.calendar.session_start(self._et(2026, 10, 19, 10, 0)), self._et(2026, 10, 19, 4, 0))
+    
+    def test_scheduler_skips_closed_market(self):
+        """Test refreshes land just after bar close and skip nights and weekends"""
+        scheduler = RefreshScheduler(["AAPL"], interval_seconds=3600, persist=False,
+                                     calendar=self.calendar, offset_seconds=90)
+        
+        # The last bar of Friday's post-market is still fetched after it closes
+        self.assertEqual(scheduler.next_slot("AAPL", self._et(2026, 10, 16, 19, 30)), self._et(2026, 10, 16, 20, 1, 30))
+        # Then nothing until Monday's first pre-market bar has closed
+        self.assertEqual(scheduler.next_slot("AAPL", self._et(2026, 10, 16, 20, 1, 30)), self._et(2026, 10, 19, 5, 1, 30))
+        
+        regular_only = RefreshScheduler(["AAPL"], interval_seconds=3600, persist=False,
+                                        calendar=MarketCalendar(extended_hours=False), offset_seconds=90)
+        self.assertEqual(regular_only.next_slot("AAPL", self._et(2026, 10, 16, 16, 30)), self._et(2026, 10, 19, 10, 1, 30))
+        self.assertEqual(regular_only.get_stats()["market"]["extended_hours"], False)
+
+
+class TestStockDataService(unittest.TestCase):
+    """Tests for the StockDataService updater"""
+    
+    def setUp(self):
+        self.service = StockDataService()
+    
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data')
+    def test_update_publishes_each_symbol(self, mock_fetch):
+        """Test every refreshed symbol is stored and gets its own data version"""
+        now = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        mock_fetch.return_value = {
+            now.strftime("%Y-%m-%d %H:%M:%S"): {
+                "1. open": "100.0", "2. high": "101.0", "3. low": "99.0",
+                "4. close": "100.5", "5. volume": "1000"
+            }
+        }
+        
+        result = self.service.update_cache()
+        
+        self.assertTrue(result)
+        self.assertEqual(self.service.data_version, len(self.service.symbols))
+        self.assertEqual(set(self.service.symbol_versions), set(self.service.symbols))
+        self.assertIn(now.strftime("%Y-%m-%d %H:%M:%S"), self.service.get_data(self.service.symbols[0]))
+        # Refreshed symbols aren't due again until their next slot
+        self.assertEqual(self.service.scheduler.pop_due(), [])
+    
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data')
+    def test_failed_symbol_not_published(self, mock_fetch):
+        """Test a failing symbol doesn't block or publish, while others land"""
+        failing = self.service.symbols[0]
+        
+        def fetch(symbol, **kwargs):
+            if symbol == failing:
+                raise NetworkError("boom")
+            ts = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:00:00")
+            return {ts: {"1. open": "1", "2. high": "1", "3. low": "1", "4. close": "1", "5. volume": "1"}}
+        mock_fetch.side_effect = fetch
+        
+        result = self.service.update_cache()
+        
+        self.assertFalse(result)
+        self.assertNotIn(failing, self.service.symbol_versions)
+        self.assertEqual(len(self.service.symbol_versions), len(self.service.symbols) - 1)
+    
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data')
+    def test_unchanged_bars_not_rewritten(self, mock_fetch):
+        """Test a repeated fetch writes nothing and keeps the version, and a correction is a revision"""
+        symbol = self.service.symbols[0]
+        ts = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        bar = {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "10"}
+        mock_fetch.return_value = {ts: bar}
+        
+        self.assertTrue(self.service.update_cache([symbol]))
+        version = self.service.symbol_versions[symbol]
+        self.assertTrue(self.service.update_cache([symbol]))
+        self.assertEqual(self.service.symbol_versions[symbol], version)
+        self.assertEqual(self.service.ingest_counts["unchanged"], 1)
+        
+        mock_fetch.return_value = {ts: {**bar, "4. close": "1.75"}}
+        self.assertTrue(self.service.update_cache([symbol]))
+        
+        self.assertGreater(self.service.symbol_versions[symbol], version)
+        self.assertEqual(self.service.get_data(symbol)[ts]["4. close"], "1.75")
+        self.assertEqual(self.service.ingest_counts, {"inserted": 1, "revised": 1, "unchanged": 1})
+        with get_db_connection() as conn:
+            row = conn.execute(
+                "SELECT revision FROM stock_data WHERE symbol = ? AND timestamp = ?", (symbol, ts)
+            ).fetchone()
+        self.assertEqual(row["revision"], 1)
+    
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_encoded_json_cached_per_version(self, mock_get):
+        """Test pre-encoded bars match get_data and are rebuilt only after a publish"""
+        bars = {"2023-03-24 10:00:00": {"1. open": "1.0", "2. high": "2.0", "3. low": "0.5", "4. close": "1.5", "5. volume": "5"}}
+        mock_get.return_value = bars
+        
+        encoded = self.service.get_data_json("aapl")
+        
+        self.assertEqual(json.loads(encoded), bars)
+        self.assertIs(self.service.get_data_json("AAPL"), encoded)
+        self.assertEqual(mock_get.call_count, 1)
+        
+        self.service._publish("AAPL")
+        self.service.get_data_json("AAPL")
+        self.assertEqual(mock_get.call_count, 2)
+        
+        mock_get.return_value = {}
+        self.assertIsNone(self.service.get_data_json("MSFT"))
+
+
+class TestTimestampStorage(unittest.TestCase):
+    """Tests for UTC epoch storage of exchange-time bar labels"""
+    
+    def setUp(self):
+        self.bar = {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "10"}
+        # A fresh database per test, so rows written by earlier runs or tests can't leak in
+        self.tmpdir = tempfile.TemporaryDirectory()
+        close_thread_connection()
+        self.db_patch = patch('fang_service.core.db_models.DB_PATH', os.path.join(self.tmpdir.name, "fang.db"))
+        self.db_patch.start()
+        init_db()
+    
+    def tearDown(self):
+        close_thread_connection()
+        self.db_patch.stop()
+        self.tmpdir.cleanup()
+    
+    def test_label_conversion_follows_dst(self):
+        """Test labels convert in the exchange timezone, including across DST"""
+        self.assertEqual(label_to_epoch("2024-01-10 10:00:00", "America/New_York"), 1704898800)
+        self.assertEqual(label_to_epoch("2024-07-10 10:00:00", "America/New_York"), 1720620000)
+        self.assertEqual(epoch_to_label(1720620000, "America/New_York"), "2024-07-10 10:00:00")
+        self.assertEqual(epoch_to_label(1720620000, "UTC"), "2024-07-10 14:00:00")
+    
+    @patch('fang_service.core.db_models.MAX_CACHE_AGE_HOURS', 1)
+    def test_cutoff_compares_epochs(self):
+        """Test the retention window is applied in real time, not by comparing labels with UTC"""
+        timezone = exchange_timezone("TZTEST")
+        recent = epoch_to_label(int(time.time()) - 1800, timezone)
+        stale = epoch_to_label(int(time.time()) - 7200, timezone)
+        self.assertIsNotNone(upsert_stock_data_batch("TZTEST", {recent: self.bar, stale: self.bar}))
+        
+        self.assertEqual(list(get_stock_data("TZTEST")), [recent])
+        with get_db_connection() as conn:
+            row = conn.execute("SELECT timezone FROM symbol_timezones WHERE symbol = 'TZTEST'").fetchone()
+        self.assertEqual(row["timezone"], timezone)
+    
+    def test_legacy_rows_get_epochs(self):
+        """Test a database from before epoch storage is converted on startup"""
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        conn.executescript("""
+        CREATE TABLE stock_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, symbol TEXT NOT NULL, timestamp TEXT NOT NULL,
+            open REAL NOT NULL, high REAL NOT NULL, low REAL NOT NULL, close REAL NOT NULL,
+            volume INTEGER NOT NULL, created_at TEXT NOT NULL, UNIQUE(symbol, timestamp)
+        );
+        CREATE TABLE symbol_timezones (symbol TEXT PRIMARY KEY, timezone TEXT NOT NULL);
+        INSERT INTO stock_data (symbol, timestamp, open, high, low, close, volume, created_at)
+        VALUES ('AAPL', '2024-07-10 10:00:00', 1, 2, 0.5, 1.5, 10, '');
+        """)
+        
+        _add_missing_columns(conn)
+        
+        row = conn.execute("SELECT ts_epoch, revision FROM stock_data").fetchone()
+        self.assertEqual(row["ts_epoch"], label_to_epoch("2024-07-10 10:00:00", exchange_timezone("AAPL")))
+        self.assertEqual(row["revision"], 0)
+        conn.close()
+
+
+class TestSeriesRollups(unittest.TestCase):
+    """Tests for columnar series and interval rollups"""
+    
+    def setUp(self):
+        # Six 5-minute bars from 10:00 to 10:25
+        self.bars = {
+            f"2023-03-24 10:{m:02d}:00": {
+                "1. open": str(100.0 + i), "2. high": str(110.0 + i), "3. low": str(90.0 - i),
+                "4. close": str(101.0 + i), "5. volume": str(10 * (i + 1))
+            }
+            for i, m in enumerate(range(0, 30, 5))
+        }
+    
+    def test_round_trip(self):
+        """Test bars survive conversion to columns and back"""
+        series = SymbolSeries.from_bars(self.bars)
+        
+        self.assertEqual(len(series), 6)
+        self.assertEqual(series.to_bars(), {
+            ts: {k: str(float(v)) if k != "5. volume" else v for k, v in bar.items()}
+            for ts, bar in sorted(self.bars.items(), reverse=True)
+        })
+    
+    def test_rollup_ohlcv(self):
+        """Test 5min bars roll up to 15min with first/max/min/last/sum"""
+        rolled = rollup(SymbolSeries.from_bars(self.bars), 15).to_bars()
+        
+        self.assertEqual(list(rolled), ["2023-03-24 10:15:00", "2023-03-24 10:00:00"])
+        self.assertEqual(rolled["2023-03-24 10:00:00"], {
+            "1. open": "100.0", "2. high": "112.0", "3. low": "88.0", "4. close": "103.0", "5. volume": "60"
+        })
+        self.assertEqual(rolled["2023-03-24 10:15:00"]["5. volume"], "150")
+    
+    def test_invalid_rollup_interval(self):
+        """Test finer or unsupported intervals are rejected"""
+        self.assertEqual(validate_rollup_interval("60min", "5min"), "60min")
+        with self.assertRaises(ValueError):
+            validate_rollup_interval("1min", "5min")
+        with self.assertRaises(ValueError):
+            validate_rollup_interval("2min", "1min")
+    
+    @patch('fang_service.core.db_service.INGEST_INTERVAL', "5min")
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_service_caches_rollups_per_version(self, mock_get):
+        """Test rollups are computed once per symbol version"""
+        mock_get.return_value = self.bars
+        service = StockDataService()
+        
+        first = service.get_data("aapl", interval="15min")
+        second = service.get_data("AAPL", interval="30min")
+        service.get_data("AAPL", interval="15min")
+        
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(mock_get.call_count, 1)  # Base series loaded once
+        
+        # Publishing a new version invalidates the cached rollups
+        service._publish("AAPL")
+        service.get_data("AAPL", interval="15min")
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class TestIndicators(unittest.TestCase):
+    """Tests for the indicator kernels and their memoization"""
+    
+    def setUp(self):
+        # Hourly bars over two days; close rises by 1 each bar
+        self.bars = {
+            f"2023-03-{day} {hour:02d}:00:00": {
+                "1. open": str(100.0 + i), "2. high": str(102.0 + i), "3. low": str(99.0 + i),
+                "4. close": str(101.0 + i), "5. volume": "10"
+            }
+            for i, (day, hour) in enumerate([(23, h) for h in range(10, 15)] + [(24, h) for h in range(10, 15)])
+        }
+    
+    def test_windowed_kernels(self):
+        """Test SMA, stddev, pct_change and channel against hand-computed values"""
+        x = np.array([1.0, 2.0, 3.0, 4.0, 8.0])
+        
+        np.testing.assert_allclose(sma(x, 2), [np.nan, 1.5, 2.5, 3.5, 6.0])
+        np.testing.assert_allclose(rolling_std(x, 3)[2:], [1.0, 1.0, np.std([3, 4, 8], ddof=1)])
+        np.testing.assert_allclose(pct_change(x, 2), [np.nan, np.nan, 200.0, 100.0, 500.0 / 3])
+        upper, lower = channel(x + 1, x - 1, 2)
+        np.testing.assert_allclose(upper, [np.nan, 3.0, 4.0, 5.0, 9.0])
+        np.testing.assert_allclose(lower, [np.nan, 0.0, 1.0, 2.0, 3.0])
+    
+    def test_ema_matches_recurrence(self):
+        """Test the blockwise closed-form EMA matches the plain recurrence"""
+        x = np.random.default_rng(1).uniform(50, 150, 3000)
+        for span in (2, 20, 200):
+            alpha = 2.0 / (span + 1)
+            expected = [x[0]]
+            for value in x[1:]:
+                expected.append(alpha * value + (1 - alpha) * expected[-1])
+            np.testing.assert_allclose(ema(x, span), expected, rtol=1e-10)
+    
+    def test_vwap_resets_each_day(self):
+        """Test VWAP restarts at the first bar of each day"""
+        result = vwap(SymbolSeries.from_bars(self.bars))
+        
+        # Equal volumes: VWAP is the running mean of typical price within the day
+        self.assertAlmostEqual(result[0], (102.0 + 99.0 + 101.0) / 3)
+        self.assertAlmostEqual(result[5], (107.0 + 104.0 + 106.0) / 3)
+        self.assertAlmostEqual(result[6], (result[5] + (108.0 + 105.0 + 107.0) / 3) / 2)
+    
+    def test_unknown_indicator(self):
+        """Test unknown indicators and bad params are rejected"""
+        series = SymbolSeries.from_bars(self.bars)
+        with self.assertRaises(ValueError):
+            compute_indicator("rsi", series)
+        with self.assertRaises(ValueError):
+            compute_indicator("sma", series, window=1)
+    
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_service_memoizes_per_version(self, mock_get):
+        """Test repeated indicator requests are cache hits until a new version is published"""
+        mock_get.return_value = self.bars
+        service = StockDataService()
+        
+        first = service.get_indicator("aapl", "sma", window=3)
+        self.assertIs(service.get_indicator("AAPL", "sma", window=3), first)
+        # periods is irrelevant to SMA, so it shares the cache entry
+        self.assertIs(service.get_indicator("AAPL", "sma", window=3, periods=5), first)
+        self.assertIsNot(service.get_indicator("AAPL", "sma", window=4), first)
+        np.testing.assert_allclose(first["values"]["sma"][2:4], [102.0, 103.0])
+        
+        service._publish("AAPL")
+        self.assertIsNot(service.get_indicator("AAPL", "sma", window=3), first)
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class TestBatchLookups(unittest.TestCase):
+    """Tests for multi-symbol batch lookups"""
+    
+    def setUp(self):
+        self.bars = {
+            f"2023-03-24 {hour:02d}:00:00": {
+                "1. open": "1.0", "2. high": "2.0", "3. low": "0.5", "4. close": str(float(hour)), "5. volume": "5"
+            }
+            for hour in range(10, 16)
+        }
+    
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_batch_resolves_in_order(self, mock_get):
+        """Test points, ranges, latest and missing symbols come back in request order"""
+        mock_get.side_effect = lambda symbol: self.bars if symbol in ("AAPL", "MSFT") else {}
+        service = StockDataService()
+        
+        results = service.get_batch([
+            {"symbol": "msft"},
+            {"symbol": "AAPL", "timestamp": "2023-03-24 11:00:00"},
+            {"symbol": "NOPE"},
+            {"symbol": "AAPL", "start": "2023-03-24 13:00:00", "end": "2023-03-24 14:00:00"},
+            {"symbol": "AAPL", "timestamp": "2023-03-24 11:30:00"},
+            {"symbol": "AAPL", "start": "2023-03-24 14:00:00"}
+        ])
+        
+        self.assertEqual([r["symbol"] for r in results], ["MSFT", "AAPL", "NOPE", "AAPL", "AAPL", "AAPL"])
+        self.assertEqual(list(results[0]["bars"]), ["2023-03-24 15:00:00"])
+        self.assertEqual(results[1]["bars"]["2023-03-24 11:00:00"]["4. close"], "11.0")
+        self.assertFalse(results[2]["found"])
+        self.assertEqual(list(results[3]["bars"]), ["2023-03-24 14:00:00", "2023-03-24 13:00:00"])
+        self.assertFalse(results[4]["found"])
+        self.assertEqual(len(results[5]["bars"]), 2)
+        
+        # One series load per distinct symbol
+        self.assertEqual(mock_get.call_count, 3)
+    
+    def test_batch_rejects_bad_timestamp(self):
+        """Test an unparseable timestamp fails the whole batch"""
+        service = StockDataService()
+        with self.assertRaises(ValueError):
+            service.get_batch([{"symbol": "AAPL", "timestamp": "yesterday"}])
+
+
+class TestAvailability(unittest.TestCase):
+    """Tests for the per-symbol date/hour availability index"""
+    
+    def setUp(self):
+        self.bars = {
+            f"2023-03-{day} {hour:02d}:00:00": {
+                "1. open": "1.0", "2. high": "2.0", "3. low": "0.5", "4. close": "1.5", "5. volume": "5"
+            }
+            for day, hours in (("23", (9, 10)), ("24", (10, 11, 15)))
+            for hour in hours
+        }
+    
+    def test_index_answers_misses(self):
+        """Test dates, hour bitmaps and the nearest bar"""
+        index = AvailabilityIndex(SymbolSeries.from_bars(self.bars).timestamps)
+        
+        self.assertEqual(index.dates, ["2023-03-23", "2023-03-24"])
+        self.assertEqual(index.hours, [9, 10, 11, 15])
+        hints = index.describe_miss(parse_timestamp("2023-03-24 13:00:00"))
+        self.assertEqual(hints["hours_on_date"], [10, 11, 15])
+        self.assertEqual(hints["nearest_timestamp"], "2023-03-24 11:00:00")
+        self.assertEqual(index.hours_on(parse_timestamp("2023-03-25 10:00:00")), [])
+        self.assertEqual(index.nearest(parse_timestamp("2024-01-01 00:00:00")), parse_timestamp("2023-03-24 15:00:00"))
+    
+    def test_as_of_resolution(self):
+        """Test exact, prev, next and nearest lookups by binary search"""
+        index = AvailabilityIndex(SymbolSeries.from_bars(self.bars).timestamps)
+        at = parse_timestamp("2023-03-24 10:30:00")
+        
+        self.assertIsNone(index.resolve(at, "exact"))
+        self.assertEqual(index.resolve(parse_timestamp("2023-03-24 10:00:00"), "exact"), parse_timestamp("2023-03-24 10:00:00"))
+        self.assertEqual(index.resolve(at, "prev"), parse_timestamp("2023-03-24 10:00:00"))
+        self.assertEqual(index.resolve(at, "next"), parse_timestamp("2023-03-24 11:00:00"))
+        self.assertIsNone(index.resolve(parse_timestamp("2023-03-23 08:00:00"), "prev"))
+        self.assertIsNone(index.resolve(parse_timestamp("2023-03-24 16:00:00"), "next"))
+        with self.assertRaises(ValueError):
+            index.resolve(at, "closest")
+    
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_index_cached_per_version(self, mock_get):
+        """Test the service builds the index once per symbol version"""
+        mock_get.return_value = self.bars
+        service = StockDataService()
+        
+        index = service.get_availability("aapl")
+        self.assertIs(service.get_availability("AAPL"), index)
+        service._publish("AAPL")
+        self.assertIsNot(service.get_availability("AAPL"), index)
+        
+        mock_get.return_value = {}
+        self.assertIsNone(service.get_availability("NOPE"))
+    
+    def test_get_stock_miss_suggests_nearest(self):
+        """Test a /getStock miss lists what is available near the request"""
+        client = TestClient(app)
+        with patch('fang_service.core.db_service.get_stock_data', return_value=self.bars), \
+             patch.object(main_stock_service, 'symbol_versions', {"AVIDX": 1}):
+            response = client.get(
+                "/api/getStock?symbol=avidx&date=2023-03-24&hour=14",
+                headers={"x-api-key": SERVICE_API_KEY}
+            )
+        
+        self.assertEqual(response.status_code, 404)
+        detail = response.json()["detail"]
+        self.assertEqual(detail["available_dates"], ["2023-03-23", "2023-03-24"])
+        self.assertEqual(detail["hours_on_date"], [10, 11, 15])
+        self.assertEqual(detail["nearest_timestamp"], "2023-03-24 15:00:00")
+    
+    def test_get_stock_as_of_modes(self):
+        """Test /getStock resolves prev/next lookups to the bar it found"""
+        client = TestClient(app)
+        headers = {"x-api-key": SERVICE_API_KEY}
+        with patch('fang_service.core.db_service.get_stock_data', return_value=self.bars), \
+             patch.object(main_stock_service, 'symbol_versions', {"AVIDX": 1}):
+            prev = client.get("/api/getStock?symbol=AVIDX&date=2023-03-24&hour=14&mode=prev", headers=headers)
+            following = client.get("/api/getStock?symbol=AVIDX&date=2023-03-24&hour=12&minute=30&mode=next", headers=headers)
+            exact = client.get("/api/getStock?symbol=AVIDX&date=2023-03-24&hour=11", headers=headers)
+            past_end = client.get("/api/getStock?symbol=AVIDX&date=2023-03-25&hour=9&mode=next", headers=headers)
+            bad_mode = client.get("/api/getStock?symbol=AVIDX&date=2023-03-24&hour=11&mode=closest", headers=headers)
+        
+        self.assertEqual(prev.status_code, 200)
+        self.assertEqual(prev.json()["timestamp"], "2023-03-24 11:00:00")
+        self.assertEqual(prev.json()["requested_timestamp"], "2023-03-24 14:00:00")
+        self.assertEqual(following.json()["timestamp"], "2023-03-24 15:00:00")
+        self.assertNotIn("requested_timestamp", exact.json())
+        self.assertEqual(past_end.status_code, 404)
+        self.assertEqual(past_end.json()["detail"]["nearest_timestamp"], "2023-03-24 15:00:00")
+        self.assertEqual(bad_mode.status_code, 400)
+
+
+class TestBlockingExecutor(unittest.TestCase):
+    """Tests for async handlers offloading blocking work to a sized pool"""
+    
+    def setUp(self):
+        self.bars = {
+            f"2023-03-24 {hour:02d}:00:00": {
+                "1. open": "1.0", "2. high": "2.0", "3. low": "0.5", "4. close": "1.5", "5. volume": "10"
+            }
+            for hour in range(10, 14)
+        }
+    
+    def test_run_offloads_unless_inline(self):
+        """Test blocking calls run on the pool's workers and inline calls on the loop"""
+        executor = BlockingExecutor(2, thread_name_prefix="TestDB")
+        
+        async def scenario():
+            offloaded = await asyncio.gather(*(executor.run(lambda: threading.current_thread().name) for _ in range(4)))
+            inline = await executor.run(lambda: threading.current_thread().name, inline=True)
+            return offloaded, inline
+        
+        offloaded, inline = asyncio.run(scenario())
+        executor.shutdown()
+        
+        self.assertTrue(all(name.startswith("TestDB") for name in offloaded))
+        self.assertEqual(inline, threading.current_thread().name)
+        stats = executor.get_stats()
+        self.assertEqual((stats["submitted"], stats["completed"], stats["served_inline"]), (4, 4, 1))
+        self.assertEqual((stats["active"], stats["queued"]), (0, 0))
+        self.assertGreaterEqual(stats["max_queued"], 2)
+    
+    def test_cancelled_call_leaves_the_queue(self):
+        """Test a call abandoned before it starts is dropped and not counted as queued"""
+        executor = BlockingExecutor(1)
+        release = threading.Event()
+        
+        async def scenario():
+            blocker = asyncio.ensure_future(executor.run(release.wait))
+            waiting = asyncio.ensure_future(executor.run(lambda: "never"))
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            await blocker
+        
+        asyncio.run(scenario())
+        executor.shutdown()
+        stats = executor.get_stats()
+        self.assertEqual((stats["cancelled"], stats["completed"], stats["queued"]), (1, 1, 0))
+    
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_peek_only_returns_current_json(self, mock_get):
+        """Test peek_data_json never loads, and misses once the symbol is republished"""
+        mock_get.return_value = self.bars
+        service = StockDataService()
+        service._publish("PEEK")
+        
+        self.assertIsNone(service.peek_data_json("PEEK"))
+        mock_get.assert_not_called()
+        encoded = service.get_data_json("PEEK")
+        self.assertEqual(service.peek_data_json("peek"), encoded)
+        self.assertFalse(service.is_cached("PEEK"))
+        service.get_series("PEEK")
+        self.assertTrue(service.is_cached("PEEK"))
+        
+        service._publish("PEEK")
+        self.assertIsNone(service.peek_data_json("PEEK"))
+        self.assertFalse(service.is_cached("PEEK"))
+        with self.assertRaises(ValueError):
+            service.is_cached("PEEK", "7min")
+    
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_derived_structures_count_as_cached_only_once_built(self, mock_get):
+        """Test a cached series alone doesn't send availability or indicator reads to the loop"""
+        mock_get.return_value = self.bars
+        service = StockDataService()
+        service._publish("DERIV")
+        service.get_series("DERIV")
+        
+        self.assertTrue(service.is_cached("DERIV"))
+        self.assertFalse(service.is_availability_cached("DERIV"))
+        self.assertFalse(service.is_indicator_cached("DERIV", "sma", window=2))
+        service.get_availability("DERIV")
+        service.get_indicator("DERIV", "sma", window=2)
+        self.assertTrue(service.is_availability_cached("deriv"))
+        self.assertTrue(service.is_indicator_cached("DERIV", "sma", window=2))
+        self.assertFalse(service.is_indicator_cached("DERIV", "sma", window=3))
+        
+        service._publish("DERIV")
+        service.get_series("DERIV")
+        self.assertFalse(service.is_availability_cached("DERIV"))
+        self.assertFalse(service.is_indicator_cached("DERIV", "sma", window=2))
+    
+    def test_cached_lookups_skip_the_executor(self):
+        """Test /getStock goes to a DB worker on a miss and is answered on the loop once cached"""
+        client = TestClient(app)
+        headers = {"x-api-key": SERVICE_API_KEY}
+        with patch('fang_service.core.db_service.get_stock_data', return_value=self.bars), \
+             patch.object(main_stock_service, 'symbol_versions', {"ASYNCX": 1}):
+            before = main_stock_service.db_executor.get_stats()
+            first = client.get("/api/getStock?symbol=ASYNCX&date=2023-03-24&hour=11", headers=headers)
+            second = client.get("/api/getStock?symbol=ASYNCX&date=2023-03-24&hour=12", headers=headers)
+            after = main_stock_service.db_executor.get_stats()
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json()["data"], self.bars["2023-03-24 12:00:00"])
+        self.assertEqual(after["submitted"] - before["submitted"], 1)
+        self.assertEqual(after["served_inline"] - before["served_inline"], 1)
+        
+        status = client.get("/api/status").json()
+        self.assertEqual(status["database"]["executor"]["workers"], main_stock_service.db_executor.max_workers)
+
+
+class TestStreaming(unittest.TestCase):
+    """Tests for pushing published bars to streaming clients"""
+    
+    def setUp(self):
+        self.bars = {
+            f"2023-03-24 {hour:02d}:00:00": {
+                "1. open": "1.0", "2. high": "2.0", "3. low": "0.5", "4. close": str(float(hour)), "5. volume": "5"
+            }
+            for hour in range(10, 14)
+        }
+    
+    def test_slow_subscriber_coalesced_then_dropped(self):
+        """Test repeated updates coalesce per symbol and a backlog over the limit drops the client"""
+        async def scenario():
+            broadcaster = UpdateBroadcaster(max_pending=2, max_bars=10)
+            subscription = broadcaster.subscribe(["aapl", "MSFT", "GOOG"])
+            
+            broadcaster.publish("AAPL", 1, {"2023-03-24 10:00:00": {"4. close": "1"}})
+            broadcaster.publish("AAPL", 2, {"2023-03-24 11:00:00": {"4. close": "2"}})
+            broadcaster.publish("NFLX", 3, {"2023-03-24 11:00:00": {"4. close": "9"}})  # Not subscribed
+            batch = await subscription.next_batch(timeout=1)
+            
+            self.assertEqual(len(batch), 1)
+            self.assertEqual(batch[0]["version"], 2)
+            self.assertEqual(list(batch[0]["bars"]), ["2023-03-24 11:00:00", "2023-03-24 10:00:00"])
+            self.assertEqual(batch[0]["coalesced"], 1)
+            
+            for version, symbol in enumerate(["AAPL", "MSFT", "GOOG"], start=4):
+                broadcaster.publish(symbol, version, {"2023-03-24 12:00:00": {}})
+            self.assertTrue(subscription.dropped)
+            self.assertEqual(broadcaster.get_stats(), {"subscribers": 0, "dropped_total": 1})
+        
+        asyncio.run(scenario())
+    
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_websocket_receives_new_bars(self, mock_get):
+        """Test a WebSocket subscriber gets only the bars each publish adds"""
+        mock_get.return_value = self.bars
+        client = TestClient(app)
+        
+        with client.websocket_connect(f"/api/ws/stream?symbols=aapl&api_key={SERVICE_API_KEY}") as ws:
+            self.assertEqual(ws.receive_json()["symbols"], ["AAPL"])
+            
+            main_stock_service._publish("AAPL")
+            first = ws.receive_json()
+            self.assertEqual(list(first["bars"]), ["2023-03-24 13:00:00"])
+            
+            self.bars["2023-03-24 14:00:00"] = self.bars["2023-03-24 13:00:00"]
+            self.bars["2023-03-24 15:00:00"] = self.bars["2023-03-24 13:00:00"]
+            main_stock_service._publish("AAPL")
+            second = ws.receive_json()
+            self.assertEqual(list(second["bars"]), ["2023-03-24 15:00:00", "2023-03-24 14:00:00"])
+            self.assertGreater(second["version"], first["version"])
+    
+    def test_websocket_requires_api_key(self):
+        """Test a WebSocket without a valid key is closed with a policy violation"""
+        client = TestClient(app)
+        with self.assertRaises(WebSocketDisconnect) as ctx:
+            with client.websocket_connect("/api/ws/stream") as ws:
+                ws.receive_json()
+        self.assertEqual(ctx.exception.code, 1008)
+
+
+class TestBinaryFormats(unittest.TestCase):
+    """Tests for Accept-header negotiation of binary bulk formats"""
+    
+    def setUp(self):
+        self.client = TestClient(app)
+        self.headers = {"x-api-key": SERVICE_API_KEY}
+        self.bars = {
+            f"2023-03-24 {hour:02d}:00:00": {
+                "1. open": "1.5", "2. high": "2.0", "3. low": "0.5", "4. close": str(float(hour)), "5. volume": "5"
+            }
+            for hour in range(10, 14)
+        }
+    
+    def test_negotiate_format(self):
+        """Test q-values, wildcards and unavailable types"""
+        self.assertEqual(negotiate_format(None), FORMAT_JSON)
+        self.assertEqual(negotiate_format("text/html,*/*;q=0.8"), FORMAT_JSON)
+        self.assertIsNone(negotiate_format("text/csv"))
+        with patch('fang_service.core.encoders.MSGPACK_AVAILABLE', True):
+            self.assertEqual(
+                negotiate_format("application/json;q=0.5, application/x-msgpack"), FORMAT_MSGPACK
+            )
+        with patch('fang_service.core.encoders.MSGPACK_AVAILABLE', False):
+            self.assertEqual(negotiate_format("application/msgpack, application/json;q=0.1"), FORMAT_JSON)
+            self.assertIsNone(negotiate_format("application/msgpack"))
+    
+    @unittest.skipUnless(MSGPACK_AVAILABLE, "msgpack not installed")
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_symbol_data_msgpack(self, mock_get):
+        """Test /symbolData returns columnar MessagePack when asked"""
+        import msgpack
+        mock_get.return_value = self.bars
+        
+        response = self.client.get(
+            "/api/symbolData/msft", headers={**self.headers, "Accept": "application/msgpack"}
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/msgpack")
+        payload = msgpack.unpackb(response.content)
+        self.assertEqual(payload["symbols"]["MSFT"]["close"], [10.0, 11.0, 12.0, 13.0])
+        self.assertEqual(payload["symbols"]["MSFT"]["volume"], [5, 5, 5, 5])
+    
+    @unittest.skipUnless(ARROW_AVAILABLE, "pyarrow not installed")
+    def test_arrow_round_trip(self):
+        """Test the Arrow IPC stream carries one batch per symbol with typed columns"""
+        import pyarrow as pa
+        series = SymbolSeries.from_bars(self.bars)
+        
+        table = pa.ipc.open_stream(encode_arrow({"AAPL": series, "MSFT": series}, "60min")).read_all()
+        
+        self.assertEqual(table.num_rows, 8)
+        self.assertEqual(table.schema.metadata[b"interval"], b"60min")
+        self.assertEqual(table.column("symbol").to_pylist()[3:5], ["AAPL", "MSFT"])
+        self.assertEqual(table.column("open").type, pa.float64())
+        self.assertEqual(table.column("timestamp").to_pylist()[0], datetime.datetime(2023, 3, 24, 10, 0))
+
+
+class TestCompression(unittest.TestCase):
+    """Tests for the response compression middleware"""
+    
+    def setUp(self):
+        from fastapi import FastAPI
+        from fastapi.responses import PlainTextResponse, StreamingResponse
+        
+        self.body = "AMZN 98.45 98.87 98.36 98.71 2358035\n" * 200
+        inner = FastAPI()
+        inner.get("/big")(lambda: PlainTextResponse(self.body))
+        inner.get("/small")(lambda: PlainTextResponse("ok"))
+        inner.get("/probe")(lambda: PlainTextResponse(self.body))
+        inner.get("/chunks")(lambda: StreamingResponse(iter([self.body, self.body]), media_type="text/plain"))
+        inner.add_middleware(CompressionMiddleware, minimum_size=500, excluded_paths=["/probe"])
+        self.client = TestClient(inner)
+    
+    def test_choose_encoding(self):
+        """Test client q-values win and ties go to the server's preference"""
+        supported = ["br", "zstd", "gzip"]
+        self.assertEqual(choose_encoding("gzip, br", supported), "br")
+        self.assertEqual(choose_encoding("br;q=0.5, gzip", supported), "gzip")
+        self.assertEqual(choose_encoding("*", ["gzip"]), "gzip")
+        self.assertIsNone(choose_encoding("identity", supported))
+        self.assertIsNone(choose_encoding("gzip;q=0", supported))
+        self.assertIsNone(choose_encoding(None, supported))
+    
+    def test_thresholds_and_exclusions(self):
+        """Test only large, complete, non-excluded responses are compressed"""
+        headers = {"Accept-Encoding": "gzip"}
+        
+        big = self.client.get("/big", headers=headers)
+        self.assertEqual(big.headers["content-encoding"], "gzip")
+        self.assertLess(int(big.headers["content-length"]), len(self.body) // 10)
+        self.assertEqual(big.text, self.body)
+        self.assertIn("Accept-Encoding", big.headers["vary"])
+        
+        self.assertNotIn("content-encoding", self.client.get("/small", headers=headers).headers)
+        self.assertNotIn("content-encoding", self.client.get("/probe", headers=headers).headers)
+        chunks = self.client.get("/chunks", headers=headers)
+        self.assertNotIn("content-encoding", chunks.headers)
+        self.assertEqual(chunks.text, self.body * 2)
+    
+    def test_identical_bodies_reuse_compressed_bytes(self):
+        """Test a repeated payload is compressed once and served from the cache"""
+        with patch('fang_service.core.compression.gzip.compress', wraps=gzip.compress) as mock_compress:
+            first = self.client.get("/big", headers={"Accept-Encoding": "gzip"})
+            second = self.client.get("/big", headers={"Accept-Encoding": "gzip"})
+        
+        self.assertEqual(mock_compress.call_count, 1)
+        self.assertEqual(first.content, second.content)
+
+
+class TestSnapshot(unittest.TestCase):
+    """Tests for the columnar snapshot file and restoring from it"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "fang.snapshot")
+        self.bars = {
+            f"2023-03-24 {hour:02d}:00:00": {
+                "1. open": "1.5", "2. high": "2.0", "3. low": "0.5", "4. close": str(float(hour)), "5. volume": str(hour)
+            }
+            for hour in range(10, 14)
+        }
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_round_trip(self):
+        """Test series come back as read-only views with their versions, and no temp file is left"""
+        series = SymbolSeries.from_bars(self.bars)
+        write_snapshot(self.path, 7, "60min", {"AAPL": series, "MSFT": rollup(series, 120)}, {"AAPL": 3, "MSFT": 7})
+        
+        snapshot = load_snapshot(self.path)
+        
+        self.assertEqual(os.listdir(self.tmpdir.name), ["fang.snapshot"])
+        self.assertEqual(snapshot.data_version, 7)
+        self.assertEqual(snapshot.symbol_versions(), {"AAPL": 3, "MSFT": 7})
+        self.assertEqual(snapshot.series("AAPL").to_bars(), series.to_bars())
+        self.assertEqual(len(snapshot.series("MSFT")), 2)
+        self.assertFalse(snapshot.series("AAPL").close.flags.writeable)
+        self.assertIsNone(snapshot.series("GOOG"))
+        self.assertIsNone(load_snapshot(os.path.join(self.tmpdir.name, "missing")))
+    
+    def test_corruption_detected(self):
+        """Test a flipped byte fails the symbol's checksum, and a damaged header fails the load"""
+        write_snapshot(self.path, 1, "60min", {"AAPL": SymbolSeries.from_bars(self.bars)}, {"AAPL": 1})
+        with open(self.path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+        
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path).series("AAPL")
+        
+        with open(self.path, "r+b") as f:
+            f.seek(30)
+            f.write(b"#")
+        with self.assertRaises(SnapshotError):
+            load_snapshot(self.path)
+    
+    @patch('fang_service.core.db_service.load_last_refresh_success')
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_service_restores_without_database_reads(self, mock_get, mock_last_success):
+        """Test a restarted service serves the snapshot until symbols are refreshed again"""
+        mock_get.return_value = self.bars
+        writer = StockDataService()
+        writer._publish("AAPL")
+        writer._publish("MSFT")
+        self.assertEqual(writer.save_snapshot(self.path), 2)
+        
+        # MSFT was refreshed again after the snapshot was written
+        later = writer.symbol_updated_at["MSFT"] + datetime.timedelta(minutes=5)
+        mock_last_success.return_value = {"MSFT": later.isoformat() + "Z"}
+        mock_get.reset_mock()
+        service = StockDataService()
+        
+        self.assertTrue(service.restore_snapshot(self.path))
+        self.assertEqual(service.data_version, 2)
+        self.assertEqual(service.get_data("aapl"), self.bars)
+        self.assertEqual(service.get_series("AAPL").close.tolist(), [10.0, 11.0, 12.0, 13.0])
+        mock_get.assert_not_called()
+        
+        self.assertNotIn("MSFT", service.symbol_versions)
+        service.get_data("MSFT")
+        mock_get.assert_called_once_with("MSFT")
+        
+        # Republished symbols are read from the database again
+        service._publish("AAPL")
+        service.get_data("AAPL")
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(service.data_version, 3)
+
+    
+    @patch('fang_service.core.db_service.load_last_refresh_success', return_value={})
+    @patch('fang_service.core.db_service.get_stock_data')
+    def test_followers_hot_swap_segments(self, mock_get, _):
+        """Test a follower maps each new segment the updater writes, zero-copy"""
+        mock_get.return_value = self.bars
+        updater = StockDataService()
+        follower = StockDataService()
+        updater._publish("AAPL")
+        updater.save_snapshot(self.path)
+        
+        # The updater serves from the segment it wrote rather than its own copy
+        self.assertFalse(updater.get_series("AAPL").close.flags.writeable)
+        mock_get.reset_mock()
+        
+        self.assertTrue(follower.follow_segment(self.path))
+        self.assertFalse(follower.follow_segment(self.path))
+        self.assertEqual(follower.get_data("AAPL"), self.bars)
+        first = follower.get_data_json("AAPL")
+        
+        mock_get.return_value = {"2023-03-24 15:00:00": self.bars["2023-03-24 10:00:00"]}
+        updater._publish("AAPL")
+        updater._publish("MSFT")
+        updater.save_snapshot(self.path)
+        
+        self.assertTrue(follower.follow_segment(self.path))
+        self.assertEqual(follower.data_version, 3)
+        self.assertEqual(follower.symbol_versions, {"AAPL": 2, "MSFT": 3})
+        self.assertNotEqual(follower.get_data_json("AAPL"), first)
+        self.assertEqual(list(follower.get_data("MSFT")), ["2023-03-24 15:00:00"])
+        self.assertEqual(mock_get.call_count, 2)  # Only the updater read the database
+    
+    @unittest.skipUnless(FCNTL_AVAILABLE, "fcntl not available")
+    def test_updater_lock_is_exclusive(self):
+        """Test only one holder of the updater lock at a time"""
+        path = os.path.join(self.tmpdir.name, "updater.lock")
+        first, second = UpdaterLock(path), UpdaterLock(path)
+        
+        self.assertTrue(first.try_acquire())
+        self.assertFalse(second.try_acquire())
+        first.release()
+        self.assertTrue(second.try_acquire())
+        second.release()
+
+class TestCoalescing(unittest.TestCase):
+    """Tests for single-flight loads and negative caching of unknown symbols"""
+    
+    def setUp(self):
+        self.service = StockDataService()
+    
+    def test_single_flight_shares_result_and_errors(self):
+        """Test concurrent calls with one key run once and all see the result"""
+        flights = SingleFlight()
+        release = threading.Event()
+        results = []
+        
+        def slow():
+            release.wait(5)
+            return object()
+        
+        threads = [threading.Thread(target=lambda: results.append(flights.do("k", slow))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 5
+        while flights.get_stats()["shared"] < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertEqual(len(results), 5)
+        self.assertEqual(len({id(r) for r in results}), 1)
+        self.assertEqual(flights.get_stats(), {"executed": 1, "shared": 4, "in_flight": 0})
+        with self.assertRaises(KeyError):
+            flights.do("k", lambda: {}["missing"])
+    
+    @patch('fang_service.core.db_service.get_stock_data', return_value={})
+    def test_unknown_symbol_cached_until_ttl_or_publish(self, mock_get):
+        """Test repeated misses skip the database until the TTL ends or the symbol is published"""
+        for _ in range(3):
+            self.assertEqual(self.service.get_data("zzzz"), {})
+            self.assertIsNone(self.service.get_data_json("ZZZZ"))
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(self.service.negative_hits, 5)
+        
+        self.service._publish("ZZZZ")
+        self.service.get_data("ZZZZ")
+        self.assertEqual(mock_get.call_count, 2)
+        
+        with patch('fang_service.core.db_service.time.time', return_value=time.time() + 3600):
+            self.service.get_data("ZZZZ")
+        self.assertEqual(mock_get.call_count, 3)
+    
+    @patch('fang_service.core.db_service.get_symbols_with_data', return_value=["AAPL"])
+    def test_symbols_with_data_cached_per_version(self, mock_symbols):
+        """Test the available-symbols list is queried once per published version"""
+        self.assertEqual(self.service.get_symbols_with_data(), ["AAPL"])
+        self.service.get_symbols_with_data()
+        self.assertEqual(mock_symbols.call_count, 1)
+        
+        self.service._publish("MSFT")
+        self.service.get_symbols_with_data()
+        self.assertEqual(mock_symbols.call_count, 2)
+
+class TestFailureHandling(unittest.TestCase):
+    """Tests for the provider circuit breaker and per-symbol cool-down"""
+    
+    def setUp(self):
+        self.service = StockDataService()
+        self.service.breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_seconds=60)
+    
+    def test_breaker_opens_probes_and_closes(self):
+        """Test the circuit opens after consecutive failures and one probe decides"""
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_seconds=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.probe_limit(), 0)
+        
+        time.sleep(0.06)
+        self.assertEqual(breaker.probe_limit(), 1)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # Only one probe at a time
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertGreater(breaker.seconds_until_probe(), 0.05)  # Timeout doubled
+        
+        breaker.record_success()
+        self.assertEqual(breaker.get_stats()["state"], "closed")
+        self.assertIsNone(breaker.probe_limit())
+    
+    def test_backoff_grows_and_clears(self):
+        """Test per-key cool-down starts at the second failure and doubles"""
+        backoff = FailureBackoff(base_seconds=100, max_seconds=250)
+        backoff.record_failure("FB", "gone", now=1000)
+        self.assertIsNone(backoff.retry_at("FB"))
+        backoff.record_failure("FB", "gone", now=1000)
+        self.assertEqual(backoff.retry_at("FB"), 1100)
+        backoff.record_failure("FB", "gone", now=1000)
+        self.assertEqual(backoff.retry_at("FB"), 1200)
+        backoff.record_failure("FB", "gone", now=1000)
+        self.assertEqual(backoff.retry_at("FB"), 1250)
+        self.assertEqual(backoff.get_stats(now=1000)["FB"]["failures"], 4)
+        
+        backoff.record_success("FB")
+        self.assertIsNone(backoff.retry_at("FB"))
+    
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data')
+    def test_provider_outage_defers_symbols(self, mock_fetch):
+        """Test an open circuit stops fetches and reschedules symbols for the probe"""
+        mock_fetch.side_effect = NetworkError("down")
+        first, second = self.service.symbols[0], self.service.symbols[1]
+        
+        self.service.update_cache([first])
+        self.service.update_cache([first])
+        self.assertEqual(self.service.breaker.state, "open")
+        
+        self.service.update_cache([second])
+        self.assertEqual(mock_fetch.call_count, 2)
+        self.assertGreater(self.service.scheduler._due[second], time.time() + 50)
+        self.assertEqual(self.service.run_due_cycle(), 0)
+        # Provider failures don't count against the symbols themselves
+        self.assertEqual(self.service.get_cache_stats()["failing_symbols"], {})
+    
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data')
+    def test_failing_symbol_cools_down(self, mock_fetch):
+        """Test a symbol that keeps failing waits out its cool-down while the provider stays closed"""
+        mock_fetch.side_effect = AuthenticationError("Invalid API call for FB")
+        symbol = self.service.symbols[0]
+        
+        self.service.update_cache([symbol])
+        self.service.update_cache([symbol])
+        
+        self.assertEqual(self.service.breaker.state, "closed")
+        self.assertGreaterEqual(self.service.scheduler._due[symbol], time.time() + 3500)
+        failing = self.service.get_cache_stats()["failing_symbols"]
+        self.assertEqual(failing[symbol]["failures"], 2)
+        self.assertIn("Invalid API call", failing[symbol]["last_error"])
+    
+    @patch('fang_service.core.db_service.UPDATER_CYCLE_BUDGET_SECONDS', 1e-6)
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data')
+    def test_spent_budget_defers_symbols(self, mock_fetch):
+        """Test symbols a pass can't reach within its budget are deferred, not failed"""
+        symbol = self.service.symbols[0]
+        
+        self.assertFalse(self.service.update_cache([symbol]))
+        
+        mock_fetch.assert_not_called()
+        self.assertLessEqual(self.service.scheduler._due[symbol], time.time())
+        self.assertEqual(self.service.breaker.state, "closed")
+        self.assertEqual(self.service.get_cache_stats()["failing_symbols"], {})
+    
+    def test_status_reports_provider(self):
+        """Test /api/status shows the circuit and failing symbols"""
+        response = TestClient(app).get("/api/status")
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("state", response.json()["provider"]["circuit"])
+
+
+class _FakeProvider(MarketDataProvider):
+    """Provider returning a fixed bar, or raising, after an optional delay"""
+    
+    def __init__(self, name, error=None, delay=0.0, quota=None):
+        super().__init__(name, quota)
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+    
+    def fetch_bars(self, symbol, interval, deadline=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"2023-03-24 10:00:00": make_bar(1, 2, 0.5, 1.5, 10)}
+
+
+class TestProviders(unittest.TestCase):
+    """Tests for market data providers, quotas, failover and hedging"""
+    
+    def test_replay_normalizes_and_rebases(self):
+        """Test the replay provider serves seed data as recent normalized bars"""
+        provider = ReplayProvider(REPLAY_PATH)
+        bars = provider.fetch_bars("FB", "60min")
+        
+        newest = label_to_epoch(max(bars))
+        self.assertLess(time.time() - newest, 7 * 86400)
+        self.assertEqual(set(next(iter(bars.values()))), {"1. open", "2. high", "3. low", "4. close", "5. volume"})
+        with self.assertRaises(DataRetrievalError):
+            provider.fetch_bars("ZZZZ", "60min")
+    
+    def test_replay_directory_of_raw_responses(self):
+        """Test a directory of raw Alpha Vantage responses can be replayed as recorded"""
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "AAPL.json"), "w") as f:
+                json.dump({"Meta Data": {}, "Time Series (60min)": {
+                    "2023-03-24 10:00:00": {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "10"},
+                    "bad": {"1. open": "1"}
+                }}, f)
+            bars = ReplayProvider(directory, rebase=False).fetch_bars("AAPL", "60min")
+        
+        self.assertEqual(list(bars), ["2023-03-24 10:00:00"])
+        self.assertEqual(bars["2023-03-24 10:00:00"]["4. close"], "1.5")
+    
+    def test_quota_limits_calls(self):
+        """Test per-minute quota accounting and blocking"""
+        quota = QuotaTracker(calls_per_minute=2)
+        self.assertTrue(quota.try_acquire(now=1000))
+        self.assertTrue(quota.try_acquire(now=1001))
+        self.assertFalse(quota.try_acquire(now=1002))
+        self.assertTrue(quota.try_acquire(now=1061))
+        
+        quota.block(60)
+        self.assertFalse(quota.available())
+        self.assertEqual(quota.get_stats()["refused"], 1)
+    
+    def test_failover_on_rate_limit(self):
+        """Test a rate-limited primary fails over and is skipped while cooling down"""
+        primary = _FakeProvider("primary", error=RateLimitError("limit"))
+        secondary = _FakeProvider("secondary")
+        fetcher = FetchOrchestrator([primary, secondary], rate_limit_cooldown_seconds=60)
+        
+        self.assertIn("2023-03-24 10:00:00", fetcher.fetch("AAPL", "60min"))
+        fetcher.fetch("MSFT", "60min")
+        
+        self.assertEqual((primary.calls, secondary.calls), (1, 2))
+        stats = {p["name"]: p for p in fetcher.get_stats()["providers"]}
+        self.assertEqual(stats["primary"]["rate_limited"], 1)
+        self.assertEqual(stats["primary"]["skipped"], 1)
+    
+    def test_symbol_failure_not_failed_over(self):
+        """Test a provider's answer about the symbol itself decides the outcome"""
+        primary = _FakeProvider("primary", error=AuthenticationError("Invalid API call"))
+        secondary = _FakeProvider("secondary")
+        
+        with self.assertRaises(AuthenticationError):
+            FetchOrchestrator([primary, secondary]).fetch("FB", "60min")
+        self.assertEqual(secondary.calls, 0)
+        
+        out_of_quota = _FakeProvider("primary", quota=QuotaTracker(calls_per_day=1))
+        out_of_quota.quota.try_acquire()
+        with self.assertRaises(RateLimitError):
+            FetchOrchestrator([out_of_quota]).fetch("FB", "60min")
+    
+    def test_hedged_symbol_failure_not_failed_over(self):
+        """Test a hedged fetch also lets an answer about the symbol decide, without calling the next provider"""
+        primary = _FakeProvider("primary", error=AuthenticationError("Invalid API call"))
+        secondary = _FakeProvider("secondary")
+        
+        with self.assertRaises(AuthenticationError):
+            FetchOrchestrator([primary, secondary], hedge_after_seconds=5).fetch("FB", "60min")
+        self.assertEqual(secondary.calls, 0)
+    
+    def test_hedged_request_takes_fastest(self):
+        """Test a slow primary is hedged and the faster answer wins"""
+        primary = _FakeProvider("primary", delay=0.5)
+        secondary = _FakeProvider("secondary")
+        fetcher = FetchOrchestrator([primary, secondary], hedge_after_seconds=0.05)
+        
+        start = time.perf_counter()
+        bars = fetcher.fetch("AAPL", "60min")
+        
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertTrue(bars)
+        self.assertEqual(fetcher.get_stats()["hedged_requests"], 1)
+    
+    def test_percentile_hedge_duplicates_single_provider(self):
+        """Test a lone provider is hedged with a duplicate once its latency tail is known"""
+        provider = _FakeProvider("only", delay=0.01)
+        fetcher = FetchOrchestrator([provider], hedge_percentile=90, hedge_min_seconds=0.02)
+        for _ in range(20):
+            fetcher.fetch("AAPL", "60min")
+        self.assertEqual(fetcher.get_stats()["hedged_requests"], 0)
+        self.assertGreaterEqual(fetcher.hedge_delay(provider), 0.02)
+        
+        provider.delay = 0.3
+        fetcher.fetch("AAPL", "60min")
+        
+        self.assertEqual(fetcher.get_stats()["hedged_requests"], 1)
+        self.assertEqual(provider.calls, 22)
+    
+    def test_deadline_not_failed_over(self):
+        """Test a spent deadline ends the fetch instead of trying the next provider"""
+        primary = _FakeProvider("primary", delay=0.3)
+        secondary = _FakeProvider("secondary", delay=0.3)
+        fetcher = FetchOrchestrator([primary, secondary], hedge_after_seconds=0.05)
+        
+        with self.assertRaises(DeadlineExceededError):
+            fetcher.fetch("AAPL", "60min", deadline=time.monotonic() + 0.1)
+        self.assertEqual(fetcher.get_stats()["deadlines_exceeded"], 1)
+
+
+class TestOnDemand(unittest.TestCase):
+    """Tests for on-demand fetching of untracked symbols"""
+    
+    def setUp(self):
+        self.service = StockDataService()
+    
+    def _wait_for_fetches(self):
+        self.service._get_on_demand_executor().shutdown(wait=True)
+    
+    @patch('fang_service.core.db_service.ON_DEMAND_ENABLED', True)
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data')
+    def test_fetched_symbol_joins_rotation_until_idle(self, mock_fetch):
+        """Test an untracked symbol is fetched once, published, refreshed and evicted when idle"""
+        ts = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:00:00")
+        mock_fetch.return_value = {ts: {"1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "10"}}
+        
+        self.assertTrue(self.service.request_symbol("odtest"))
+        self._wait_for_fetches()
+        
+        mock_fetch.assert_called_once_with(
+            "ODTEST", interval="60min", deadline=None, cancel=self.service._shutdown_event
+        )
+        self.assertIn("ODTEST", self.service.symbol_versions)
+        self.assertIn("ODTEST", self.service.scheduler)
+        self.assertIn(ts, self.service.get_data("ODTEST"))
+        # Already tracked: no second fetch
+        self.assertFalse(self.service.request_symbol("ODTEST"))
+        
+        self.service.on_demand.idle_ttl_seconds = -1
+        self.assertEqual(self.service.evict_idle_symbols(), ["ODTEST"])
+        self.assertNotIn("ODTEST", self.service.scheduler)
+    
+    @patch('fang_service.core.db_service.ON_DEMAND_ENABLED', True)
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data', side_effect=NetworkError("boom"))
+    def test_failed_and_invalid_symbols_refused(self, mock_fetch):
+        """Test a failed fetch isn't retried and non-ticker symbols never go upstream"""
+        self.assertTrue(self.service.request_symbol("ODFAIL"))
+        self._wait_for_fetches()
+        
+        self.assertNotIn("ODFAIL", self.service.scheduler)
+        self.assertFalse(self.service.request_symbol("ODFAIL"))
+        self.assertFalse(self.service.request_symbol("../etc"))
+        self.assertEqual(mock_fetch.call_count, 1)
+    
+    def test_disabled_by_default(self):
+        """Test nothing is fetched unless ON_DEMAND_ENABLED is set"""
+        self.assertFalse(self.service.request_symbol("ODTEST"))
+        self.assertNotIn("ODTEST", self.service.scheduler)
+    
+    def test_pending_symbol_returns_202(self):
+        """Test lookups of a symbol being fetched answer 202 with a retry hint"""
+        client = TestClient(app)
+        headers = {"x-api-key": SERVICE_API_KEY}
+        with patch.object(main_stock_service, 'get_data', return_value={}), \
+             patch.object(main_stock_service, 'get_data_json', return_value=None), \
+             patch.object(main_stock_service, 'request_symbol', return_value=True):
+            response = client.get("/api/getStock?symbol=odnew&date=2023-03-24&hour=10", headers=headers)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()["symbol"], "ODNEW")
+            self.assertIn("Retry-After", response.headers)
+            
+            response = client.get("/api/symbolData/ODNEW", headers=headers)
+            self.assertEqual(response.status_code, 202)
+
+class TestGracefulShutdown(unittest.TestCase):
+    """Tests for draining requests and stopping background work on shutdown"""
+    
+    def test_drain_waits_then_cancels(self):
+        """Test a drain lets short requests finish and cancels those past the deadline"""
+        controller = DrainController()
+        finished = []
+        
+        async def endpoint(scope, receive, send):
+            await asyncio.sleep(scope["delay"])
+            finished.append(scope["delay"])
+        
+        middleware = DrainMiddleware(endpoint, controller)
+        
+        async def scenario():
+            requests = [
+                asyncio.ensure_future(middleware({"type": "http", "delay": delay}, None, None))
+                for delay in (0.01, 5)
+            ]
+            await asyncio.sleep(0)
+            self.assertEqual(controller.in_flight, 2)
+            self.assertTrue(controller.begin())
+            self.assertFalse(controller.begin())
+            
+            drained = await controller.drain(timeout=0.2)
+            results = await asyncio.gather(*requests, return_exceptions=True)
+            return drained, results
+        
+        drained, results = asyncio.run(scenario())
+        
+        self.assertFalse(drained)
+        self.assertEqual(finished, [0.01])
+        self.assertIsInstance(results[1], asyncio.CancelledError)
+        stats = controller.get_stats()
+        self.assertEqual((stats["in_flight"], stats["completed_requests"], stats["cancelled_requests"]), (0, 1, 1))
+        self.assertTrue(stats["draining"])
+    
+    def test_readiness_fails_while_draining(self):
+        """Test /ready reports 503 once draining starts so traffic moves elsewhere"""
+        controller = DrainController()
+        controller.begin()
+        with patch.object(app.state, "drain", controller):
+            response = TestClient(app).get("/api/ready")
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["detail"]["status"], "draining")
+    
+    def test_close_all_ends_streams(self):
+        """Test closing the broadcaster wakes subscribers and refuses new ones"""
+        async def scenario():
+            broadcaster = UpdateBroadcaster()
+            subscription = broadcaster.subscribe(["AAPL"])
+            
+            self.assertEqual(broadcaster.close_all(), 1)
+            self.assertEqual(await subscription.next_batch(timeout=1), [])
+            self.assertTrue(subscription.closed)
+            self.assertTrue(broadcaster.subscribe().closed)
+            self.assertEqual(broadcaster.publish("AAPL", 1, {"2023-03-24 10:00:00": {}}), 0)
+        
+        asyncio.run(scenario())
+    
+    @patch('fang_service.core.db_service.purge_old_data')
+    @patch('fang_service.core.providers.alpha_vantage.fetch_intraday_data')
+    def test_shutdown_defers_unstarted_symbols(self, mock_fetch, mock_purge):
+        """Test fetches not yet started when shutdown begins stay due, without a failure"""
+        service = StockDataService()
+        symbol = service.symbols[0]
+        service.begin_shutdown()
+        
+        self.assertFalse(service.update_cache([symbol]))
+        
+        mock_fetch.assert_not_called()
+        mock_purge.assert_not_called()
+        self.assertLessEqual(service.scheduler._due[symbol], time.time())
+        self.assertEqual(service.get_cache_stats()["failing_symbols"], {})
+    
+    @patch('fang_service.core.data_fetcher.requests.get')
+    def test_shutdown_interrupts_provider_backoff(self, mock_get):
+        """Test shutdown ends a fetch waiting out a rate limit, deferring the symbol"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"Note": "Our standard API call frequency is 5 calls per minute."}
+        mock_get.return_value = mock_response
+        service = StockDataService()
+        symbol = service.symbols[0]
+        threading.Timer(0.1, service.begin_shutdown).start()
+        
+        start = time.monotonic()
+        self.assertFalse(service.update_cache([symbol]))
+        
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertLessEqual(service.scheduler._due[symbol], time.time())
+        self.assertEqual(service.breaker.state, "closed")
+        self.assertEqual(service.get_cache_stats()["failing_symbols"], {})
+    
+    def test_checkpoint_truncates_wal(self):
+        """Test the shutdown checkpoint leaves nothing in the write-ahead log"""
+        upsert_stock_data_batch("WALTEST", {
+            datetime.datetime.utcnow().strftime("%Y-%m-%d %H:00:00"): {
+                "1. open": "1", "2. high": "2", "3. low": "0.5", "4. close": "1.5", "5. volume": "10"
+            }
+        })
+        
+        self.assertTrue(checkpoint_wal())
+        wal_path = get_db_path() + "-wal"
+        self.assertTrue(not os.path.exists(wal_path) or os.path.getsize(wal_path) == 0)
+        
+        with get_db_connection() as conn:
+            conn.execute("DELETE FROM stock_data WHERE symbol = 'WALTEST'")
+            conn.commit()
+
+
+class TestAdmin(unittest.TestCase):
+    """Tests for triggering, pausing and inspecting refreshes at runtime"""
+    
+    def setUp(self):
+        self.service = StockDataService()
+        self.client = TestClient(app)
+    
+    def _wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Condition not met in time")
+            time.sleep(0.01)
+    
+    def test_set_interval_moves_symbols_up(self):
+        """Test a shorter interval pulls waiting symbols forward and rejects non-positive values"""
+        scheduler = RefreshScheduler(["AAPL", "MSFT"], interval_seconds=3600, persist=False)
+        now = time.time()
+        for symbol in scheduler.claim(["AAPL", "MSFT"]):
+            scheduler.mark_done(symbol, True, now=now)
+        
+        self.assertEqual(scheduler.set_interval(60, now=now), 2)
+        self.assertEqual(scheduler.interval_seconds, 60)
+        self.assertLessEqual(scheduler.next_due_time(), now + 60)
+        # Moving back to a longer interval leaves due times alone until the next refresh
+        self.assertEqual(scheduler.set_interval(3600, now=now), 0)
+        with self.assertRaises(ValueError):
+            scheduler.set_interval(0)
+    
+    @patch('fang_service.core.db_service.purge_old_data')
+    def test_triggered_refreshes_coalesce(self, mock_purge):
+        """Test a trigger for a symbol already being fetched joins it instead of fetching again"""
+        first, second = self.service.symbols[:2]
+        release = threading.Event()
+        fetched = []
+        
+        def fake_fetch(symbol, deadline):
+            fetched.append(symbol)
+            release.wait(timeout=5)
+            return True, 0
+        
+        with patch.object(self.service, '_fetch_and_store', side_effect=fake_fetch), \
+             patch.object(self.service, 'maybe_save_snapshot'):
+            result = self.service.trigger_refresh([first.lower()])
+            self.assertEqual((result["status"], result["queued"]), ("started", [first]))
+            self._wait_for(lambda: fetched)
+            
+            result = self.service.trigger_refresh([first, second])
+            self.assertEqual(result["status"], "coalesced")
+            self.assertEqual((result["queued"], result["already_pending"]), ([second], [first]))
+            
+            state = self.service.get_updater_state()
+            self.assertEqual(state["cycle"]["current"]["trigger"], "admin")
+            self.assertEqual(state["cycle"]["current"]["symbols"], {first: "fetching"})
+            self.assertEqual(state["triggered"]["pending"], [second])
+            
+            release.set()
+            self._wait_for(lambda: self.service._refresh_thread is None)
+        
+        self.assertEqual(fetched, [first, second])
+        state = self.service.get_updater_state()
+        self.assertIsNone(state["cycle"]["current"])
+        self.assertEqual(state["cycle"]["last"]["counts"], {"updated": 1})
+        self.assertEqual((state["triggered"]["triggers_total"], state["triggered"]["coalesced_total"]), (2, 1))
+        with self.assertRaises(ValueError):
+            self.service.trigger_refresh(["NOTTRACKED"])
+    
+    def test_shutdown_stops_waiting_triggered_refresh(self):
+        """Test a triggered refresh queued behind a pass at shutdown ends without fetching or a new pool"""
+        symbol = self.service.symbols[0]
+        shutdown = threading.Thread(target=self.service.shutdown)
+        
+        with patch.object(self.service, '_fetch_and_store') as mock_fetch:
+            with self.service._update_lock:  # A pass in progress
+                self.assertEqual(self.service.trigger_refresh([symbol])["status"], "started")
+                refresh_thread = self.service._refresh_thread
+                shutdown.start()
+                self._wait_for(self.service._shutdown_event.is_set)
+            shutdown.join(timeout=5)
+        
+        self.assertFalse(shutdown.is_alive())
+        self.assertFalse(refresh_thread.is_alive())
+        mock_fetch.assert_not_called()
+        self.assertIsNone(self.service.cycles.get_stats()["current"])
+        with self.assertRaises(RuntimeError):
+            self.service._get_executor()
+        self.assertEqual(self.service.trigger_refresh([symbol])["status"], "shutting_down")
+    
+    def test_paused_updater_skips_scheduled_passes(self):
+        """Test pausing stops scheduled passes until resumed, which wakes the updater"""
+        self.assertTrue(self.service.pause_updater()["changed"])
+        self.assertFalse(self.service.pause_updater()["changed"])
+        
+        with patch.object(self.service, '_take_updater_role', return_value=True), \
+             patch.object(self.service, 'run_due_cycle', return_value=0) as mock_cycle, \
+             patch.object(self.service, 'maybe_save_snapshot'), \
+             patch.object(self.service, 'evict_idle_symbols'):
+            self.service.start_background_updater()
+            time.sleep(0.2)
+            mock_cycle.assert_not_called()
+            self.assertTrue(self.service.get_updater_state()["paused"])
+            
+            self.assertTrue(self.service.resume_updater()["changed"])
+            self._wait_for(lambda: mock_cycle.called)
+            self.service.stop_background_updater()
+        
+        self.assertFalse(self.service.get_updater_state()["running"])
+    
+    def test_admin_api_disabled_without_its_own_key(self):
+        """Test the admin API is hidden unless ADMIN_API_KEY is set apart from the client key"""
+        headers = {"x-api-key": SERVICE_API_KEY}
+        with patch('fang_service.routers.admin.ADMIN_API_KEY', ""):
+            self.assertEqual(self.client.get("/api/admin/updater", headers=headers).status_code, 404)
+        with patch('fang_service.routers.admin.ADMIN_API_KEY', SERVICE_API_KEY):
+            self.assertEqual(self.client.post("/api/admin/updater/pause", headers=headers).status_code, 404)
+        self.assertFalse(main_stock_service.get_updater_state()["paused"])
+    
+    @patch('fang_service.routers.admin.ADMIN_API_KEY', "test-admin-key")
+    def test_follower_refuses_admin_changes(self):
+        """Test a worker that doesn't run the updater answers 409 and changes nothing"""
+        headers = {"x-api-key": "test-admin-key"}
+        interval = main_stock_service.scheduler.interval_seconds
+        with patch.object(main_stock_service, 'role', "follower"):
+            for method, path, body in (
+                ("post", "/api/admin/updater/pause", None),
+                ("post", "/api/admin/updater/resume", None),
+                ("put", "/api/admin/updater/interval", {"minutes": 1}),
+                ("post", "/api/admin/refresh", {})
+            ):
+                response = self.client.request(method, path, json=body, headers=headers)
+                self.assertEqual(response.status_code, 409, path)
+            state = main_stock_service.get_updater_state()
+        
+        self.assertFalse(state["paused"])
+        self.assertEqual(state["interval_seconds"], interval)
+        self.assertEqual(state["triggered"]["pending"], [])
+    
+    @patch('fang_service.routers.admin.ADMIN_API_KEY', "test-admin-key")
+    def test_admin_endpoints(self):
+        """Test the admin API requires the admin key and maps bad input to 400 and 422"""
+        headers = {"x-api-key": "test-admin-key"}
+        self.assertEqual(self.client.get("/api/admin/updater").status_code, 401)
+        self.assertEqual(self.client.post("/api/admin/updater/pause", headers={"x-api-key": "wrong"}).status_code, 401)
+        self.assertEqual(
+            self.client.post("/api/admin/updater/pause", headers={"x-api-key": SERVICE_API_KEY}).status_code, 401
+        )
+        
+        response = self.client.get("/api/admin/updater", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("cycle", response.json())
+        
+        response = self.client.post("/api/admin/refresh", json={"symbols": ["NOTTRACKED"]}, headers=headers)
+        self.assertEqual(response.status_code, 400)
+        
+        self.assertEqual(
+            self.client.put("/api/admin/updater/interval", json={"minutes": 0}, headers=headers).status_code, 422
+        )
+        moved = {"status": "ok", "interval_seconds": 900, "symbols_moved_up": 3}
+        with patch.object(main_stock_service, 'set_refresh_interval', return_value=moved) as mock_interval:
+            response = self.client.put("/api/admin/updater/interval", json={"minutes": 15}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["symbols_moved_up"], 3)
+        mock_interval.assert_called_once_with(15)
+
+
 class TestRandomTests(unittest.TestCase):
     """Tests for the random_tests module"""
     
@@ -197,6 +1883,26 @@ class TestAPI(unittest.TestCase):
         self.assertIn("endpoint", data)
         self.assertEqual(data["endpoint"], "/getStock")
     
+    def test_indicators_unknown_indicator(self):
+        """Test an unknown indicator is a 400"""
+        response = self.client.get(
+            "/api/indicators?symbol=FB&indicator=rsi",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("rsi", response.json()["detail"])
+    
+    def test_batch_point_and_range_conflict(self):
+        """Test a batch item can't mix timestamp and start/end"""
+        response = self.client.post(
+            "/api/batch",
+            json={"items": [{"symbol": "FB", "timestamp": "2023-03-24 10:00:00", "end": "2023-03-24"}]},
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 422)
+    
     def test_get_stock_auth_required(self):
         """Test that authentication is required"""
         # Request without API key
@@ -206,6 +1912,16 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 401)
         self.assertIn("Invalid or missing API key", response.json()["detail"])
     
+    def test_get_stock_invalid_interval(self):
+        """Test an interval finer than the ingest interval is a 400"""
+        response = self.client.get(
+            "/api/getStock?symbol=FB&date=2023-03-24&hour=10&interval=1min",
+            headers=self.headers
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("1min", response.json()["detail"])
+    
     @patch('fang_service.routers.get_stock.StocksCache')
     def test_get_stock_valid_request(self, mock_cache_class):
         """Test a valid request to get stock data"""